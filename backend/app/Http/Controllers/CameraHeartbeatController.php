@@ -13,9 +13,9 @@ class CameraHeartbeatController extends Controller
     /**
      * Store camera heartbeat.
      *
-     * Update camera status and connection timestamp
+     * Update camera status, connection timestamp and pipeline stats
      */
-    #[Endpoint(title: 'Camera heartbeat', description: 'Update camera status and connection timestamp')]
+    #[Endpoint(title: 'Camera heartbeat', description: 'Update camera status, connection timestamp and pipeline stats')]
     public function store(CameraHeartbeatRequest $request)
     {
         $validated = $request->validated();
@@ -36,6 +36,14 @@ public function store(CameraHeartbeatRequest $request)
             if ($camera->status === 'inactive' && $validated['status'] === 'active') {
                 $updateData['disconnected_at'] = null;
             }
+
+            if ($camera->status === 'active' && $validated['status'] === 'inactive') {
+                $updateData['disconnected_at'] = now();
+            }
+        }
+
+        if (isset($validated['stats'])) {
+            $updateData['pipeline_stats'] = $validated['stats'];
         }
 
         $camera->update($updateData);
@@ -9,7 +9,9 @@
 use App\Models\Violation;
 use Dedoc\Scramble\Attributes\Endpoint;
 use Dedoc\Scramble\Attributes\Group;
+use Illuminate\Database\UniqueConstraintViolationException;
 use Illuminate\Http\Request;
+use Illuminate\Support\Facades\DB;
 use Illuminate\Support\Facades\Storage;
 
 #[Group('Violations', weight: 2)]
@@ -43,12 +45,18 @@ public function index(Request $request)
     /**
      * Store a newly created resource in storage.
      *
-     * Create a new violation with image and details
+     * Create a new violation with image and details. A retried request with the
+     * same Idempotency-Key header returns the violation created the first time.
      */
     #[Endpoint(title: 'Create violation', description: 'Create a new violation with image and details')]
     public function store(ViolationStoreRequest $request)
     {
         $validated = $request->validated();
+        $idempotencyKey = $validated['idempotency_key'] ?? null;
+
+        if ($idempotencyKey && $existing = $this->findByIdempotencyKey($idempotencyKey)) {
+            return $this->success($existing, 'Success');
+        }
 
         // Handle image upload
         $imagePath = $request->file('image')->store('violations', 'public');
@@ -56,29 +64,55 @@ public function store(ViolationStoreRequest $request)
         // Find camera by code
         $camera = Camera::where('code', $validated['camera_code'])->firstOrFail();
 
-        // Create violation
-        $violation = Violation::create([
-            'camera_id' => $camera->id,
-            'image_path' => $imagePath,
-            'status' => 'pending',
-            'notes' => $validated['notes'] ?? null,
-        ]);
-
-        // Create violation details
-        foreach ($validated['violation_details'] as $detail) {
-            $violationType = \App\Models\ViolationType::where('code', $detail['violation_code'])->firstOrFail();
-
-            $violation->violationDetails()->create([
-                'violation_type_id' => $violationType->id,
-                'confidence_score' => $detail['confidence_score'] ?? null,
-                'additional_info' => $detail['additional_info'] ?? null,
-                'status' => 'unverified',
-            ]);
+        try {
+            $violation = DB::transaction(function () use ($validated, $camera, $imagePath, $idempotencyKey) {
+                // Create violation
+                $violation = Violation::create([
+                    'camera_id' => $camera->id,
+                    'image_path' => $imagePath,
+                    'status' => 'pending',
+                    'notes' => $validated['notes'] ?? null,
+                    'idempotency_key' => $idempotencyKey,
+                ]);
+
+                // Create violation details
+                foreach ($validated['violation_details'] as $detail) {
+                    $violationType = \App\Models\ViolationType::where('code', $detail['violation_code'])->firstOrFail();
+
+                    $violation->violationDetails()->create([
+                        'violation_type_id' => $violationType->id,
+                        'confidence_score' => $detail['confidence_score'] ?? null,
+                        'additional_info' => $detail['additional_info'] ?? null,
+                        'status' => 'unverified',
+                    ]);
+                }
+
+                return $violation;
+            });
+        } catch (UniqueConstraintViolationException $e) {
+            // A concurrent retry with the same key was stored first
+            Storage::disk('public')->delete($imagePath);
+            $existing = $idempotencyKey ? $this->findByIdempotencyKey($idempotencyKey) : null;
+            if (! $existing) {
+                throw $e;
+            }
+
+            return $this->success($existing, 'Success');
         }
 
         return $this->created($violation->load(['camera', 'violationDetails.violationType']), 'Success');
     }
 
+    /**
+     * Violation stored earlier by a request with this Idempotency-Key.
+     */
+    private function findByIdempotencyKey(string $idempotencyKey): ?Violation
+    {
+        return Violation::with(['camera', 'violationDetails.violationType'])
+            ->where('idempotency_key', $idempotencyKey)
+            ->first();
+    }
+
     /**
      * Display the specified resource.
      *
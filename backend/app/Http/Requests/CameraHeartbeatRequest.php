@@ -16,6 +16,7 @@ public function rules(): array
         return [
             'camera_code' => ['required', 'string', 'exists:cameras,code'],
             'status' => ['nullable', 'string', 'in:active,inactive,maintenance'],
+            'stats' => ['nullable', 'array'],
         ];
     }
 }
@@ -11,12 +11,23 @@ public function authorize(): bool
         return true;
     }
 
+    /**
+     * Validate the Idempotency-Key header along with the body.
+     */
+    protected function prepareForValidation(): void
+    {
+        if ($this->hasHeader('Idempotency-Key')) {
+            $this->merge(['idempotency_key' => $this->header('Idempotency-Key')]);
+        }
+    }
+
     public function rules(): array
     {
         return [
             'image' => ['required', 'file', 'image', 'mimes:jpg,jpeg,png,webp', 'max:10240'],
             'camera_code' => ['required', 'exists:cameras,code'],
             'notes' => ['nullable', 'string'],
+            'idempotency_key' => ['nullable', 'string', 'max:255'],
             'violation_details' => ['required', 'array', 'min:1'],
             'violation_details.*.violation_code' => ['required', 'exists:violation_types,code'],
             'violation_details.*.confidence_score' => ['nullable', 'numeric', 'between:0,1'],
@@ -20,6 +20,7 @@ class Camera extends Model
         'last_maintenance_at',
         'yolo_detection_status',
         'yolo_service_url',
+        'pipeline_stats',
     ];
 
     protected function casts(): array
@@ -30,6 +31,7 @@ protected function casts(): array
             'disconnected_at' => 'datetime',
             'last_maintenance_at' => 'datetime',
             'yolo_detection_status' => 'boolean',
+            'pipeline_stats' => 'array',
         ];
     }
 }
@@ -16,6 +16,7 @@ class Violation extends Model
         'image_path',
         'status',
         'notes',
+        'idempotency_key',
     ];
 
     protected function casts(): array
@@ -59,3 +59,49 @@
         ->assertJsonPath('statusCode', 422)
         ->assertJsonStructure(['data']);
 });
+
+test('store saves pipeline stats when provided', function () {
+    $camera = Camera::factory()->create([
+        'code' => 'CAM003',
+        'status' => 'active',
+    ]);
+
+    $stats = [
+        'decode_fps' => 24.9,
+        'inference_fps' => 12.5,
+        'dropped_frames' => 3,
+        'queue_depths' => ['frames' => 1, 'results' => 0],
+        'latency_p95_ms' => ['inference' => 41.2, 'output' => 3.4],
+    ];
+
+    $response = $this->postJson('/api/camera-heartbeat', [
+        'camera_code' => 'CAM003',
+        'status' => 'active',
+        'stats' => $stats,
+    ]);
+
+    $response->assertStatus(200)
+        ->assertJsonPath('data.pipeline_stats.dropped_frames', 3);
+
+    $camera->refresh();
+    expect($camera->pipeline_stats)->toBe($stats);
+});
+
+test('store marks a stalled camera as disconnected', function () {
+    $camera = Camera::factory()->create([
+        'code' => 'CAM004',
+        'status' => 'active',
+        'disconnected_at' => null,
+    ]);
+
+    $response = $this->postJson('/api/camera-heartbeat', [
+        'camera_code' => 'CAM004',
+        'status' => 'inactive',
+    ]);
+
+    $response->assertStatus(200);
+
+    $camera->refresh();
+    expect($camera->status)->toBe('inactive')
+        ->and($camera->disconnected_at)->not->toBeNull();
+});
@@ -173,6 +173,76 @@
     Storage::disk('public')->assertExists('violations/'.$response->json('data.image_path'));
 });
 
+test('retried violation with the same idempotency key is stored once', function () {
+    $camera = Camera::factory()->create();
+    $violationType = ViolationType::factory()->create();
+
+    $data = fn () => [
+        'image' => UploadedFile::fake()->image('violation.jpg', 800, 600),
+        'camera_code' => $camera->code,
+        'violation_details' => [
+            [
+                'violation_code' => $violationType->code,
+                'confidence_score' => 0.9,
+            ],
+        ],
+    ];
+    $headers = ['X-API-KEY' => 'test-api-key', 'Idempotency-Key' => 'CAM001-0001'];
+
+    $first = $this->withHeaders($headers)->postJson('/api/violations', $data());
+    $retry = $this->withHeaders($headers)->postJson('/api/violations', $data());
+
+    $first->assertStatus(201);
+    $retry->assertStatus(200)
+        ->assertJsonPath('data.id', $first->json('data.id'))
+        ->assertJsonPath('data.image_path', $first->json('data.image_path'))
+        ->assertJsonCount(1, 'data.violation_details');
+
+    expect(Violation::count())->toBe(1)
+        ->and(ViolationDetail::count())->toBe(1)
+        ->and(Storage::disk('public')->files('violations'))->toHaveCount(1);
+
+    $this->assertDatabaseHas('violations', ['idempotency_key' => 'CAM001-0001']);
+});
+
+test('violations with different idempotency keys are stored separately', function () {
+    $camera = Camera::factory()->create();
+    $violationType = ViolationType::factory()->create();
+
+    foreach (['CAM001-0001', 'CAM001-0002'] as $key) {
+        $this->withHeaders(['X-API-KEY' => 'test-api-key', 'Idempotency-Key' => $key])
+            ->postJson('/api/violations', [
+                'image' => UploadedFile::fake()->image('violation.jpg', 800, 600),
+                'camera_code' => $camera->code,
+                'violation_details' => [
+                    ['violation_code' => $violationType->code],
+                ],
+            ])
+            ->assertStatus(201);
+    }
+
+    expect(Violation::count())->toBe(2);
+});
+
+test('cannot create violation with too long idempotency key', function () {
+    $camera = Camera::factory()->create();
+    $violationType = ViolationType::factory()->create();
+
+    $response = $this->withHeaders([
+        'X-API-KEY' => 'test-api-key',
+        'Idempotency-Key' => str_repeat('k', 256),
+    ])->postJson('/api/violations', [
+        'image' => UploadedFile::fake()->image('violation.jpg', 800, 600),
+        'camera_code' => $camera->code,
+        'violation_details' => [
+            ['violation_code' => $violationType->code],
+        ],
+    ]);
+
+    $response->assertStatus(422);
+    expect(Violation::count())->toBe(0);
+});
+
 test('cannot create violation when api key is missing', function () {
     $camera = Camera::factory()->create();
     $violationType = ViolationType::factory()->create();
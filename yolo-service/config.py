@@ -6,6 +6,11 @@ STREAM_URL = "https://cctv-dishub.tangerangkab.go.id/storage/video/01jsrepbfdren
 WEBCAM_DEVICE_INDEX = 0
 STREAM_FILE_PATH = "assets/demo.mp4"
 
+# Multi-Camera Configuration
+# Each entry: {"code": "CAM002", "source_type": "url" | "webcam" | "file", "source": ...}
+# Leave empty to run the single camera configured above (CAMERA_CODE / STREAM_*).
+CAMERAS = []
+
 # HTTP Server Configuration
 PORT = 8081
 
@@ -15,17 +20,87 @@ OUTPUT_FILE = f"{OUTPUT_DIR}/stream.m3u8"
 HLS_TIME = 10
 HLS_LIST_SIZE = 10
 HLS_DELETE_THRESHOLD = 1
+# Low-latency HLS: fMP4 parts of HLS_PART_DURATION seconds (one keyframe
+# each), HLS_SEGMENT_PARTS per segment, and a server-built playlist with
+# blocking reload. Players stay about 2-3 seconds behind; HLS_TIME is unused.
+HLS_LOW_LATENCY = False
+HLS_PART_DURATION = 0.5
+HLS_SEGMENT_PARTS = 4
 
 # YOLO Configuration
 YOLO_MODEL_PATH = "models/best.pt"
 YOLO_CLASSES = [0, 1, 2, 3, 4, 5]  # apron, hairnet, mask, no-apron, no-hairnet, no-mask
-YOLO_DEVICE = "mps"
+YOLO_DEVICE = "auto"  # auto, cpu, cuda, or mps (torch backend only)
+YOLO_BACKEND = "torch"  # torch, onnx (ONNX Runtime), or openvino
+YOLO_IMGSZ = 640  # model input size; exported models are cached per size
+YOLO_CONF_THRESHOLD = 0.25
+YOLO_IOU_THRESHOLD = 0.7
+YOLO_INTRA_OP_THREADS = 0  # threads inside one operator (0 = runtime default)
+YOLO_INTER_OP_THREADS = 0  # operators/streams run in parallel (0 = runtime default)
+YOLO_WARMUP_RUNS = 1  # blank inferences at startup
+YOLO_MAX_BATCH_SIZE = 8  # frames per shared model call in multi-camera mode
+
+# Inference Cadence Configuration
+# every_frame: run the model on every frame
+# fixed: run it every INFERENCE_INTERVAL frames
+# adaptive: pick the interval from measured latency to stay within INFERENCE_CPU_BUDGET
+INFERENCE_CADENCE = "every_frame"
+INFERENCE_INTERVAL = 3
+INFERENCE_CPU_BUDGET = 0.5  # share of wall time the model may use (adaptive)
+INFERENCE_TARGET_FPS = None  # optional inferences/s cap per camera (adaptive)
+INFERENCE_MAX_INTERVAL = 15  # never carry boxes forward longer than this (frames)
+BOX_PROPAGATION = "optical_flow"  # optical_flow or hold (between inferences)
+# ffmpeg also outputs a copy scaled to this width for the model (url/file sources)
+INFERENCE_STREAM_WIDTH = None  # e.g. 640 (None = model gets the full frame)
+
+# Inference Worker Configuration
+# Run the model in this many worker processes instead of the main process, so
+# inference does not hold the GIL the server and encoders need (0 = off).
+# Each worker loads its own copy of the model.
+INFERENCE_WORKERS = 0
+INFERENCE_WORKER_RING_SLOTS = 8  # shared-memory frame slots (frames in flight)
+
+# Motion Gate Configuration (skip inference while the scene is static)
+MOTION_GATE_ENABLED = False
+MOTION_GATE_PIXEL_THRESHOLD = 25  # gray level difference that counts as change
+MOTION_GATE_CHANGE_THRESHOLD = 0.01  # share of changed pixels that counts as motion
+MOTION_GATE_MAX_SKIP_SECONDS = 5.0  # run the model at least this often per camera
 
 # Backend Integration Configuration
 CAMERA_CODE = "CAM001"
 BACKEND_API_URL = "http://localhost:8000"
 BACKEND_API_KEY = "test-api-key"
-VIOLATION_DELAY = 5  # seconds (range: 3-10)
+VIOLATION_DELAY = 5  # seconds (range: 3-10), per-type cooldown without tracking
+
+# Violation Outbox (durable queue in front of the backend)
+OUTBOX_PATH = "data/violation_outbox.sqlite3"
+OUTBOX_EVIDENCE_DIR = "data/evidence"
+OUTBOX_MAX_ITEMS = 1000  # oldest undelivered violations dropped beyond this
+OUTBOX_MAX_AGE_SECONDS = 7 * 24 * 3600  # drop undelivered violations older than this
+OUTBOX_CONCURRENCY = 2  # submissions in flight at once
+OUTBOX_RETRY_BASE_SECONDS = 2  # first retry delay, doubled per failed attempt
+OUTBOX_RETRY_MAX_SECONDS = 300  # retry delay cap
+SUBMITTER_DRAIN_TIMEOUT = 10  # seconds to finish uploads on shutdown
+BACKEND_KEEPALIVE_SECONDS = 30  # idle keep-alive connections closed after this
+
+# Camera Heartbeat (status and pipeline stats sent to /api/camera-heartbeat)
+HEARTBEAT_ENABLED = True
+HEARTBEAT_INTERVAL_SECONDS = 30
+HEARTBEAT_STALL_SECONDS = 10  # report a camera inactive after this long without frames
+
+# Violation Tracking (report each offender once instead of once per cooldown)
+VIOLATION_TRACKING = True
+VIOLATION_REREPORT_SECONDS = 300  # report the same tracked offender again after
+TRACKER_IOU_THRESHOLD = 0.3  # min box overlap to continue a track
+TRACKER_HIGH_CONFIDENCE = 0.5  # confidence needed to start a track
+TRACKER_MAX_AGE_SECONDS = 2.0  # drop a track not seen for this long
+
+# Pipeline Configuration
+PIPELINE_HANDOFF_POLICY = (
+    "auto"  # auto (file: block, live: drop_oldest), drop_oldest, block
+)
+PIPELINE_BUFFER_SIZE = 1  # frames held between two stages (1 = single slot)
+FRAME_POOL_SIZE = 4  # reusable frame buffers preallocated per camera
 
 # Display Configuration
 DISPLAY_WINDOW_NAME = "Video Stream"
@@ -35,6 +110,14 @@ QUIT_KEY = "q"
 FFMPEG_PROTOCOL_WHITELIST = "file,http,https,tcp,tls,crypto"
 FFMPEG_LOGLEVEL = "error"
 FFMPEG_TIMEOUT = 10
+FFMPEG_PROBE_CACHE_PATH = "data/stream_probe_cache.json"
+FFMPEG_PROBE_CACHE_TTL_SECONDS = 24 * 3600  # reuse probe results this long (0 = off)
+
+# Stream Supervisor (reconnects, see modules/stream_supervisor.py)
+STREAM_READ_TIMEOUT_SECONDS = 10.0  # restart a stream that delivers no frame this long
+STREAM_RECONNECT_BASE_SECONDS = 1.0  # first reconnect delay, doubled per failed attempt
+STREAM_RECONNECT_MAX_SECONDS = 30.0  # reconnect delay cap
+STREAM_HOT_STANDBY = False  # keep a second decoder running to swap in (2x decode CPU)
 
 # Output Mode Configuration
 OUTPUT_MODE = "sse"
@@ -43,10 +126,35 @@ OUTPUT_MODE = "sse"
 SSE_BOUNDARY = "frame"
 SSE_JPEG_QUALITY = 85
 SSE_CONTENT_TYPE = "multipart/x-mixed-replace; boundary=frame"
-SSE_MAX_QUEUE_SIZE = 10
+SSE_VARIANT_IDLE_SECONDS = 10  # evict a /stream variant after this long unused
+EVENT_LOOP_LAG_INTERVAL_SECONDS = 0.5  # how often the HTTP server samples loop lag
+
+# HTTP Server Process Configuration
+# Serve FastAPI from a separate process fed through shared memory, so slow
+# viewers and JPEG encoding cannot take CPU time from the detection pipeline
+HTTP_SERVER_PROCESS = False
+HTTP_SERVER_WORKERS = 1  # uvicorn worker processes (needs HTTP_SERVER_PROCESS)
+HTTP_SHARED_POLL_SECONDS = 0.005  # how often the server checks for new frames
+HTTP_STATUS_INTERVAL_SECONDS = 1.0  # how often the pipeline publishes its status
 
 # Configuration Validation
 assert 3 <= VIOLATION_DELAY <= 10, "VIOLATION_DELAY must be between 3 and 10 seconds"
+assert OUTBOX_MAX_ITEMS >= 1, "OUTBOX_MAX_ITEMS must be at least 1"
+assert OUTBOX_MAX_AGE_SECONDS > 0, "OUTBOX_MAX_AGE_SECONDS must be positive"
+assert OUTBOX_CONCURRENCY >= 1, "OUTBOX_CONCURRENCY must be at least 1"
+assert 0 < OUTBOX_RETRY_BASE_SECONDS <= OUTBOX_RETRY_MAX_SECONDS, (
+    "OUTBOX_RETRY_BASE_SECONDS must be positive and at most OUTBOX_RETRY_MAX_SECONDS"
+)
+assert SUBMITTER_DRAIN_TIMEOUT >= 0, "SUBMITTER_DRAIN_TIMEOUT must not be negative"
+assert BACKEND_KEEPALIVE_SECONDS > 0, "BACKEND_KEEPALIVE_SECONDS must be positive"
+assert HEARTBEAT_INTERVAL_SECONDS > 0, "HEARTBEAT_INTERVAL_SECONDS must be positive"
+assert HEARTBEAT_STALL_SECONDS > 0, "HEARTBEAT_STALL_SECONDS must be positive"
+assert VIOLATION_REREPORT_SECONDS >= VIOLATION_DELAY, (
+    "VIOLATION_REREPORT_SECONDS must be at least VIOLATION_DELAY"
+)
+assert 0 < TRACKER_IOU_THRESHOLD < 1, "TRACKER_IOU_THRESHOLD must be in (0, 1)"
+assert 0 <= TRACKER_HIGH_CONFIDENCE <= 1, "TRACKER_HIGH_CONFIDENCE must be in [0, 1]"
+assert TRACKER_MAX_AGE_SECONDS > 0, "TRACKER_MAX_AGE_SECONDS must be positive"
 assert isinstance(CAMERA_CODE, str) and CAMERA_CODE, (
     "CAMERA_CODE must be a non-empty string"
 )
@@ -57,3 +165,55 @@ assert isinstance(BACKEND_API_KEY, str), "BACKEND_API_KEY must be a string"
 assert STREAM_SOURCE_TYPE in ["url", "webcam", "file"], (
     "STREAM_SOURCE_TYPE must be 'url', 'webcam', or 'file'"
 )
+assert all(
+    camera.get("code") and camera.get("source_type") in ["url", "webcam", "file"]
+    for camera in CAMERAS
+), "Each CAMERAS entry needs a 'code' and a valid 'source_type'"
+assert len({camera["code"] for camera in CAMERAS}) == len(CAMERAS), (
+    "CAMERAS codes must be unique"
+)
+assert PIPELINE_HANDOFF_POLICY in ["auto", "drop_oldest", "block"], (
+    "PIPELINE_HANDOFF_POLICY must be 'auto', 'drop_oldest', or 'block'"
+)
+assert PIPELINE_BUFFER_SIZE >= 1, "PIPELINE_BUFFER_SIZE must be at least 1"
+assert FRAME_POOL_SIZE >= 1, "FRAME_POOL_SIZE must be at least 1"
+assert YOLO_BACKEND in ["torch", "onnx", "openvino"], (
+    "YOLO_BACKEND must be 'torch', 'onnx', or 'openvino'"
+)
+assert YOLO_MAX_BATCH_SIZE >= 1, "YOLO_MAX_BATCH_SIZE must be at least 1"
+assert INFERENCE_CADENCE in ["every_frame", "fixed", "adaptive"], (
+    "INFERENCE_CADENCE must be 'every_frame', 'fixed', or 'adaptive'"
+)
+assert 0 < INFERENCE_CPU_BUDGET <= 1, "INFERENCE_CPU_BUDGET must be in (0, 1]"
+assert 0 < MOTION_GATE_CHANGE_THRESHOLD <= 1, (
+    "MOTION_GATE_CHANGE_THRESHOLD must be in (0, 1]"
+)
+assert INFERENCE_STREAM_WIDTH is None or INFERENCE_STREAM_WIDTH >= 32, (
+    "INFERENCE_STREAM_WIDTH must be None or at least 32"
+)
+assert BOX_PROPAGATION in ["optical_flow", "hold"], (
+    "BOX_PROPAGATION must be 'optical_flow' or 'hold'"
+)
+assert EVENT_LOOP_LAG_INTERVAL_SECONDS > 0, (
+    "EVENT_LOOP_LAG_INTERVAL_SECONDS must be positive"
+)
+assert INFERENCE_WORKERS >= 0, "INFERENCE_WORKERS must not be negative"
+assert INFERENCE_WORKER_RING_SLOTS >= 1, (
+    "INFERENCE_WORKER_RING_SLOTS must be at least 1"
+)
+assert HTTP_SERVER_WORKERS >= 1, "HTTP_SERVER_WORKERS must be at least 1"
+assert HTTP_SERVER_WORKERS == 1 or HTTP_SERVER_PROCESS, (
+    "HTTP_SERVER_WORKERS above 1 requires HTTP_SERVER_PROCESS"
+)
+assert HTTP_SHARED_POLL_SECONDS > 0, "HTTP_SHARED_POLL_SECONDS must be positive"
+assert HTTP_STATUS_INTERVAL_SECONDS > 0, "HTTP_STATUS_INTERVAL_SECONDS must be positive"
+assert FFMPEG_PROBE_CACHE_TTL_SECONDS >= 0, (
+    "FFMPEG_PROBE_CACHE_TTL_SECONDS must not be negative"
+)
+assert 0.1 <= HLS_PART_DURATION <= 2, "HLS_PART_DURATION must be in [0.1, 2] seconds"
+assert HLS_SEGMENT_PARTS >= 2, "HLS_SEGMENT_PARTS must be at least 2"
+assert STREAM_READ_TIMEOUT_SECONDS > 0, "STREAM_READ_TIMEOUT_SECONDS must be positive"
+assert 0 < STREAM_RECONNECT_BASE_SECONDS <= STREAM_RECONNECT_MAX_SECONDS, (
+    "STREAM_RECONNECT_BASE_SECONDS must be positive and at most "
+    "STREAM_RECONNECT_MAX_SECONDS"
+)
@@ -1,25 +1,65 @@
 """HLS CCTV Streamer - Main Orchestration"""
 
-import asyncio
 import cv2
+import multiprocessing
 import threading
 import time
 import glob
 import os
+import shutil
 import numpy as np
-from typing import Dict, List
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable
 from modules import (
     start_http_server,
-    FFmpegStreamer,
     FFmpegHLSEncoder,
     YOLODetector,
     HLSManager,
-    WebcamStreamer,
+    CameraCapture,
+)
+from modules import StreamInfo, get_stream_hub, system_status
+from modules import BackendClient, ViolationQueue, StreamHub, Detections
+from modules import ViolationSubmitter
+from modules.ffmpeg_ops import get_inference_size
+from modules.inference_backends import ONNX, OPENVINO, export_model
+from modules.http_server import server_ready
+from modules.inference_scheduler import BoxPropagator, InferenceScheduler
+from modules.inference_workers import InferenceWorkerPool
+from modules.heartbeat import HeartbeatReporter
+from modules.ll_hls import PARTS_PLAYLIST
+from modules.metrics import (
+    FRAMES_INFERRED,
+    HLS_WRITE_SECONDS,
+    INFERENCE_SECONDS,
+    PLOT_SECONDS,
+    registry,
+)
+from modules.motion_gate import MotionGate
+from modules.shared_frames import (
+    SharedFrameWriter,
+    StatusPublisher,
+    remove_shared_memory,
+    shared_memory_name,
+)
+from modules.tracker import TrackerBank
+from modules.violation_outbox import ViolationOutbox
+from modules.pipeline import (
+    BLOCK,
+    DROP_OLDEST,
+    FramePacket,
+    HandoffBuffer,
+    Pipeline,
+    PipelineStage,
 )
-from modules import StreamInfo, SSEncoder, frame_queue, system_status
-from modules import BackendClient, ViolationQueue
 import config
 
+# What the inference stage does with a frame
+INFER = "infer"
+PROPAGATE = "propagate"
+HOLD = "hold"
+
 
 def cleanup_output_dir():
     """Clear all files in output/hls directory
@@ -30,7 +70,10 @@ def cleanup_output_dir():
         if os.path.exists(config.OUTPUT_DIR):
             files = glob.glob(f"{config.OUTPUT_DIR}/*")
             for file in files:
-                os.remove(file)
+                if os.path.isdir(file):
+                    shutil.rmtree(file)
+                else:
+                    os.remove(file)
             print(f"[Main] Cleaned {len(files)} files from {config.OUTPUT_DIR}")
     except Exception as e:
         print(f"[Main] Cleanup error: {e}")
@@ -53,109 +96,6 @@ def map_violation_class_name_to_code(class_name: str) -> str:
     return mapping.get(class_name, class_name.upper().replace("-", "_"))
 
 
-class ViolationSubmitter:
-    """Async violation submitter with throttling"""
-
-    def __init__(self, backend_client: BackendClient, violation_queue: ViolationQueue):
-        self.backend_client = backend_client
-        self.violation_queue = violation_queue
-        self.pending_violations: Dict[str, List[tuple]] = {}
-        self._lock = threading.Lock()
-        self.event_loop = None
-        self.thread = None
-        self.running = False
-
-    def start(self):
-        """Start the async submitter thread"""
-        self.running = True
-        self.thread = threading.Thread(target=self._run_loop, daemon=True)
-        self.thread.start()
-        print("[Main] Violation submitter started")
-
-    def stop(self):
-        """Stop the submitter thread"""
-        self.running = False
-        if self.thread and self.thread.is_alive():
-            self.thread.join(timeout=5)
-        print("[Main] Violation submitter stopped")
-
-    def _run_loop(self):
-        """Run the async event loop in separate thread"""
-        self.event_loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(self.event_loop)
-
-        try:
-            while self.running:
-                try:
-                    self.event_loop.run_until_complete(self._process_violations())
-                    time.sleep(0.1)
-                except Exception as e:
-                    print(f"[Main] Violation submitter error: {e}")
-        finally:
-            self.event_loop.close()
-
-    async def _process_violations(self):
-        """Process pending violations"""
-        with self._lock:
-            violations_to_submit = list(self.pending_violations.items())
-            self.pending_violations.clear()
-
-        for violation_type, frames in violations_to_submit:
-            if self.violation_queue.can_submit(violation_type):
-                for frame_data in frames[:1]:
-                    await self._submit_single_violation(violation_type, frame_data)
-
-    async def _submit_single_violation(self, violation_type: str, frame_data: tuple):
-        """Submit a single violation to backend"""
-        frame, detection_info = frame_data
-
-        temp_path = f"/tmp/violation_{int(time.time())}_{violation_type}.jpg"
-        cv2.imwrite(temp_path, frame)
-
-        try:
-            await self.backend_client.submit_violation(
-                image_path=temp_path,
-                violation_details=[
-                    {
-                        "violation_code": detection_info["violation_code"],
-                        "confidence_score": None,
-                        "additional_info": None,
-                    }
-                ],
-                notes=detection_info.get("notes"),
-            )
-            print(f"[Main] Violation submitted: {violation_type}")
-        except Exception as e:
-            print(f"[Main] Failed to submit violation: {e}")
-        finally:
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-
-    def add_violation(
-        self, frame: np.ndarray, violation_type: str, violation_code: str
-    ):
-        """Add a violation to the pending queue"""
-        with self._lock:
-            if violation_type not in self.pending_violations:
-                self.pending_violations[violation_type] = []
-
-            self.pending_violations[violation_type].append(
-                (
-                    frame,
-                    {
-                        "violation_code": violation_code,
-                        "notes": f"Detected {violation_type}",
-                    },
-                )
-            )
-
-            # Keep only latest violation per type
-            if len(self.pending_violations[violation_type]) > 1:
-                self.pending_violations[violation_type] = self.pending_violations[
-                    violation_type
-                ][-1:]
-
-
 def get_webcam_resolution(device_index: int) -> tuple[int, int]:
     """Get webcam resolution using OpenCV.
 
@@ -178,190 +118,884 @@ def get_webcam_resolution(device_index: int) -> tuple[int, int]:
     return 640, 480
 
 
-def get_stream_source() -> tuple[str | int, int, int]:
-    """Determine stream source URL based on configuration type.
+def get_source_properties(
+    source_type: str, source: str | int
+) -> tuple[int, int, float]:
+    """Probe resolution and FPS of a camera source (one cached ffprobe call).
+
+    Args:
+        source_type: "url", "file" or "webcam"
+        source: Stream URL, file path or webcam device index
 
     Returns:
-        (url_or_device_index, width, height) tuple for the selected source
-        url_or_device_index is a string for URL/file, int for webcam
+        (width, height, fps) tuple; webcams use a default 30 FPS
     """
-    if config.STREAM_SOURCE_TYPE == "webcam":
-        print(f"[Main] Using webcam device: {config.WEBCAM_DEVICE_INDEX}")
-        width, height = get_webcam_resolution(config.WEBCAM_DEVICE_INDEX)
-        print(f"[Main] Webcam resolution: {width}x{height}")
-        return config.WEBCAM_DEVICE_INDEX, width, height
+    if source_type == "webcam":
+        width, height = get_webcam_resolution(int(source))
+        return width, height, 30.0
 
-    elif config.STREAM_SOURCE_TYPE == "file":
-        print(f"[Main] Using video file: {config.STREAM_FILE_PATH}")
-        width, height = StreamInfo.get_dimensions(config.STREAM_FILE_PATH)
-        return config.STREAM_FILE_PATH, width, height
-
-    else:  # url
-        print(f"[Main] Using stream URL: {config.STREAM_URL}")
-        width, height = StreamInfo.get_dimensions(config.STREAM_URL)
-        return config.STREAM_URL, width, height
+    info = StreamInfo.probe(str(source))
+    return info["width"], info["height"], info["fps"]
 
 
-def main():
-    """Main orchestration function"""
-
-    cleanup_output_dir()
-
-    stream_source, width, height = get_stream_source()
-    print(f"[Main] Output Mode: {config.OUTPUT_MODE}")
+def create_detector() -> YOLODetector | InferenceWorkerPool:
+    """Load the YOLO detector shared by all cameras
 
-    # Get FPS - use default 30 for webcam, probe for URL/file
-    if config.STREAM_SOURCE_TYPE == "webcam":
-        fps = 30.0  # Default webcam FPS
+    With INFERENCE_WORKERS the model is loaded in worker processes instead.
+    """
+    if config.INFERENCE_WORKERS:
+        if config.YOLO_BACKEND in (ONNX, OPENVINO):
+            # Export here once; every worker then loads the cached artifact
+            # instead of exporting into the same paths at the same time
+            export_model(config.YOLO_MODEL_PATH, config.YOLO_BACKEND, config.YOLO_IMGSZ)
+        detector = InferenceWorkerPool(config.INFERENCE_WORKERS)
+        detector.start()
+        system_status.register_stats_provider("inference_workers", detector.get_stats)
     else:
-        fps = StreamInfo.get_fps(str(stream_source))
-
-    print(f"[Main] Resolution: {width}x{height}, FPS: {fps}")
-
-    detector = YOLODetector(
-        model_path=config.YOLO_MODEL_PATH,
-        device=config.YOLO_DEVICE,
-        classes=config.YOLO_CLASSES,
-    )
+        detector = YOLODetector(
+            model_path=config.YOLO_MODEL_PATH,
+            device=config.YOLO_DEVICE,
+            classes=config.YOLO_CLASSES,
+        )
     system_status.set_yolo_status(True)
     print("[Main] YOLO detector initialized")
+    return detector
 
-    if config.OUTPUT_MODE == "sse":
-        print("[Main] Using SSE streaming mode (low latency)")
 
-        sse_encoder = SSEncoder(
-            boundary=config.SSE_BOUNDARY, jpeg_quality=config.SSE_JPEG_QUALITY
-        )
+@dataclass
+class StartupTimes:
+    """Seconds from process start to each startup milestone"""
 
-        encoder = None
-        hls_manager = None
+    started: float = field(default_factory=time.monotonic)
+    phases: dict[str, float] = field(default_factory=dict)
+    first_frames: dict[str, float] = field(default_factory=dict)
 
-    else:
-        print("[Main] Using HLS streaming mode")
-
-        encoder = FFmpegHLSEncoder(
-            width,
-            height,
-            fps,
-            config.OUTPUT_FILE,
-            config.HLS_TIME,
-            config.HLS_LIST_SIZE,
-            config.HLS_DELETE_THRESHOLD,
-        )
+    def mark(self, milestone: str):
+        seconds = time.monotonic() - self.started
+        self.phases[milestone] = round(seconds, 3)
+        print(f"[Main] Startup: {milestone} after {seconds:.2f}s")
 
-        hls_manager = HLSManager(
-            output_dir=config.OUTPUT_DIR,
-            keep_count=config.HLS_LIST_SIZE + config.HLS_DELETE_THRESHOLD,
-        )
+    def first_frame(self, camera_code: str):
+        seconds = time.monotonic() - self.started
+        self.first_frames[camera_code] = round(seconds, 3)
+        print(f"[Main] {camera_code}: first annotated frame {seconds:.2f}s after start")
+
+    def get_stats(self) -> dict:
+        return {**self.phases, "first_frame_seconds": dict(self.first_frames)}
 
-        sse_encoder = None
 
+def start_server_thread() -> threading.Thread:
+    """Start the HTTP server in a background thread (sets server_ready)"""
     server_thread = threading.Thread(
         target=start_http_server,
         args=(config.PORT, config.OUTPUT_DIR, config.OUTPUT_MODE),
         daemon=True,
     )
     server_thread.start()
-    time.sleep(0.5)
+    return server_thread
 
-    violation_queue = ViolationQueue(delay_seconds=config.VIOLATION_DELAY)
-    backend_client = BackendClient()
-    violation_submitter = ViolationSubmitter(backend_client, violation_queue)
-    violation_submitter.start()
 
-    last_heartbeat_time = time.time()
-    heartbeat_interval = 30
+def start_server_process(ready) -> multiprocessing.Process:
+    """Start the HTTP server in its own process (HTTP_SERVER_PROCESS)
+
+    The process reads frames and status from the shared memory slots as they
+    appear. It is not a daemon because uvicorn starts worker processes of its
+    own when HTTP_SERVER_WORKERS > 1.
+
+    Args:
+        ready: multiprocessing Event set once the port accepts connections
+    """
+    server_process = multiprocessing.get_context("spawn").Process(
+        target=start_http_server,
+        args=(
+            config.PORT,
+            config.OUTPUT_DIR,
+            config.OUTPUT_MODE,
+            config.HTTP_SERVER_WORKERS,
+            ready,
+        ),
+        name="http-server",
+    )
+    server_process.start()
+    print(f"[Main] HTTP server process started (pid {server_process.pid})")
+    return server_process
+
+
+def stop_server_process(
+    server_process: multiprocessing.Process | None,
+    status_publisher: StatusPublisher | None,
+):
+    if server_process:
+        server_process.terminate()
+        server_process.join(timeout=10)
+    if status_publisher:
+        status_publisher.stop()
+
+
+def collect_status() -> dict:
+    """Snapshot for the HTTP server process: status and metrics"""
+    return {"status": system_status.get_status_dict(), "metrics": registry.render()}
+
+
+def publish_detections(
+    camera_code: str,
+    detections: Detections,
+    render: Callable[[], np.ndarray],
+    encoder: FFmpegHLSEncoder | None,
+    stream_hub: StreamHub | SharedFrameWriter,
+    violation_submitter: ViolationSubmitter,
+    captured_at: float = None,
+):
+    """Stream a frame and queue the violations found in it
+
+    The frame is only drawn when somebody consumes it: a /stream client that
+    is due for a frame, the HLS encoder, or a violation that is not throttled.
+
+    Args:
+        camera_code: Camera the frame came from
+        detections: Detections of the frame
+        render: Returns the annotated frame (drawn on first call, into a
+            buffer that is reused for the next frame)
+        encoder: HLS encoder of this camera (HLS mode) or None
+        stream_hub: SSE broadcast hub of this camera, or its shared frame
+            slot when the HTTP server runs in its own process
+        violation_submitter: Shared violation submitter
+        captured_at: Unix time the frame was captured
+    """
+    if config.OUTPUT_MODE == "sse":
+        if stream_hub.wants_frame():
+            stream_hub.publish_frame(render(), captured_at)
+    else:
+        if encoder:
+            frame = render()
+            started = time.perf_counter()
+            encoder.write_frame(frame)
+            HLS_WRITE_SECONDS.observe(time.perf_counter() - started, camera_code)
+
+    violations = detections.violations()
+    candidates = []
+    if violations.track_id is not None:
+        # One report per offender
+        tracked = violations[violations.track_id >= 0]
+        candidates += zip(
+            tracked.class_names,
+            tracked.confidence.tolist(),
+            tracked.track_id.tolist(),
+        )
+        # Boxes too uncertain to start a track (-1) are throttled per type,
+        # as without tracking
+        violations = violations[violations.track_id < 0]
+    untracked = violations.best_per_class()
+    candidates += (
+        (violation_type, confidence, None)
+        for violation_type, confidence in zip(
+            untracked.class_names, untracked.confidence.tolist()
+        )
+    )
+
+    reported = [
+        {
+            "violation_type": violation_type,
+            "violation_code": map_violation_class_name_to_code(violation_type),
+            "confidence": confidence,
+            "track_id": track_id,
+        }
+        for violation_type, confidence, track_id in candidates
+        if violation_submitter.wants_violation(violation_type, camera_code, track_id)
+    ]
+    if reported:
+        violation_submitter.add_violations(render().copy(), reported, camera_code)
+
+
+def get_camera_configs() -> list[dict]:
+    """Cameras to run: config.CAMERAS, or the single camera from CAMERA_CODE/STREAM_*
+
+    Returns:
+        List of {"code", "source_type", "source"} dicts
+    """
+    if config.CAMERAS:
+        return config.CAMERAS
+
+    if config.STREAM_SOURCE_TYPE == "webcam":
+        source = config.WEBCAM_DEVICE_INDEX
+    elif config.STREAM_SOURCE_TYPE == "file":
+        source = config.STREAM_FILE_PATH
+    else:  # url
+        source = config.STREAM_URL
+
+    return [
+        {
+            "code": config.CAMERA_CODE,
+            "source_type": config.STREAM_SOURCE_TYPE,
+            "source": source,
+        }
+    ]
+
+
+def get_handoff_policy(source_type: str) -> str:
+    """Hand-off policy between stages for a source type
+
+    Live sources drop the oldest frame so the pipeline never lags behind;
+    file replay blocks so that no frame is skipped.
+    """
+    if config.PIPELINE_HANDOFF_POLICY != "auto":
+        return config.PIPELINE_HANDOFF_POLICY
+    return BLOCK if source_type == "file" else DROP_OLDEST
+
+
+def forward_packet(buffer: HandoffBuffer, packet: FramePacket):
+    """Put a packet into the next stage's buffer, retrying until it is closed"""
+    packet.handed_off = True
+    while not buffer.put(packet, timeout=0.5):
+        if buffer.closed:
+            packet.release_frame()
+            return
+
+
+class CameraOutput:
+    """Output stage of one camera: stream encoding and violation bookkeeping"""
+
+    def __init__(
+        self,
+        camera_code: str,
+        detector: YOLODetector,
+        encoder: FFmpegHLSEncoder | None,
+        violation_submitter: ViolationSubmitter,
+        playlist_file: str = None,
+        frame_writer: SharedFrameWriter = None,
+        startup: StartupTimes = None,
+    ):
+        self.camera_code = camera_code
+        self.detector = detector
+        self.encoder = encoder
+        self.violation_submitter = violation_submitter
+        self.playlist_file = playlist_file
+        self.stream_hub = frame_writer or get_stream_hub(camera_code)
+        self.hls_manager = None
+        if encoder and playlist_file:
+            self.hls_manager = HLSManager(
+                output_dir=os.path.dirname(playlist_file),
+                keep_count=config.HLS_LIST_SIZE + config.HLS_DELETE_THRESHOLD,
+            )
+        self.startup = startup
+        self.frame_count = 0
+        self._annotated: np.ndarray = None
+
+    def process(self, packet: FramePacket):
+        """Publish one inferred frame"""
+        rendered = False
+
+        def render() -> np.ndarray:
+            nonlocal rendered
+            if not rendered:
+                started = time.perf_counter()
+                self._annotated = self.detector.annotate(
+                    packet.frame, packet.detections, self._annotated
+                )
+                PLOT_SECONDS.observe(time.perf_counter() - started, self.camera_code)
+                rendered = True
+            return self._annotated
 
-    # 3. Main streaming loop
-    while True:
-        streamer = None
-        hls_encoder = None
         try:
-            if config.STREAM_SOURCE_TYPE == "webcam":
-                streamer = WebcamStreamer(int(stream_source), width, height)
+            publish_detections(
+                self.camera_code,
+                packet.detections,
+                render,
+                self.encoder,
+                self.stream_hub,
+                self.violation_submitter,
+                packet.captured_at,
+            )
+        finally:
+            packet.release_frame()
+
+        self.frame_count += 1
+        if self.frame_count == 1 and self.startup:
+            self.startup.first_frame(self.camera_code)
+        if self.frame_count % 100 == 0 and self.hls_manager:
+            if not self.hls_manager.is_playlist_valid(self.playlist_file):
+                print(f"[Main] Warning: Playlist of {self.camera_code} is invalid")
+
+
+class InferenceRunner:
+    """Inference stage: run the shared detector on the frames that need it
+
+    Frames skipped by the InferenceScheduler get the previous detections of
+    their camera, moved along by a BoxPropagator. Frames the MotionGate finds
+    unchanged reuse the last detections as they are.
+    """
+
+    def __init__(
+        self,
+        detector: YOLODetector,
+        scheduler: InferenceScheduler,
+        result_buffers: dict[str, HandoffBuffer],
+        motion_gate: MotionGate = None,
+        trackers: TrackerBank = None,
+    ):
+        self.detector = detector
+        self.scheduler = scheduler
+        self.result_buffers = result_buffers
+        self.motion_gate = motion_gate
+        self.trackers = trackers
+        self.propagators: dict[str, BoxPropagator] = {}
+        self.inferred_frames: dict[str, int] = {}
+
+    def add_camera(self, camera_code: str, fps: float):
+        self.scheduler.add_camera(camera_code, fps)
+        self.inferred_frames[camera_code] = 0
+        self.propagators[camera_code] = BoxPropagator(
+            use_flow=config.BOX_PROPAGATION == "optical_flow"
+        )
+
+    def plan(self, packet: FramePacket) -> str:
+        """What a frame gets: INFER, PROPAGATE (scheduler) or HOLD (motion gate)"""
+        if not self.scheduler.should_infer(packet.camera_code):
+            return PROPAGATE
+        if self.motion_gate and not self.motion_gate.has_changed(
+            packet.camera_code, packet.model_frame
+        ):
+            return HOLD
+        return INFER
+
+    def reuse_detections(self, packet: FramePacket, action: str):
+        """Give a frame the model skipped the previous detections of its camera"""
+        propagator = self.propagators[packet.camera_code]
+        if action == PROPAGATE:
+            packet.detections = propagator.propagate(packet.frame)
+        else:
+            packet.detections = propagator.detections
+        if self.trackers:
+            # The offenders are still in view while the model is skipped
+            self.trackers.keep_alive(packet.camera_code, packet.detections)
+
+    def apply_detections(self, packet: FramePacket, detections: Detections):
+        """Track the model's detections of a frame and propagate from them"""
+        if self.trackers:
+            detections = self.trackers.update(packet.camera_code, detections)
+        packet.detections = detections
+        self.propagators[packet.camera_code].reset(packet.frame, detections)
+        self.inferred_frames[packet.camera_code] += 1
+        FRAMES_INFERRED.inc(packet.camera_code)
+
+    def process(self, items: list[tuple[int, FramePacket]]):
+        """Process one frame per ready camera"""
+        packets = [packet for _, packet in items]
+        to_infer = []
+        for packet in packets:
+            action = self.plan(packet)
+            if action == INFER:
+                to_infer.append(packet)
             else:
-                streamer = FFmpegStreamer(str(stream_source), width, height)
-            streamer.start()
+                self.reuse_detections(packet, action)
+
+        for start in range(0, len(to_infer), config.YOLO_MAX_BATCH_SIZE):
+            chunk = to_infer[start : start + config.YOLO_MAX_BATCH_SIZE]
+            started = time.perf_counter()
+            results = self.detector.detect_batch(
+                [packet.model_frame for packet in chunk],
+                [packet.frame for packet in chunk],
+            )
+            elapsed = time.perf_counter() - started
+            self.scheduler.record_latency(elapsed, len(chunk))
+            INFERENCE_SECONDS.observe(elapsed)
 
-            system_status.set_camera_status(True)
-            system_status.set_streamer_status(True)
-            print("[Main] Camera stream connected")
+            for packet, detections in zip(chunk, results):
+                self.apply_detections(packet, detections)
 
-            if config.OUTPUT_MODE == "hls" and encoder:
-                encoder.start()
+        for packet in packets:
+            forward_packet(self.result_buffers[packet.camera_code], packet)
 
-            frame_count = 0
-            while True:
-                frame = streamer.get_frame()
-                if frame is None:
-                    break
 
-                annotated_frame, detections = detector.detect_with_info(frame)
+@dataclass
+class PendingFrame:
+    """A frame waiting in its camera's queue for the frames before it"""
 
-                if config.OUTPUT_MODE == "sse":
-                    encoded_frame = sse_encoder.encode_frame(annotated_frame)
-                    if encoded_frame:
-                        frame_queue.put(encoded_frame, timeout=0.1)
-                else:
-                    if encoder:
-                        encoder.write_frame(annotated_frame)
-
-                violation_types_found = {}
-                for detection in detections:
-                    class_name = detection["class_name"]
-                    if class_name.startswith("no-"):
-                        violation_types_found[class_name] = detection
-
-                for violation_type, detection_info in violation_types_found.items():
-                    violation_code = map_violation_class_name_to_code(violation_type)
-                    violation_submitter.add_violation(
-                        annotated_frame, violation_type, violation_code
-                    )
-
-                current_time = time.time()
-                if current_time - last_heartbeat_time >= heartbeat_interval:
-                    print(
-                        f"[Main] Heartbeat: Active for {int(current_time - last_heartbeat_time)}s"
-                    )
-                    print(
-                        f"[Main] Status - YOLO: {system_status.yolo_status}, Camera: {system_status.camera_status}, Streamer: {system_status.streamer_status}"
-                    )
-                    last_heartbeat_time = current_time
-
-                frame_count += 1
-
-                if frame_count % 100 == 0:
-                    print(f"[Main] Processed {frame_count} frames")
-
-                    if config.OUTPUT_MODE == "hls" and hls_manager:
-                        if not hls_manager.is_playlist_valid(config.OUTPUT_FILE):
-                            print(f"[Main] Warning: Playlist is invalid")
-
-                if cv2.waitKey(1) & 0xFF == ord(config.QUIT_KEY):
-                    streamer.stop()
-                    if encoder:
-                        encoder.stop()
-                    violation_submitter.stop()
-                    cv2.destroyAllWindows()
-                    exit()
-
-        except KeyboardInterrupt:
-            print("\n[Main] Stopping...")
-            violation_submitter.stop()
-            break
-        except Exception as e:
-            system_status.set_camera_status(False)
-            system_status.set_streamer_status(False)
-            print(f"[Main] Error: {e}")
-            print("[Main] Restarting in 3 seconds...")
-            time.sleep(3)
-        finally:
-            if streamer:
-                streamer.stop()
-            if encoder:
-                encoder.stop()
-            violation_submitter.stop()
-            cv2.destroyAllWindows()
+    packet: FramePacket
+    action: str
+    detections: Detections = None
+    done: bool = False
+
+
+class WorkerInferenceRunner(InferenceRunner):
+    """Inference stage with INFERENCE_WORKERS: the model runs in worker processes
+
+    process() plans every frame like InferenceRunner and submits the frames
+    that need the model to the InferenceWorkerPool without waiting for them,
+    so several frames of one camera can be in different workers at once.
+    Each camera keeps its frames in arrival order: a frame is finished
+    (tracked, propagated from, forwarded) only after every earlier frame of
+    its camera, whichever worker answers first. Frames of a failed or crashed
+    worker get the propagated boxes instead.
+
+    Finished frames are forwarded outside the lock, so a full result buffer
+    under the BLOCK policy only holds up the thread forwarding that camera.
+    """
+
+    def __init__(self, detector: InferenceWorkerPool, *args, **kwargs):
+        super().__init__(detector, *args, **kwargs)
+        self.pending: dict[str, deque[PendingFrame]] = {}
+        # Finished frames not forwarded yet, and the cameras a thread forwards
+        self.finished: dict[str, deque[FramePacket]] = {}
+        self._forwarding: set[str] = set()
+        self._finish_lock = threading.Lock()
+
+    def add_camera(self, camera_code: str, fps: float):
+        super().add_camera(camera_code, fps)
+        self.pending[camera_code] = deque()
+        self.finished[camera_code] = deque()
+
+    def process(self, items: list[tuple[int, FramePacket]]):
+        """Queue one frame per ready camera and dispatch those the model needs"""
+        to_infer = []
+        for _, packet in items:
+            pending = PendingFrame(packet, self.plan(packet))
+            # finish_ready() forwards it, even if this call fails later
+            packet.handed_off = True
+            self.pending[packet.camera_code].append(pending)
+            if pending.action == INFER:
+                to_infer.append(pending)
+
+        batch_size = self.detector.max_batch_size
+        for start in range(0, len(to_infer), batch_size):
+            chunk = to_infer[start : start + batch_size]
+            submitted = self.detector.submit(
+                [pending.packet.model_frame for pending in chunk],
+                [pending.packet.frame for pending in chunk],
+                lambda detections, elapsed, chunk=chunk: self.on_results(
+                    chunk, detections, elapsed
+                ),
+            )
+            if not submitted:
+                self.on_results(chunk, None, 0.0)
+        self.finish_ready()
+
+    def on_results(
+        self, chunk: list[PendingFrame], results: list[Detections], elapsed: float
+    ):
+        """Store a batch's detections (None = worker failed) and finish frames"""
+        if results is None:
+            results = [None] * len(chunk)
+        else:
+            self.scheduler.record_latency(elapsed, len(chunk))
+            INFERENCE_SECONDS.observe(elapsed)
+        for pending, detections in zip(chunk, results):
+            if detections is None:
+                pending.action = PROPAGATE
+            pending.detections = detections
+            pending.done = True
+        self.finish_ready()
+
+    def finish_ready(self):
+        """Forward every camera's frames up to the first one still in a worker"""
+        to_forward = []
+        with self._finish_lock:
+            for camera_code, queue in self.pending.items():
+                finished = self.finished[camera_code]
+                while queue and (queue[0].action != INFER or queue[0].done):
+                    pending = queue.popleft()
+                    if pending.action == INFER:
+                        self.apply_detections(pending.packet, pending.detections)
+                    else:
+                        self.reuse_detections(pending.packet, pending.action)
+                    finished.append(pending.packet)
+                # A thread already forwarding this camera takes the new frames
+                if finished and camera_code not in self._forwarding:
+                    self._forwarding.add(camera_code)
+                    to_forward.append(camera_code)
+
+        for camera_code in to_forward:
+            self._forward_finished(camera_code)
+
+    def _forward_finished(self, camera_code: str):
+        """Forward a camera's finished frames in order until none are left"""
+        finished = self.finished[camera_code]
+        buffer = self.result_buffers[camera_code]
+        while True:
+            with self._finish_lock:
+                if not finished:
+                    self._forwarding.discard(camera_code)
+                    return
+                packet = finished.popleft()
+            try:
+                forward_packet(buffer, packet)
+            except BaseException:
+                with self._finish_lock:
+                    self._forwarding.discard(camera_code)
+                raise
+
+
+def build_pipeline(
+    cameras: list[dict],
+    detector: YOLODetector | InferenceWorkerPool,
+    violation_submitter: ViolationSubmitter,
+    source_properties: dict[str, tuple[int, int, float]],
+    startup: StartupTimes = None,
+) -> tuple[
+    Pipeline,
+    list[CameraCapture],
+    dict[str, FFmpegHLSEncoder],
+    InferenceRunner,
+    dict[str, SharedFrameWriter],
+]:
+    """Wire capture -> inference -> output stages for every camera
+
+    Each camera has its own capture thread and output thread. One inference
+    thread takes the newest frame of every camera that has one and runs them
+    through the shared detector as a batch, or hands them to the worker
+    processes of an InferenceWorkerPool. With HTTP_SERVER_PROCESS in SSE
+    mode, output stages publish into shared frame slots instead of the
+    in-process stream hubs.
+
+    Args:
+        cameras: Camera configs from get_camera_configs()
+        detector: Shared YOLO detector or inference worker pool
+        violation_submitter: Shared violation submitter
+        source_properties: camera_code -> (width, height, fps) from
+            get_source_properties()
+        startup: Startup milestones; output stages report their first frame
+
+    Returns:
+        (pipeline, captures, hls_encoders, inference, frame_writers) tuple
+    """
+    pipeline = Pipeline()
+    frames_ready = threading.Condition()
+    captures: list[CameraCapture] = []
+    frame_buffers: list[HandoffBuffer] = []
+    result_buffers: dict[str, HandoffBuffer] = {}
+    encoders: dict[str, FFmpegHLSEncoder] = {}
+    frame_writers: dict[str, SharedFrameWriter] = {}
+    motion_gate = None
+    if config.MOTION_GATE_ENABLED:
+        motion_gate = MotionGate(
+            pixel_threshold=config.MOTION_GATE_PIXEL_THRESHOLD,
+            change_threshold=config.MOTION_GATE_CHANGE_THRESHOLD,
+            max_skip_seconds=config.MOTION_GATE_MAX_SKIP_SECONDS,
+        )
+    trackers = None
+    if config.VIOLATION_TRACKING:
+        trackers = TrackerBank(
+            iou_threshold=config.TRACKER_IOU_THRESHOLD,
+            high_confidence=config.TRACKER_HIGH_CONFIDENCE,
+            max_age=config.TRACKER_MAX_AGE_SECONDS,
+        )
+    workers = isinstance(detector, InferenceWorkerPool)
+    runner_class = WorkerInferenceRunner if workers else InferenceRunner
+    inference = runner_class(
+        detector,
+        InferenceScheduler(
+            cadence=config.INFERENCE_CADENCE,
+            interval=config.INFERENCE_INTERVAL,
+            cpu_budget=config.INFERENCE_CPU_BUDGET,
+            target_fps=config.INFERENCE_TARGET_FPS,
+            max_interval=config.INFERENCE_MAX_INTERVAL,
+        ),
+        result_buffers,
+        motion_gate,
+        trackers,
+    )
+    system_status.register_stats_provider("inference", inference.scheduler.get_stats)
+    system_status.register_stats_provider("pipeline", pipeline.get_stats)
+    system_status.register_stats_provider("overlay", detector.renderer.get_stats)
+    if motion_gate:
+        system_status.register_stats_provider("motion_gate", motion_gate.get_stats)
+    if trackers:
+        system_status.register_stats_provider("tracks", trackers.get_stats)
+
+    model_frame_bytes = 0
+    for camera in cameras:
+        camera_code = camera["code"]
+        width, height, fps = source_properties[camera_code]
+        policy = get_handoff_policy(camera["source_type"])
+        print(f"[Main] {camera_code}: {width}x{height}, FPS: {fps}, hand-off: {policy}")
+
+        frame_buffer = pipeline.add_buffer(
+            HandoffBuffer(
+                f"{camera_code}.frames",
+                capacity=config.PIPELINE_BUFFER_SIZE,
+                policy=policy,
+                condition=frames_ready,
+                on_drop=lambda packet: packet.release_frame(),
+            )
+        )
+        result_buffer = pipeline.add_buffer(
+            HandoffBuffer(
+                f"{camera_code}.results",
+                capacity=config.PIPELINE_BUFFER_SIZE,
+                policy=policy,
+                on_drop=lambda packet: packet.release_frame(),
+            )
+        )
+        frame_buffers.append(frame_buffer)
+        result_buffers[camera_code] = result_buffer
+        inference.add_camera(camera_code, fps)
+        # Webcams have no separate inference stream
+        model_size = None
+        if camera["source_type"] != "webcam":
+            model_size = get_inference_size(
+                width, height, config.INFERENCE_STREAM_WIDTH
+            )
+        model_width, model_height = model_size or (width, height)
+        model_frame_bytes = max(model_frame_bytes, model_width * model_height * 3)
+
+        captures.append(
+            CameraCapture(
+                camera_code,
+                camera["source_type"],
+                camera["source"],
+                width,
+                height,
+                frame_buffer,
+                on_status=lambda code, connected: system_status.set_camera_status(
+                    connected, code
+                ),
+            )
+        )
+
+        playlist_file = None
+        if config.OUTPUT_MODE == "hls":
+            if config.CAMERAS:
+                camera_dir = f"{config.OUTPUT_DIR}/{camera_code}"
+                os.makedirs(camera_dir, exist_ok=True)
+                playlist_file = f"{camera_dir}/stream.m3u8"
+            else:
+                playlist_file = config.OUTPUT_FILE
+            if config.HLS_LOW_LATENCY:
+                # The server builds stream.m3u8 from ffmpeg's list of parts
+                playlist_file = os.path.join(
+                    os.path.dirname(playlist_file), PARTS_PLAYLIST
+                )
+            encoders[camera_code] = FFmpegHLSEncoder(
+                width,
+                height,
+                fps,
+                playlist_file,
+                config.HLS_TIME,
+                config.HLS_LIST_SIZE,
+                config.HLS_DELETE_THRESHOLD,
+                part_duration=config.HLS_PART_DURATION
+                if config.HLS_LOW_LATENCY
+                else None,
+                segment_parts=config.HLS_SEGMENT_PARTS,
+            )
+        elif config.HTTP_SERVER_PROCESS:
+            frame_writers[camera_code] = SharedFrameWriter(camera_code, width, height)
+
+        output = CameraOutput(
+            camera_code,
+            detector,
+            encoders.get(camera_code),
+            violation_submitter,
+            playlist_file,
+            frame_writers.get(camera_code),
+            startup,
+        )
+        pipeline.add_stage(
+            PipelineStage(f"output-{camera_code}", output.process, [result_buffer])
+        )
+
+    pipeline.add_stage(
+        PipelineStage("inference", inference.process, frame_buffers, batch=True)
+    )
+    if workers:
+        detector.open_ring(model_frame_bytes)
+    registry.gauge(
+        "yolo_queue_depth",
+        "Items waiting in a hand-off buffer",
+        lambda: {(buffer.name,): len(buffer) for buffer in pipeline.buffers},
+        ("buffer",),
+    )
+    system_status.register_stats_provider(
+        "frame_pools",
+        lambda: {
+            capture.camera_code: capture.frame_pool.get_stats() for capture in captures
+        },
+    )
+    system_status.register_stats_provider(
+        "streams",
+        lambda: {
+            capture.camera_code: capture.supervisor.get_stats() for capture in captures
+        },
+    )
+
+    return pipeline, captures, encoders, inference, frame_writers
+
+
+def sample_camera_stats(
+    captures: list[CameraCapture], pipeline: Pipeline, inference: InferenceRunner
+) -> dict[str, dict]:
+    """Raw per-camera counters for the HeartbeatReporter
+
+    Returns:
+        camera_code -> counters and gauges of its capture, buffers and stages
+    """
+    inference_stage = pipeline.get_stage("inference")
+    samples = {}
+    for capture in captures:
+        camera_code = capture.camera_code
+        frames = pipeline.get_buffer(f"{camera_code}.frames")
+        results = pipeline.get_buffer(f"{camera_code}.results")
+        output = pipeline.get_stage(f"output-{camera_code}")
+        samples[camera_code] = {
+            "connected": capture.connected,
+            "last_frame_at": capture.last_frame_at,
+            "decoded_frames": capture.frame_index,
+            "inferred_frames": inference.inferred_frames.get(camera_code, 0),
+            "dropped_frames": frames.dropped + results.dropped,
+            "queue_depths": {"frames": len(frames), "results": len(results)},
+            "latency_p95_ms": {
+                "inference": inference_stage.get_latency_ms(95),
+                "output": output.get_latency_ms(95),
+            },
+        }
+    return samples
+
+
+def main():
+    """Main orchestration function"""
+
+    startup = StartupTimes()
+    system_status.register_stats_provider("startup", startup.get_stats)
+    cleanup_output_dir()
+
+    cameras = get_camera_configs()
+    print(f"[Main] Cameras: {', '.join(camera['code'] for camera in cameras)}")
+    print(f"[Main] Output Mode: {config.OUTPUT_MODE}")
+
+    # The HTTP server starts first, so /health answers while the model loads
+    server_process = status_publisher = None
+    ready = server_ready
+    if config.HTTP_SERVER_PROCESS:
+        registry.counter_func(
+            "yolo_pipeline_cpu_seconds_total",
+            "CPU time used by the pipeline process",
+            time.process_time,
+        )
+        for camera in cameras:
+            remove_shared_memory(shared_memory_name("frame", camera["code"]))
+        status_publisher = StatusPublisher(collect_status)
+        status_publisher.start()
+        ready = multiprocessing.get_context("spawn").Event()
+        server_process = start_server_process(ready)
+    else:
+        start_server_thread()
+
+    def report_server_ready():
+        if ready.wait(timeout=30):
+            startup.mark("server_ready")
+        else:
+            print("[Main] Warning: HTTP server not accepting connections after 30s")
+
+    threading.Thread(target=report_server_ready, daemon=True).start()
+
+    # Model loading and warmup overlap with probing the cameras
+    try:
+        with ThreadPoolExecutor(max_workers=len(cameras) + 1) as executor:
+            detector_future = executor.submit(create_detector)
+            source_properties = dict(
+                zip(
+                    [camera["code"] for camera in cameras],
+                    executor.map(
+                        lambda camera: get_source_properties(
+                            camera["source_type"], camera["source"]
+                        ),
+                        cameras,
+                    ),
+                )
+            )
+            startup.mark("streams_probed")
+            detector = detector_future.result()
+            startup.mark("model_ready")
+    except BaseException:
+        stop_server_process(server_process, status_publisher)
+        raise
+
+    violation_queue = ViolationQueue(
+        delay_seconds=config.VIOLATION_REREPORT_SECONDS
+        if config.VIOLATION_TRACKING
+        else config.VIOLATION_DELAY
+    )
+    backend_client = BackendClient()
+    outbox = ViolationOutbox(
+        config.OUTBOX_PATH,
+        config.OUTBOX_EVIDENCE_DIR,
+        max_items=config.OUTBOX_MAX_ITEMS,
+        max_age_seconds=config.OUTBOX_MAX_AGE_SECONDS,
+    )
+    system_status.register_stats_provider("outbox", outbox.get_stats)
+    registry.gauge(
+        "yolo_outbox_depth",
+        "Violation reports waiting for delivery",
+        lambda: outbox.get_stats()["depth"],
+    )
+    violation_submitter = ViolationSubmitter(backend_client, violation_queue, outbox)
+    system_status.register_stats_provider("submitter", violation_submitter.get_stats)
+
+    pipeline, captures, encoders, inference, frame_writers = build_pipeline(
+        cameras, detector, violation_submitter, source_properties, startup
+    )
+    violation_submitter.start()
+
+    for encoder in encoders.values():
+        encoder.start()
+    pipeline.start()
+    for capture in captures:
+        capture.start()
+    system_status.set_streamer_status(True)
+    startup.mark("pipeline_started")
+
+    heartbeat = None
+    if config.HEARTBEAT_ENABLED:
+        heartbeat = HeartbeatReporter(
+            BackendClient(timeout=10),
+            lambda: sample_camera_stats(captures, pipeline, inference),
+        )
+        system_status.register_stats_provider("heartbeat", heartbeat.get_stats)
+        heartbeat.start()
+
+    last_heartbeat_time = time.time()
+    heartbeat_interval = 30
+    inference_stage = pipeline.get_stage("inference")
+    reported_frames = 0
+
+    try:
+        while True:
+            time.sleep(1)
+
+            if inference_stage.processed // 100 > reported_frames // 100:
+                print(f"[Main] Processed {inference_stage.processed} frames")
+            reported_frames = inference_stage.processed
+
+            current_time = time.time()
+            if current_time - last_heartbeat_time >= heartbeat_interval:
+                print(
+                    f"[Main] Heartbeat: Active for {int(current_time - last_heartbeat_time)}s"
+                )
+                print(
+                    f"[Main] Status - YOLO: {system_status.yolo_status}, Camera: {system_status.camera_status}, Streamer: {system_status.streamer_status}"
+                )
+                for name, stats in system_status.get_stats().items():
+                    print(f"[Main] {name}: {stats}")
+                last_heartbeat_time = current_time
+
+    except KeyboardInterrupt:
+        print("\n[Main] Stopping...")
+    finally:
+        if heartbeat:
+            heartbeat.stop()
+        for capture in captures:
+            capture.stop()
+        pipeline.stop()
+        if isinstance(detector, InferenceWorkerPool):
+            detector.stop()
+        for encoder in encoders.values():
+            encoder.stop()
+        system_status.set_streamer_status(False)
+        violation_submitter.stop()
+        outbox.close()
+        stop_server_process(server_process, status_publisher)
+        for frame_writer in frame_writers.values():
+            frame_writer.close()
 
 
 if __name__ == "__main__":
@@ -1,16 +1,26 @@
 """HLS Streamer Modules"""
 
-from .http_server import start_http_server, frame_queue, system_status
+from .http_server import (
+    start_http_server,
+    stream_hub,
+    get_stream_hub,
+    system_status,
+)
 from .ffmpeg_ops import FFmpegStreamer, FFmpegHLSEncoder, StreamInfo, WebcamStreamer
 from .yolo_detector import YOLODetector
 from .hls_manager import HLSManager
 from .sse_encoder import SSEncoder
 from .backend_client import BackendClient
 from .violation_queue import ViolationQueue
+from .camera_capture import CameraCapture
+from .stream_hub import StreamHub
+from .detections import Detections
+from .violation_submitter import ViolationSubmitter
 
 __all__ = [
     "start_http_server",
-    "frame_queue",
+    "stream_hub",
+    "get_stream_hub",
     "FFmpegStreamer",
     "FFmpegHLSEncoder",
     "StreamInfo",
@@ -20,4 +30,8 @@ __all__ = [
     "SSEncoder",
     "BackendClient",
     "ViolationQueue",
+    "CameraCapture",
+    "StreamHub",
+    "Detections",
+    "ViolationSubmitter",
 ]
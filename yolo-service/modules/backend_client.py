@@ -1,8 +1,9 @@
 """Backend API Client for violation reporting"""
 
+import asyncio
 import httpx
 import json
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, List
 import logging
 import config
 
@@ -31,13 +32,43 @@ class BackendClient:
         self.api_key = api_key or config.BACKEND_API_KEY
         self.camera_code = camera_code or config.CAMERA_CODE
         self.timeout = timeout
+        self.client: Optional[httpx.AsyncClient] = None
 
+    async def open(
+        self,
+        max_connections: int = 4,
+        max_keepalive_connections: int = 4,
+        keepalive_expiry: float = None,
+    ):
+        """Create the pooled HTTP client inside the running event loop
+
+        The connection pool is bound to the loop that creates it, so this is
+        called from the loop that sends the requests. Methods open a client
+        with the default limits on first use if this was not called.
+
+        Args:
+            max_connections: Maximum simultaneous connections to the backend
+            max_keepalive_connections: Idle connections kept open for reuse
+            keepalive_expiry: Seconds an idle connection is kept (default: from config)
+        """
+        if self.client is not None:
+            return
         self.client = httpx.AsyncClient(
             base_url=self.api_url,
             headers=self._get_headers(),
             timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry or config.BACKEND_KEEPALIVE_SECONDS,
+            ),
         )
 
+    async def _get_client(self) -> httpx.AsyncClient:
+        if self.client is None:
+            await self.open()
+        return self.client
+
     def _get_headers(self) -> Dict[str, str]:
         """Build request headers with API key
 
@@ -58,6 +89,8 @@ class BackendClient:
         image_path: str,
         violation_details: list[dict],
         notes: Optional[str] = None,
+        camera_code: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
     ) -> Dict[str, Any]:
         """Submit violation report to backend
 
@@ -66,6 +99,9 @@ class BackendClient:
             violation_details: List of violation detail objects with structure:
                 [{"violation_code": "NO_APRON", "confidence_score": 0.95, ...}]
             notes: Optional notes/observations
+            camera_code: Camera that detected the violation (default: client's)
+            idempotency_key: Sent as Idempotency-Key header so the backend can
+                recognise a retried report
 
         Returns:
             Response dictionary with status and data
@@ -80,7 +116,7 @@ class BackendClient:
             files = {"image": (image_path.split("/")[-1], image_file, "image/jpeg")}
 
             data = {
-                "camera_code": self.camera_code,
+                "camera_code": camera_code or self.camera_code,
             }
 
             if notes is not None:
@@ -91,10 +127,16 @@ class BackendClient:
                     if value is not None:
                         data[f"violation_details[{idx}][{key}]"] = value
 
-            response = await self.client.post(
+            headers = {}
+            if idempotency_key:
+                headers["Idempotency-Key"] = idempotency_key
+
+            client = await self._get_client()
+            response = await client.post(
                 "/api/violations",
                 files=files,
                 data=data,
+                headers=headers,
             )
 
             response.raise_for_status()
@@ -120,6 +162,70 @@ class BackendClient:
             if image_file:
                 image_file.close()
 
+    async def send_heartbeat(
+        self,
+        status: str = "active",
+        stats: Optional[Dict[str, Any]] = None,
+        camera_code: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Report camera status and pipeline stats to the backend
+
+        Args:
+            status: "active", "inactive" or "maintenance"
+            stats: Optional pipeline stats stored with the camera
+            camera_code: Camera the heartbeat is for (default: client's)
+
+        Returns:
+            Response dictionary with status and data
+
+        Raises:
+            httpx.HTTPError: On HTTP request failure
+        """
+        payload = {"camera_code": camera_code or self.camera_code, "status": status}
+        if stats is not None:
+            payload["stats"] = stats
+
+        client = await self._get_client()
+        response = await client.post("/api/camera-heartbeat", json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    async def run_heartbeat(
+        self,
+        collect: Callable[[], List[Dict[str, Any]]],
+        interval: float,
+    ):
+        """Send heartbeats every interval until the task is cancelled
+
+        Runs on its own event loop, independent of the frame loop, so a
+        stalled pipeline is reported instead of silencing the heartbeat.
+        Failed heartbeats are logged and retried at the next interval.
+
+        Args:
+            collect: Returns one {"camera_code", "status", "stats"} dict per camera
+            interval: Seconds between heartbeats
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            try:
+                heartbeats = collect()
+            except Exception as e:
+                logger.error(f"Error collecting heartbeat stats: {e}")
+                heartbeats = []
+
+            results = await asyncio.gather(
+                *(self.send_heartbeat(**heartbeat) for heartbeat in heartbeats),
+                return_exceptions=True,
+            )
+            for heartbeat, result in zip(heartbeats, results):
+                if isinstance(result, Exception):
+                    logger.warning(
+                        f"Heartbeat for {heartbeat['camera_code']} failed: {result}"
+                    )
+
+            await asyncio.sleep(max(0.0, interval - (loop.time() - started)))
+
     async def get_camera(self, camera_id: int) -> Dict[str, Any]:
         """Fetch camera details from backend
 
@@ -132,7 +238,8 @@ class BackendClient:
         Raises:
             httpx.HTTPError: On HTTP request failure
         """
-        response = await self.client.get(f"/api/cameras/{camera_id}")
+        client = await self._get_client()
+        response = await client.get(f"/api/cameras/{camera_id}")
         response.raise_for_status()
         return response.json()
 
@@ -145,7 +252,8 @@ class BackendClient:
         Raises:
             httpx.HTTPError: On HTTP request failure
         """
-        response = await self.client.get("/api/violation-types")
+        client = await self._get_client()
+        response = await client.get("/api/violation-types")
         response.raise_for_status()
         return response.json()
 
@@ -156,7 +264,8 @@ class BackendClient:
             True if backend is healthy, False otherwise
         """
         try:
-            response = await self.client.get("/health")
+            client = await self._get_client()
+            response = await client.get("/health")
             return response.status_code == 200
         except Exception as e:
             logger.warning(f"Backend health check failed: {e}")
@@ -164,7 +273,10 @@ class BackendClient:
 
     async def close(self):
         """Close the HTTP client"""
+        if self.client is None:
+            return
         await self.client.aclose()
+        self.client = None
         logger.info("Backend client closed")
 
     async def __aenter__(self):
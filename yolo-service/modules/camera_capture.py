@@ -0,0 +1,132 @@
+"""Per-Camera Capture Stage"""
+
+import threading
+import time
+
+import config
+from .ffmpeg_ops import FFmpegStreamer, WebcamStreamer, get_inference_size
+from .frame_pool import FramePool
+from .metrics import FRAMES_DECODED
+from .pipeline import FramePacket, HandoffBuffer
+from .stream_supervisor import StreamSupervisor
+
+
+class CameraCapture:
+    """Capture stage: read one camera in its own thread into a hand-off buffer"""
+
+    def __init__(
+        self,
+        camera_code: str,
+        source_type: str,
+        source: str | int,
+        width: int,
+        height: int,
+        output: HandoffBuffer,
+        on_status=None,
+    ):
+        """Initialize camera capture
+
+        Args:
+            camera_code: Camera identifier used for streams and violations
+            source_type: "url", "file" or "webcam"
+            source: Stream URL, file path or webcam device index
+            width: Video width in pixels
+            height: Video height in pixels
+            output: Buffer receiving a FramePacket for every decoded frame
+            on_status: Optional callback(camera_code, connected) on status change
+        """
+        self.camera_code = camera_code
+        self.source_type = source_type
+        self.source = source
+        self.width = width
+        self.height = height
+        self.output = output
+        self.on_status = on_status
+
+        # Shared across reconnects so buffers still in flight come back to it
+        self.frame_pool = FramePool((height, width, 3), size=config.FRAME_POOL_SIZE)
+        self.inference_pool = None
+        inference_size = get_inference_size(
+            width, height, config.INFERENCE_STREAM_WIDTH
+        )
+        if source_type != "webcam" and inference_size:
+            inference_width, inference_height = inference_size
+            self.inference_pool = FramePool(
+                (inference_height, inference_width, 3), size=config.FRAME_POOL_SIZE
+            )
+        self.frame_index = 0
+        self.last_frame_at: float = None
+        self.connected = False
+        self.running = False
+        self.thread = None
+        # A webcam device cannot be opened twice, so it gets no standby
+        self.supervisor = StreamSupervisor(
+            camera_code,
+            self._create_streamer,
+            hot_standby=config.STREAM_HOT_STANDBY and source_type != "webcam",
+            on_status=self._set_status,
+        )
+
+    def start(self):
+        """Start the capture thread"""
+        self.running = True
+        self.supervisor.start()
+        self.thread = threading.Thread(
+            target=self._run, name=f"capture-{self.camera_code}", daemon=True
+        )
+        self.thread.start()
+
+    def stop(self):
+        """Stop the capture thread and its streamer"""
+        self.running = False
+        self.supervisor.stop()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=5)
+
+    def _create_streamer(self):
+        if self.source_type == "webcam":
+            return WebcamStreamer(
+                int(self.source), self.width, self.height, self.frame_pool
+            )
+        return FFmpegStreamer(
+            str(self.source),
+            self.width,
+            self.height,
+            self.frame_pool,
+            inference_width=config.INFERENCE_STREAM_WIDTH,
+            inference_pool=self.inference_pool,
+        )
+
+    def _release_frame(self, frame):
+        """Return a display or inference frame to the pool it came from"""
+        self.frame_pool.release(frame)
+        if self.inference_pool:
+            self.inference_pool.release(frame)
+
+    def _set_status(self, connected: bool):
+        self.connected = connected
+        if self.on_status:
+            self.on_status(self.camera_code, connected)
+
+    def _run(self):
+        """Read frames until stopped; the supervisor reconnects lost streams"""
+        while self.running:
+            frame, inference_frame = self.supervisor.get_frames()
+            if frame is None:
+                return
+            FRAMES_DECODED.inc(self.camera_code)
+
+            self.last_frame_at = time.time()
+            packet = FramePacket(
+                camera_code=self.camera_code,
+                index=self.frame_index,
+                frame=frame,
+                captured_at=self.last_frame_at,
+                release=self._release_frame,
+                inference_frame=inference_frame,
+            )
+            self.frame_index += 1
+            while self.running and not self.output.put(packet, timeout=0.5):
+                if self.output.closed:
+                    packet.release_frame()
+                    return
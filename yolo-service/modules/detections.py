@@ -0,0 +1,133 @@
+"""Detection Results Module"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+VIOLATION_PREFIX = "no-"
+
+
+@dataclass
+class Detections:
+    """Detections of one frame stored as parallel NumPy arrays
+
+    Built once per frame from the (N, 6) backend output without touching the
+    individual boxes. Filtering and coordinate math stay vectorised; to_dicts()
+    gives the per-box dict view for callers that need it.
+    """
+
+    xyxy: np.ndarray  # (N, 4) float32 boxes in frame pixels
+    confidence: np.ndarray  # (N,) float32
+    class_id: np.ndarray  # (N,) int32
+    names: dict  # class id -> class name of the model
+    track_id: np.ndarray = None  # (N,) int64 once tracked, -1 = no track
+
+    @classmethod
+    def from_array(cls, boxes: np.ndarray, names: dict) -> "Detections":
+        """Wrap an (N, 6) [x1, y1, x2, y2, confidence, class_id] array"""
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 6)
+        return cls(
+            xyxy=np.ascontiguousarray(boxes[:, :4]),
+            confidence=np.ascontiguousarray(boxes[:, 4]),
+            class_id=boxes[:, 5].astype(np.int32),
+            names=names,
+        )
+
+    @classmethod
+    def empty(cls, names: dict) -> "Detections":
+        return cls.from_array(np.zeros((0, 6), dtype=np.float32), names)
+
+    def __len__(self) -> int:
+        return len(self.class_id)
+
+    def __getitem__(self, index) -> "Detections":
+        """Select detections with a boolean mask, index array or slice"""
+        if isinstance(index, (int, np.integer)):
+            index = [index]
+        return Detections(
+            xyxy=self.xyxy[index],
+            confidence=self.confidence[index],
+            class_id=self.class_id[index],
+            names=self.names,
+            track_id=None if self.track_id is None else self.track_id[index],
+        )
+
+    @property
+    def class_names(self) -> list[str]:
+        return [self.names[class_id] for class_id in self.class_id.tolist()]
+
+    def with_boxes(self, xyxy: np.ndarray) -> "Detections":
+        """Same detections with moved boxes"""
+        return Detections(
+            xyxy=np.asarray(xyxy, dtype=np.float32).reshape(-1, 4),
+            confidence=self.confidence,
+            class_id=self.class_id,
+            names=self.names,
+            track_id=self.track_id,
+        )
+
+    def with_track_ids(self, track_id: np.ndarray) -> "Detections":
+        """Same detections labelled with tracker ids"""
+        return Detections(
+            xyxy=self.xyxy,
+            confidence=self.confidence,
+            class_id=self.class_id,
+            names=self.names,
+            track_id=np.asarray(track_id, dtype=np.int64).reshape(-1),
+        )
+
+    def to_array(self) -> np.ndarray:
+        """(N, 6) [x1, y1, x2, y2, confidence, class_id] float32 array"""
+        return np.column_stack(
+            [self.xyxy, self.confidence, self.class_id.astype(np.float32)]
+        ).reshape(-1, 6)
+
+    def class_ids_with_prefix(self, prefix: str) -> np.ndarray:
+        """Class ids of the model whose name starts with prefix"""
+        return np.array(
+            [
+                class_id
+                for class_id, name in self.names.items()
+                if name.startswith(prefix)
+            ],
+            dtype=np.int32,
+        )
+
+    def violation_mask(self, prefix: str = VIOLATION_PREFIX) -> np.ndarray:
+        """Boolean mask of detections whose class is a violation ("no-...")"""
+        return np.isin(self.class_id, self.class_ids_with_prefix(prefix))
+
+    def violations(self, prefix: str = VIOLATION_PREFIX) -> "Detections":
+        """Only the detections of violation classes"""
+        return self[self.violation_mask(prefix)]
+
+    def best_per_class(self) -> "Detections":
+        """Highest-confidence detection of every class present"""
+        if not len(self):
+            return self
+        order = np.lexsort((-self.confidence, self.class_id))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = self.class_id[order][1:] != self.class_id[order][:-1]
+        return self[order[first]]
+
+    def to_dicts(self) -> list[dict]:
+        """Per-box dicts with keys: class_id, class_name, confidence, bbox
+
+        Tracked detections also carry a track_id key.
+        """
+        dicts = [
+            {
+                "class_id": class_id,
+                "class_name": self.names[class_id],
+                "confidence": confidence,
+                "bbox": bbox,
+            }
+            for class_id, confidence, bbox in zip(
+                self.class_id.tolist(), self.confidence.tolist(), self.xyxy.tolist()
+            )
+        ]
+        if self.track_id is not None:
+            for detection, track_id in zip(dicts, self.track_id.tolist()):
+                detection["track_id"] = track_id
+        return dicts
@@ -1,27 +1,66 @@
 """FFmpeg Operations Module"""
 
+import json
+import math
+import os
 import subprocess
+import time
 import cv2
 import numpy as np
 import threading
 import config
+from .frame_pool import FramePool
+
+# Pipe capacity requested for the raw frame pipe (Linux F_SETPIPE_SZ)
+PIPE_SIZE = 1024 * 1024
+
+# Stream properties assumed when ffprobe fails
+PROBE_DEFAULTS = {"width": 1280, "height": 720, "fps": 25.0}
 
 
 class FFmpegStreamer:
-    """Read stream from URL and output raw frames"""
+    """Read stream from URL and output raw frames
 
-    def __init__(self, url: str, width: int, height: int):
+    With inference_width set, the same ffmpeg process also scales every
+    decoded frame down for the model and writes it to a second pipe, so the
+    small copy costs neither pipe bandwidth at full size nor a resize in
+    Python. Both pipes carry one frame per decoded frame and are read in
+    lockstep, which pairs them by index.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        width: int,
+        height: int,
+        frame_pool: FramePool = None,
+        inference_width: int = None,
+        inference_pool: FramePool = None,
+    ):
         """Initialize FFmpeg streamer
 
         Args:
             url: Stream URL to read from
             width: Video width in pixels
             height: Video height in pixels
+            frame_pool: Pool the frames are read into (created if None)
+            inference_width: Width of the extra inference stream (None = off,
+                also off if not smaller than width)
+            inference_pool: Pool the inference frames are read into
         """
         self.url = url
         self.width = width
         self.height = height
         self.frame_size = width * height * 3
+        self.frame_pool = frame_pool or FramePool((height, width, 3))
+        self.inference_size = get_inference_size(width, height, inference_width)
+        self.inference_pool = None
+        if self.inference_size:
+            inference_width, inference_height = self.inference_size
+            self.inference_pool = inference_pool or FramePool(
+                (inference_height, inference_width, 3)
+            )
+        self.inference_pipe = None
         self.process = None
 
     def start(self) -> subprocess.Popen:
@@ -30,14 +69,7 @@ class FFmpegStreamer:
         Returns:
             Popen object with stdout.PIPE
         """
-        command = [
-            "ffmpeg",
-            "-protocol_whitelist",
-            config.FFMPEG_PROTOCOL_WHITELIST,
-            "-i",
-            self.url,
-            "-loglevel",
-            config.FFMPEG_LOGLEVEL,
+        raw_output = [
             "-an",
             "-f",
             "rawvideo",
@@ -49,31 +81,109 @@ class FFmpegStreamer:
             "nobuffer",
             "-flags",
             "low_delay",
-            "pipe:1",
         ]
-        self.process = subprocess.Popen(
-            command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=10**9
-        )
+        command = [
+            "ffmpeg",
+            "-protocol_whitelist",
+            config.FFMPEG_PROTOCOL_WHITELIST,
+            "-i",
+            self.url,
+            "-loglevel",
+            config.FFMPEG_LOGLEVEL,
+        ]
+
+        pass_fds = ()
+        write_fd = None
+        if self.inference_size:
+            read_fd, write_fd = os.pipe()
+            pass_fds = (write_fd,)
+            inference_width, inference_height = self.inference_size
+            command += [
+                "-filter_complex",
+                "[0:v]split=2[display][inference];"
+                f"[inference]scale={inference_width}:{inference_height}"
+                ":flags=area[small]",
+                "-map",
+                "[display]",
+                *raw_output,
+                "pipe:1",
+                "-map",
+                "[small]",
+                *raw_output,
+                f"pipe:{write_fd}",
+            ]
+        else:
+            command += [*raw_output, "pipe:1"]
+
+        # Unbuffered: stdout is the raw pipe, read straight into frame buffers
+        try:
+            self.process = subprocess.Popen(
+                command,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                bufsize=0,
+                pass_fds=pass_fds,
+            )
+        finally:
+            if write_fd is not None:
+                os.close(write_fd)
+        set_pipe_size(self.process.stdout.fileno())
+
+        if write_fd is not None:
+            self.inference_pipe = os.fdopen(read_fd, "rb", buffering=0)
+            set_pipe_size(read_fd)
         return self.process
 
     def get_frame(self) -> np.ndarray:
-        """Read one frame from stream
+        """Read one frame from stream into a pooled buffer
+
+        The caller should hand the frame back with release_frame() once it is
+        no longer used.
 
         Returns:
             numpy array (height, width, 3) or None if stream ended
         """
-        if not self.process or not self.process.stdout:
-            return None
-
-        raw_frame = self.process.stdout.read(self.frame_size)
+        frame, inference_frame = self.get_frames()
+        self.release_frame(inference_frame)
+        return frame
 
-        if len(raw_frame) == 0 or len(raw_frame) != self.frame_size:
-            return None
+    def get_frames(self) -> tuple[np.ndarray, np.ndarray]:
+        """Read the next display frame and its downscaled inference copy
 
-        frame = np.frombuffer(raw_frame, dtype=np.uint8).reshape(
-            (self.height, self.width, 3)
-        )
-        return frame
+        Returns:
+            (frame, inference_frame) with inference_frame None when the
+            inference stream is off, or (None, None) if the stream ended
+        """
+        if not self.process or not self.process.stdout:
+            return None, None
+
+        frame = self.frame_pool.acquire()
+        if not read_exactly(self.process.stdout, memoryview(frame.reshape(-1))):
+            self.frame_pool.release(frame)
+            return None, None
+
+        if not self.inference_pipe:
+            return frame, None
+
+        inference_frame = self.inference_pool.acquire()
+        if not read_exactly(
+            self.inference_pipe, memoryview(inference_frame.reshape(-1))
+        ):
+            self.frame_pool.release(frame)
+            self.inference_pool.release(inference_frame)
+            return None, None
+        return frame, inference_frame
+
+    def release_frame(self, frame: np.ndarray):
+        """Return a frame from get_frame() or get_frames() to its pool"""
+        self.frame_pool.release(frame)
+        if self.inference_pool:
+            self.inference_pool.release(frame)
+
+    def interrupt(self):
+        """Unblock a pending read from another thread (it returns None)"""
+        if self.process:
+            self.process.kill()
 
     def stop(self):
         """Gracefully stop stream process"""
@@ -83,6 +193,9 @@ class FFmpegStreamer:
                 self.process.wait(timeout=5)
             except:
                 self.process.kill()
+        if self.inference_pipe:
+            self.inference_pipe.close()
+            self.inference_pipe = None
 
 
 class FFmpegHLSEncoder:
@@ -97,6 +210,8 @@ class FFmpegHLSEncoder:
         hls_time: int,
         list_size: int,
         delete_threshold: int,
+        part_duration: float = None,
+        segment_parts: int = 1,
     ):
         """Initialize FFmpeg HLS encoder
 
@@ -108,6 +223,10 @@ class FFmpegHLSEncoder:
             hls_time: Segment duration in seconds
             list_size: Number of segments in playlist
             delete_threshold: Segments to keep before deletion
+            part_duration: Low-latency mode: write fMP4 parts of about this
+                many seconds, each starting with a keyframe, instead of
+                MPEG-TS segments (see modules/ll_hls.py)
+            segment_parts: Low-latency mode: parts per segment
         """
         self.width = width
         self.height = height
@@ -116,8 +235,61 @@ class FFmpegHLSEncoder:
         self.hls_time = hls_time
         self.list_size = list_size
         self.delete_threshold = delete_threshold
+        self.part_duration = part_duration
+        self.segment_parts = segment_parts
         self.process = None
 
+    def _hls_options(self) -> list:
+        """Keyframe interval and HLS muxer options for the output mode"""
+        directory = os.path.dirname(self.output_file) or "."
+        if not self.part_duration:
+            return [
+                "-g",
+                str(int(self.fps * 2)),
+                "-sc_threshold",
+                "0",
+                "-hls_time",
+                str(self.hls_time),
+                "-hls_list_size",
+                str(self.list_size),
+                "-hls_flags",
+                "delete_segments",
+                "-hls_delete_threshold",
+                str(self.delete_threshold),
+                "-hls_segment_filename",
+                f"{directory}/stream%d.ts",
+            ]
+
+        # A keyframe starts every part: the muxer cuts at the first keyframe
+        # after hls_time, so hls_time sits half a frame before each keyframe
+        gop = max(1, math.ceil(self.fps * self.part_duration))
+        return [
+            "-g",
+            str(gop),
+            "-keyint_min",
+            str(gop),
+            "-sc_threshold",
+            "0",
+            "-hls_time",
+            f"{(gop - 0.5) / self.fps:.4f}",
+            # The window holds list_size complete segments plus the open one
+            "-hls_list_size",
+            str((self.list_size + 1) * self.segment_parts),
+            "-hls_flags",
+            "delete_segments+independent_segments+temp_file",
+            "-hls_delete_threshold",
+            str(self.delete_threshold * self.segment_parts),
+            "-hls_segment_type",
+            "fmp4",
+            "-hls_fmp4_init_filename",
+            "init.mp4",
+            # Part numbers keep growing across restarts, so cached parts stay valid
+            "-hls_start_number_source",
+            "epoch_us",
+            "-hls_segment_filename",
+            f"{directory}/part%d.m4s",
+        ]
+
     def start(self) -> subprocess.Popen:
         """Start FFmpeg HLS encoder process
 
@@ -148,20 +320,7 @@ class FFmpegHLSEncoder:
             "3.0",
             "-pix_fmt",
             "yuv420p",
-            "-g",
-            str(int(self.fps * 2)),
-            "-sc_threshold",
-            "0",
-            "-hls_time",
-            str(self.hls_time),
-            "-hls_list_size",
-            str(self.list_size),
-            "-hls_flags",
-            "delete_segments",
-            "-hls_delete_threshold",
-            str(self.delete_threshold),
-            "-hls_segment_filename",
-            f"{config.OUTPUT_DIR}/stream%d.ts",
+            *self._hls_options(),
             "-f",
             "hls",
             self.output_file,
@@ -208,11 +367,20 @@ class FFmpegHLSEncoder:
 
 
 class StreamInfo:
-    """Utility for probing stream information"""
+    """Utility for probing stream information
+
+    One ffprobe call returns width, height and FPS. Results are cached on disk
+    per source (FFMPEG_PROBE_CACHE_PATH) for FFMPEG_PROBE_CACHE_TTL_SECONDS,
+    so a restart does not wait for the remote playlist again; a local file is
+    probed again when its modification time changes. Failed probes are not
+    cached.
+    """
+
+    _cache_lock = threading.Lock()
 
     @staticmethod
     def get_dimensions(url: str, timeout: int = None) -> tuple[int, int]:
-        """Get stream width and height using ffprobe
+        """Get stream width and height
 
         Args:
             url: Stream URL to probe
@@ -221,40 +389,12 @@ class StreamInfo:
         Returns:
             (width, height) or default (1280, 720)
         """
-        timeout = timeout or config.FFMPEG_TIMEOUT
-        try:
-            cmd = [
-                "ffprobe",
-                "-protocol_whitelist",
-                config.FFMPEG_PROTOCOL_WHITELIST,
-                "-v",
-                "error",
-                "-select_streams",
-                "v:0",
-                "-show_entries",
-                "stream=width,height",
-                "-of",
-                "csv=s=x:p=0",
-                url,
-            ]
-            result = subprocess.run(
-                cmd, capture_output=True, text=True, timeout=timeout
-            )
-            if result.returncode == 0 and result.stdout.strip():
-                dimensions_line = result.stdout.strip().split("\n")[0]
-                parts = dimensions_line.split(",")
-                if len(parts) == 1:
-                    width, height = map(int, parts[0].split("x"))
-                else:
-                    width, height = map(int, parts[0].split("x"))
-                return width, height
-        except:
-            pass
-        return 1280, 720
+        info = StreamInfo.probe(url, timeout)
+        return info["width"], info["height"]
 
     @staticmethod
     def get_fps(url: str, timeout: int = None) -> float:
-        """Get stream FPS using ffprobe
+        """Get stream FPS
 
         Args:
             url: Stream URL to probe
@@ -263,48 +403,126 @@ class StreamInfo:
         Returns:
             FPS or default 25.0
         """
-        timeout = timeout or config.FFMPEG_TIMEOUT
+        return StreamInfo.probe(url, timeout)["fps"]
+
+    @staticmethod
+    def probe(url: str, timeout: int = None) -> dict:
+        """Get all stream properties, from the cache if it is fresh
+
+        Args:
+            url: Stream URL or file path to probe
+            timeout: Timeout in seconds (uses config default if None)
+
+        Returns:
+            {"width", "height", "fps"}; defaults for what could not be probed
+        """
+        key = StreamInfo._cache_key(url)
+        cached = StreamInfo._read_cache().get(url)
+        if (
+            cached
+            and cached.get("key") == key
+            and time.time() - cached["probed_at"]
+            < config.FFMPEG_PROBE_CACHE_TTL_SECONDS
+        ):
+            return cached["info"]
+
+        info = StreamInfo._run_ffprobe(url, timeout or config.FFMPEG_TIMEOUT)
+        if info is None:
+            return dict(PROBE_DEFAULTS)
+        if config.FFMPEG_PROBE_CACHE_TTL_SECONDS:
+            StreamInfo._write_cache(
+                url, {"key": key, "probed_at": time.time(), "info": info}
+            )
+        return info
+
+    @staticmethod
+    def _run_ffprobe(url: str, timeout: float) -> dict | None:
+        """Width, height and FPS of the first video stream, or None"""
+        cmd = [
+            "ffprobe",
+            "-protocol_whitelist",
+            config.FFMPEG_PROTOCOL_WHITELIST,
+            "-v",
+            "error",
+            "-select_streams",
+            "v:0",
+            "-show_entries",
+            "stream=width,height,r_frame_rate,avg_frame_rate",
+            "-of",
+            "json",
+            url,
+        ]
         try:
-            cmd = [
-                "ffprobe",
-                "-protocol_whitelist",
-                config.FFMPEG_PROTOCOL_WHITELIST,
-                "-v",
-                "error",
-                "-select_streams",
-                "v:0",
-                "-show_entries",
-                "stream=r_frame_rate",
-                "-of",
-                "csv=s=x:p=0",
-                url,
-            ]
             result = subprocess.run(
                 cmd, capture_output=True, text=True, timeout=timeout
             )
-            if result.returncode == 0 and result.stdout.strip():
-                fps_str = result.stdout.strip().split("\n")[0].split(",")[0]
-                fps_num, fps_den = map(int, fps_str.split("/"))
-                return fps_num / fps_den
-        except:
-            pass
-        return 25.0
+            if result.returncode != 0:
+                return None
+            stream = json.loads(result.stdout)["streams"][0]
+        except (OSError, subprocess.TimeoutExpired, ValueError, KeyError, IndexError):
+            return None
+
+        info = dict(PROBE_DEFAULTS)
+        if stream.get("width") and stream.get("height"):
+            info["width"], info["height"] = int(stream["width"]), int(stream["height"])
+        for field in ("r_frame_rate", "avg_frame_rate"):
+            num, _, den = stream.get(field, "").partition("/")
+            if num.isdigit() and den.isdigit() and int(num) and int(den):
+                info["fps"] = int(num) / int(den)
+                break
+        return info
+
+    @staticmethod
+    def _cache_key(url: str) -> float | None:
+        """Modification time of a local file; None for network sources"""
+        try:
+            return os.path.getmtime(url)
+        except OSError:
+            return None
+
+    @staticmethod
+    def _read_cache() -> dict:
+        if not config.FFMPEG_PROBE_CACHE_TTL_SECONDS:
+            return {}
+        try:
+            with open(config.FFMPEG_PROBE_CACHE_PATH) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _write_cache(url: str, entry: dict):
+        path = config.FFMPEG_PROBE_CACHE_PATH
+        with StreamInfo._cache_lock:
+            cache = StreamInfo._read_cache()
+            cache[url] = entry
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                with open(f"{path}.tmp", "w") as file:
+                    json.dump(cache, file, indent=2)
+                os.replace(f"{path}.tmp", path)
+            except OSError as e:
+                print(f"[StreamInfo] Could not write probe cache: {e}")
 
 
 class WebcamStreamer:
     """Direct webcam capture using OpenCV"""
 
-    def __init__(self, device_index: int, width: int, height: int):
+    def __init__(
+        self, device_index: int, width: int, height: int, frame_pool: FramePool = None
+    ):
         """Initialize webcam streamer
 
         Args:
             device_index: Webcam device index (0, 1, 2...)
             width: Desired width in pixels
             height: Desired height in pixels
+            frame_pool: Pool the frames are read into (created if None)
         """
         self.device_index = device_index
         self.width = width
         self.height = height
+        self.frame_pool = frame_pool or FramePool((height, width, 3))
         self.cap = None
 
     def start(self):
@@ -326,14 +544,84 @@ class WebcamStreamer:
         if not self.cap or not self.cap.isOpened():
             return None
 
-        ret, frame = self.cap.read()
+        buffer = self.frame_pool.acquire()
+        ret, frame = self.cap.read(buffer)
         if not ret:
+            self.frame_pool.release(buffer)
             return None
 
+        if frame is not buffer:
+            # The camera delivered another size; OpenCV allocated a new array
+            self.frame_pool.release(buffer)
         return frame
 
+    def get_frames(self) -> tuple[np.ndarray, np.ndarray]:
+        """Read one frame; webcams have no separate inference stream
+
+        Returns:
+            (frame, None), or (None, None) if reading failed
+        """
+        return self.get_frame(), None
+
+    def release_frame(self, frame: np.ndarray):
+        """Return a frame from get_frame() to the pool"""
+        self.frame_pool.release(frame)
+
+    def interrupt(self):
+        """No-op: OpenCV's capture backends time out blocked reads themselves"""
+
     def stop(self):
         """Stop webcam capture"""
         if self.cap:
             self.cap.release()
             self.cap = None
+
+
+def read_exactly(pipe, view: memoryview) -> bool:
+    """Fill a buffer from an unbuffered pipe, handling short reads
+
+    Args:
+        pipe: Raw (unbuffered) binary file object
+        view: Writable byte view of the destination buffer
+
+    Returns:
+        True if the buffer was filled, False on end of stream
+    """
+    filled = 0
+    size = len(view)
+    while filled < size:
+        count = pipe.readinto(view[filled:])
+        if not count:
+            return False
+        filled += count
+    return True
+
+
+def set_pipe_size(fd: int, size: int = PIPE_SIZE):
+    """Enlarge a pipe's kernel buffer to cut read syscalls (Linux only)"""
+    try:
+        import fcntl
+
+        fcntl.fcntl(fd, getattr(fcntl, "F_SETPIPE_SZ", 1031), size)
+    except (ImportError, OSError):
+        pass
+
+
+def get_inference_size(
+    width: int, height: int, inference_width: int = None
+) -> tuple[int, int]:
+    """Size of the downscaled inference stream, keeping the aspect ratio
+
+    Args:
+        width: Display width in pixels
+        height: Display height in pixels
+        inference_width: Requested inference width (None = no inference stream)
+
+    Returns:
+        (width, height) rounded to even numbers, or None if no stream is needed
+    """
+    if not inference_width or inference_width >= width:
+        return None
+    inference_width -= inference_width % 2
+    inference_height = max(2, round(height * inference_width / width / 2) * 2)
+    return inference_width, inference_height
@@ -0,0 +1,66 @@
+"""Frame Buffer Pool Module"""
+
+import threading
+import weakref
+from collections import deque
+
+import numpy as np
+
+
+class FramePool:
+    """Pool of preallocated frame buffers recycled between capture and release
+
+    Readers fill a pooled buffer instead of allocating a new array per frame.
+    Downstream stages hand the buffer back with release() once nothing reads
+    it anymore. When every buffer is in flight the pool grows up to max_size
+    and after that falls back to temporary arrays.
+    """
+
+    def __init__(self, shape: tuple, size: int = 4, max_size: int = 16):
+        """Initialize frame pool
+
+        Args:
+            shape: Frame shape, e.g. (height, width, 3)
+            size: Buffers allocated up front
+            max_size: Maximum number of buffers owned by the pool
+        """
+        self.shape = tuple(shape)
+        self.max_size = max(size, max_size)
+        self._lock = threading.Lock()
+        self._free = deque(np.empty(self.shape, dtype=np.uint8) for _ in range(size))
+        # Weak references compared by identity: an owned buffer that is
+        # dropped instead of released frees its place, and an unrelated array
+        # that later gets the same id() is not mistaken for it
+        self._owned = [weakref.ref(buffer) for buffer in self._free]
+        self.misses = 0
+
+    def acquire(self) -> np.ndarray:
+        """Take a free buffer (contents undefined)"""
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+
+            self.misses += 1
+            buffer = np.empty(self.shape, dtype=np.uint8)
+            self._owned = [ref for ref in self._owned if ref() is not None]
+            if len(self._owned) < self.max_size:
+                self._owned.append(weakref.ref(buffer))
+            return buffer
+
+    def release(self, buffer: np.ndarray):
+        """Return a buffer obtained from acquire(); other arrays are ignored"""
+        if buffer is None or buffer.shape != self.shape:
+            return
+        with self._lock:
+            if any(ref() is buffer for ref in self._owned) and not any(
+                free is buffer for free in self._free
+            ):
+                self._free.append(buffer)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "buffers": sum(ref() is not None for ref in self._owned),
+                "free": len(self._free),
+                "misses": self.misses,
+            }
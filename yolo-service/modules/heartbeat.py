@@ -0,0 +1,166 @@
+"""Camera Heartbeat Module"""
+
+import asyncio
+import threading
+import time
+from typing import Callable
+
+import config
+from .backend_client import BackendClient
+
+
+class HeartbeatReporter:
+    """Periodic camera heartbeats carrying live pipeline stats
+
+    Runs BackendClient.run_heartbeat() on an event loop in its own thread, so
+    heartbeats keep going when the frame loop stalls. Every interval the
+    sampler returns raw counters per camera, which are turned into rates over
+    the interval. A camera that is disconnected or has not delivered a frame
+    for stall_seconds is reported inactive.
+    """
+
+    def __init__(
+        self,
+        backend_client: BackendClient,
+        sample: Callable[[], dict[str, dict]],
+        interval: float = None,
+        stall_seconds: float = None,
+    ):
+        """Initialize heartbeat reporter
+
+        Args:
+            backend_client: Client used only by this reporter (its HTTP client
+                is bound to the reporter's event loop)
+            sample: Returns camera_code -> {connected, last_frame_at,
+                decoded_frames, inferred_frames, dropped_frames, queue_depths,
+                latency_p95_ms}; the frame counters are totals since start
+            interval: Seconds between heartbeats (default: from config)
+            stall_seconds: Seconds without frames before a camera is reported
+                inactive (default: from config)
+        """
+        self.backend_client = backend_client
+        self.sample = sample
+        self.interval = interval or config.HEARTBEAT_INTERVAL_SECONDS
+        self.stall_seconds = stall_seconds or config.HEARTBEAT_STALL_SECONDS
+
+        self.event_loop: asyncio.AbstractEventLoop = None
+        self.thread = None
+        self._task: asyncio.Task = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._previous: dict[str, dict] = {}
+        self._previous_at = time.time()
+        self.heartbeats: list[dict] = []
+
+    def start(self):
+        """Start the heartbeat thread"""
+        self._previous_at = time.time()
+        self.thread = threading.Thread(
+            target=self._run_loop, name="camera-heartbeat", daemon=True
+        )
+        self.thread.start()
+        self._ready.wait(timeout=5)
+        print(f"[Heartbeat] Reporting every {self.interval}s")
+
+    def stop(self):
+        """Stop the heartbeats and report every camera inactive"""
+        if self.event_loop and not self.event_loop.is_closed():
+            try:
+                self.event_loop.call_soon_threadsafe(self._task.cancel)
+            except RuntimeError:
+                pass
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=self.backend_client.timeout + 5)
+        print("[Heartbeat] Stopped")
+
+    def _run_loop(self):
+        asyncio.run(self._main())
+
+    async def _main(self):
+        self.event_loop = asyncio.get_running_loop()
+        self._task = asyncio.create_task(
+            self.backend_client.run_heartbeat(self.build_heartbeats, self.interval)
+        )
+        self._ready.set()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        finally:
+            await asyncio.gather(
+                *(
+                    self.backend_client.send_heartbeat("inactive", None, camera_code)
+                    for camera_code in self._previous
+                ),
+                return_exceptions=True,
+            )
+            await self.backend_client.close()
+
+    def get_status(self, sample: dict, now: float) -> str:
+        """Camera status: inactive when disconnected or stalled, else active"""
+        last_frame_at = sample.get("last_frame_at")
+        if not sample.get("connected") or last_frame_at is None:
+            return "inactive"
+        if now - last_frame_at > self.stall_seconds:
+            return "inactive"
+        return "active"
+
+    def build_heartbeats(self, now: float = None) -> list[dict]:
+        """Sample the pipeline and build one heartbeat per camera
+
+        Returns:
+            List of {"camera_code", "status", "stats"} dicts
+        """
+        now = time.time() if now is None else now
+        samples = self.sample()
+        elapsed = max(now - self._previous_at, 1e-6)
+
+        def rate(frames: int, measured: bool) -> float | None:
+            # The first heartbeat of a camera has no interval to measure over
+            return round(frames / elapsed, 2) if measured else None
+
+        heartbeats = []
+        for camera_code, sample in samples.items():
+            previous = self._previous.get(camera_code, {})
+            delta = {
+                key: max(sample[key] - previous.get(key, 0), 0)
+                for key in ("decoded_frames", "inferred_frames", "dropped_frames")
+            }
+            last_frame_at = sample.get("last_frame_at")
+            status = self.get_status(sample, now)
+            heartbeats.append(
+                {
+                    "camera_code": camera_code,
+                    "status": status,
+                    "stats": {
+                        "decode_fps": rate(delta["decoded_frames"], bool(previous)),
+                        "inference_fps": rate(delta["inferred_frames"], bool(previous)),
+                        "dropped_frames": delta["dropped_frames"],
+                        "queue_depths": sample["queue_depths"],
+                        "latency_p95_ms": sample["latency_p95_ms"],
+                        "seconds_since_frame": None
+                        if last_frame_at is None
+                        else round(now - last_frame_at, 1),
+                        "interval_seconds": round(elapsed, 1),
+                    },
+                }
+            )
+
+            if previous and status != previous["status"]:
+                print(f"[Heartbeat] {camera_code} is now {status}")
+            self._previous[camera_code] = {**sample, "status": status}
+
+        self._previous_at = now
+        with self._lock:
+            self.heartbeats = heartbeats
+        return heartbeats
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                heartbeat["camera_code"]: {
+                    "status": heartbeat["status"],
+                    **heartbeat["stats"],
+                }
+                for heartbeat in self.heartbeats
+            }
@@ -29,7 +29,7 @@ class HLSManager:
         try:
             with open(filepath, 'r') as f:
                 content = f.read()
-                return '#EXTM3U' in content and '.ts' in content
+                return '#EXTM3U' in content and ('.ts' in content or '.m4s' in content)
         except:
             return False
     
@@ -1,16 +1,28 @@
 """HTTP Server Module with FastAPI - Multi-Client SSE Support"""
 
 import asyncio
+import itertools
+import json
+import os
+import re
+import socket
 import threading
 import time
 from contextlib import asynccontextmanager
+from typing import Callable
 
 import config
-from fastapi import FastAPI, Response
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.logger import logger
 
+from . import metrics
+from .ll_hls import LLHLSStream
+from .shared_frames import SeqlockSlot, shared_memory_name
+from .sse_encoder import SSEncoder
+from .stream_hub import StreamHub
+
 
 class SystemStatus:
     """Thread-safe system status tracker for health endpoint"""
@@ -22,24 +34,73 @@ class SystemStatus:
         self.streamer_status = False
         self.start_time = time.time()
         self.active_clients = 0
+        self.cameras: dict[str, bool] = {}
+        self._stats_providers: dict[str, Callable[[], dict]] = {}
+        # Stats of the pipeline process when the server runs in its own
+        self.remote_stats: dict[str, dict] = {}
 
     def set_yolo_status(self, status: bool):
         with self._lock:
             self.yolo_status = status
 
-    def set_camera_status(self, status: bool):
+    def set_camera_status(self, status: bool, camera_code: str = None):
         with self._lock:
-            self.camera_status = status
+            if camera_code is None:
+                self.camera_status = status
+            else:
+                self.cameras[camera_code] = status
+                self.camera_status = any(self.cameras.values())
 
     def set_streamer_status(self, status: bool):
         with self._lock:
             self.streamer_status = status
 
+    def register_stats_provider(self, name: str, provider: Callable[[], dict]):
+        """Add a live stats section to the health output
+
+        Args:
+            name: Key of the section in the status dict
+            provider: Callable returning the section's current stats
+        """
+        with self._lock:
+            self._stats_providers[name] = provider
+
     def update_client_count(self, delta: int):
         with self._lock:
             self.active_clients += delta
 
+    def apply_snapshot(self, snapshot: dict):
+        """Mirror the status published by the pipeline process
+
+        Used by the HTTP server process (HTTP_SERVER_PROCESS); client counts
+        stay local to the server process.
+        """
+        with self._lock:
+            self.yolo_status = snapshot["yolo_status"]
+            self.camera_status = snapshot["camera_status"]
+            self.streamer_status = snapshot["streamer_status"]
+            self.cameras = dict(snapshot["cameras"])
+            self.start_time = time.time() - snapshot["uptime_seconds"]
+            self.remote_stats = snapshot["stats"]
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            providers = dict(self._stats_providers)
+            remote_stats = dict(self.remote_stats)
+        return {
+            **remote_stats,
+            **{name: provider() for name, provider in providers.items()},
+        }
+
+    def get_provider_stats(self, name: str) -> dict | None:
+        """Stats of a single provider, or None if it is not registered"""
+        with self._lock:
+            provider = self._stats_providers.get(name)
+            remote = self.remote_stats.get(name)
+        return provider() if provider else remote
+
     def get_status_dict(self) -> dict:
+        stats = self.get_stats()
         with self._lock:
             return {
                 "status": "ok",
@@ -49,57 +110,182 @@ class SystemStatus:
                 "yolo_status": self.yolo_status,
                 "streamer_status": self.streamer_status,
                 "source_type": config.STREAM_SOURCE_TYPE,
+                "cameras": dict(self.cameras),
                 "uptime_seconds": time.time() - self.start_time,
+                "stats": stats,
             }
 
 
 system_status = SystemStatus()
 
-current_frame: asyncio.Queue[bytes] = None
+metrics.registry.gauge(
+    "yolo_sse_clients",
+    "Connected /stream clients",
+    lambda: system_status.active_clients,
+)
+metrics.registry.gauge(
+    "yolo_camera_up",
+    "1 while the camera stream is connected",
+    lambda: {
+        (camera_code,): int(connected)
+        for camera_code, connected in dict(system_status.cameras).items()
+    },
+    ("camera",),
+)
+metrics.registry.gauge(
+    "yolo_uptime_seconds",
+    "Seconds since the service started",
+    lambda: round(time.time() - system_status.start_time, 3),
+)
+metrics.registry.counter_func(
+    "process_cpu_seconds_total",
+    "User and system CPU time of the service process, all threads",
+    time.process_time,
+)
+_client_ids = itertools.count(1)
+
+# Set once the server accepts connections (HTTP server thread)
+server_ready = threading.Event()
+
+# Metrics a separate server process reports itself; the rest come from the
+# pipeline process's snapshot
+SERVER_METRICS = {
+    "yolo_sse_clients",
+    "yolo_sse_bytes_sent_total",
+    "yolo_sse_client_bytes_sent_total",
+    "yolo_event_loop_lag_seconds",
+    "process_cpu_seconds_total",
+}
+pipeline_metrics: str = None
+
 loop: asyncio.AbstractEventLoop = None
 
 
-class FrameQueue:
-    """Adapter for backward compatibility with existing encoder"""
+stream_hubs: dict[str, StreamHub] = {}
 
-    def __init__(self, maxsize: int = 10):
-        self.ready = False
 
-    def set_ready(self):
-        self.ready = True
-        logger.info("Frame queue ready")
+def get_stream_hub(camera_code: str) -> StreamHub:
+    """Get (or create) the broadcast hub of a camera
 
-    def put(self, frame: bytes, timeout: float = 0.1) -> bool:
-        if not self.ready or not loop or not current_frame:
-            return False
-        try:
-            try:
-                current_frame.put_nowait(frame)
-                return True
-            except asyncio.QueueFull:
-                logger.debug("Queue full, skipping frame")
-                return False
-        except Exception as e:
-            logger.error(f"Queue error: {e}")
-            return False
+    Args:
+        camera_code: Camera identifier
 
-    def get(self) -> bytes:
+    Returns:
+        StreamHub served at /stream/{camera_code} (and /stream for the first
+        camera)
+    """
+    if camera_code not in stream_hubs:
+        hub = StreamHub(
+            camera_code,
+            SSEncoder(
+                boundary=config.SSE_BOUNDARY, jpeg_quality=config.SSE_JPEG_QUALITY
+            ),
+            idle_seconds=config.SSE_VARIANT_IDLE_SECONDS,
+        )
+        if loop:
+            hub.attach(loop)
+        stream_hubs[camera_code] = hub
+    return stream_hubs[camera_code]
+
+
+def get_camera_codes() -> list[str]:
+    """Codes of the configured cameras"""
+    return [camera["code"] for camera in config.CAMERAS] or [config.CAMERA_CODE]
+
+
+# /stream shows the first camera: CAMERA_CODE is not one of CAMERAS unless
+# it is listed there, and its hub would never get a frame
+stream_hub = get_stream_hub(get_camera_codes()[0])
+
+
+def attach_slot(name: str) -> SeqlockSlot | None:
+    """Open a slot of the pipeline process, or None while it does not exist"""
+    try:
+        return SeqlockSlot.attach(name)
+    except FileNotFoundError:
         return None
 
 
-frame_queue = FrameQueue(maxsize=config.SSE_MAX_QUEUE_SIZE)
+async def mirror_pipeline(poll: float = None, attach_interval: float = 0.5):
+    """Feed the stream hubs and the status from the pipeline's shared memory
+
+    Runs in the HTTP server process (HTTP_SERVER_PROCESS). The server starts
+    before the pipeline has probed its cameras, so frame slots are attached
+    once they appear. While a hub has subscribers it signals demand and
+    publishes every new frame; the status and metrics snapshot is applied
+    whenever the pipeline wrote a new one.
+    """
+    global pipeline_metrics
+
+    poll = poll or config.HTTP_SHARED_POLL_SECONDS
+    camera_codes = get_camera_codes() if config.OUTPUT_MODE == "sse" else []
+    status_slot = None
+    frame_slots: dict[str, SeqlockSlot] = {}
+    sequences: dict[str, int] = {}
+    status_sequence = 0
+    next_attach = 0.0
+    try:
+        while True:
+            if time.monotonic() >= next_attach:
+                next_attach = time.monotonic() + attach_interval
+                status_slot = status_slot or attach_slot(shared_memory_name("status"))
+                for camera_code in camera_codes:
+                    if camera_code not in frame_slots:
+                        slot = attach_slot(shared_memory_name("frame", camera_code))
+                        if slot:
+                            frame_slots[camera_code] = slot
+                            sequences[camera_code] = 0
+                            logger.info(f"Reading {camera_code} frames from pipeline")
+
+            for camera_code, slot in frame_slots.items():
+                hub = get_stream_hub(camera_code)
+                if not hub.has_subscribers():
+                    continue
+                slot.signal_demand(hub.min_frame_interval())
+                frame = slot.read(sequences[camera_code])
+                if frame:
+                    sequences[camera_code], jpeg, captured_at = frame
+                    if hub.wants_frame():
+                        await asyncio.to_thread(hub.publish_jpeg, jpeg, captured_at)
+
+            status = status_slot.read(status_sequence) if status_slot else None
+            if status:
+                status_sequence, data, _ = status
+                snapshot = json.loads(data)
+                system_status.apply_snapshot(snapshot["status"])
+                pipeline_metrics = snapshot["metrics"]
+
+            await asyncio.sleep(poll)
+    finally:
+        for slot in (status_slot, *frame_slots.values()):
+            if slot:
+                slot.close()
+
+
+async def monitor_event_loop_lag(interval: float = None):
+    """Record how late the event loop wakes up from a timed sleep
+
+    A loop blocked by slow callbacks (or starved of CPU) overshoots the
+    sleep; the overshoot is the delay every /stream client sees on top.
+    """
+    interval = interval or config.EVENT_LOOP_LAG_INTERVAL_SECONDS
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag = time.perf_counter() - started - interval
+        metrics.EVENT_LOOP_LAG_SECONDS.observe(max(lag, 0.0))
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for startup/shutdown"""
-    global current_frame, loop
+    global loop
 
     logger.info(f"FastAPI starting in {config.OUTPUT_MODE} mode")
 
-    loop = asyncio.get_event_loop()
-    current_frame = asyncio.Queue(maxsize=1)
-    frame_queue.set_ready()
+    loop = asyncio.get_running_loop()
+    for hub in list(stream_hubs.values()):
+        hub.attach(loop)
 
     if config.OUTPUT_MODE == "hls":
         from fastapi.staticfiles import StaticFiles
@@ -107,8 +293,18 @@ async def lifespan(app: FastAPI):
         app.mount("/", StaticFiles(directory=config.OUTPUT_DIR), name="static")
         logger.info(f"Static files mounted: {config.OUTPUT_DIR}")
 
+    lag_monitor = asyncio.create_task(monitor_event_loop_lag())
+    mirror = None
+    if config.HTTP_SERVER_PROCESS:
+        for camera_code in get_camera_codes():
+            get_stream_hub(camera_code)
+        mirror = asyncio.create_task(mirror_pipeline())
+
     yield
 
+    lag_monitor.cancel()
+    if mirror:
+        mirror.cancel()
     logger.info("FastAPI shutting down")
 
 
@@ -123,27 +319,65 @@ app.add_middleware(
 
 
 @app.get("/stream")
-async def stream_endpoint():
-    """SSE streaming endpoint"""
+async def stream_endpoint(
+    width: int | None = Query(None, ge=16, le=7680),
+    quality: int | None = Query(None, ge=1, le=100),
+    fps: float | None = Query(None, gt=0, le=60),
+):
+    """SSE streaming endpoint for the default (first configured) camera
+
+    Args:
+        width: Output width in pixels, aspect ratio kept (default: source)
+        quality: JPEG quality 1-100 (default: config.SSE_JPEG_QUALITY)
+        fps: Maximum frames per second for this client (default: source fps)
+    """
+    return _stream_response(stream_hub, width, quality, fps)
+
+
+@app.get("/stream/{camera_code}")
+async def camera_stream_endpoint(
+    camera_code: str,
+    width: int | None = Query(None, ge=16, le=7680),
+    quality: int | None = Query(None, ge=1, le=100),
+    fps: float | None = Query(None, gt=0, le=60),
+):
+    """SSE streaming endpoint for one camera in multi-camera mode"""
+    if camera_code not in stream_hubs:
+        return JSONResponse(
+            status_code=404, content={"error": f"Unknown camera: {camera_code}"}
+        )
+    return _stream_response(stream_hubs[camera_code], width, quality, fps)
+
+
+def _stream_response(
+    hub: StreamHub, width: int = None, quality: int = None, fps: float = None
+):
+    """Build the multipart response that streams one variant of a hub"""
     if config.OUTPUT_MODE != "sse":
         return {"error": "SSE mode not enabled"}
 
+    # Requests for the default quality share the default variant
+    if quality == config.SSE_JPEG_QUALITY:
+        quality = None
+
     system_status.update_client_count(1)
     logger.info(f"Client connected. Active: {system_status.active_clients}")
+    client_id = str(next(_client_ids))
 
     async def generate_frames():
         try:
-            while True:
-                try:
-                    frame = await asyncio.wait_for(current_frame.get(), timeout=1.0)
-                    yield frame
-                except asyncio.TimeoutError:
-                    continue
+            async for frame in hub.subscribe(width, quality, fps):
+                metrics.SSE_BYTES_SENT.inc(hub.camera_code, amount=len(frame))
+                metrics.SSE_CLIENT_BYTES_SENT.inc(
+                    hub.camera_code, client_id, amount=len(frame)
+                )
+                yield frame
         except asyncio.CancelledError:
             logger.info("Stream cancelled by client")
         except Exception as e:
             logger.error(f"Stream error: {e}")
         finally:
+            metrics.SSE_CLIENT_BYTES_SENT.remove(hub.camera_code, client_id)
             system_status.update_client_count(-1)
             logger.info(f"Client disconnected. Active: {system_status.active_clients}")
 
@@ -156,13 +390,172 @@ async def health_endpoint():
     return system_status.get_status_dict()
 
 
-def start_http_server(port: int, directory: str, output_mode: str = "hls"):
+@app.get("/outbox")
+def outbox_endpoint():
+    """Violation outbox depth and delivery counters"""
+    stats = system_status.get_provider_stats("outbox")
+    if stats is None:
+        return JSONResponse({"error": "Outbox not running"}, status_code=503)
+    return stats
+
+
+@app.get("/metrics")
+def metrics_endpoint():
+    """Prometheus metrics: stage latency histograms, frame and byte counters"""
+    if pipeline_metrics is None:
+        text = metrics.registry.render()
+    else:
+        # Separate server process: its own serving metrics plus the pipeline's
+        text = metrics.without_families(
+            pipeline_metrics, SERVER_METRICS
+        ) + metrics.registry.render(SERVER_METRICS)
+    return Response(text, media_type=metrics.CONTENT_TYPE)
+
+
+# Low-latency HLS: playlists are built per request, parts never change
+HLS_PLAYLIST_TYPE = "application/vnd.apple.mpegurl"
+LL_HLS_FILE = re.compile(r"(part|seg)(\d+)\.m4s")
+IMMUTABLE = "public, max-age=86400, immutable"
+
+ll_streams: dict[str, LLHLSStream] = {}
+
+
+def get_ll_stream(camera_code: str = None) -> LLHLSStream | None:
+    """LL-HLS stream of a camera (None: the single camera), None if unknown"""
+    if camera_code is None:
+        if config.CAMERAS:
+            return None
+        directory = os.path.dirname(config.OUTPUT_FILE) or "."
+    elif camera_code in get_camera_codes() and config.CAMERAS:
+        directory = f"{config.OUTPUT_DIR}/{camera_code}"
+    else:
+        return None
+    if directory not in ll_streams:
+        ll_streams[directory] = LLHLSStream(directory)
+    return ll_streams[directory]
+
+
+async def _ll_playlist_response(
+    stream: LLHLSStream | None, msn: int = None, part: int = None
+):
+    """LL-HLS playlist, held until part (or segment) msn exists if asked for"""
+    if stream is None:
+        return JSONResponse(status_code=404, content={"error": "Unknown stream"})
+    if part is not None and msn is None:
+        return JSONResponse(
+            status_code=400, content={"error": "_HLS_part requires _HLS_msn"}
+        )
+
+    stream.refresh()
+    cache_control = "no-cache"
+    if msn is not None:
+        if stream.parts and msn > stream.next_msn() + 2:
+            return JSONResponse(
+                status_code=400, content={"error": f"_HLS_msn {msn} is too far ahead"}
+            )
+        available = await stream.wait_for(
+            lambda: stream.has_part(msn, part), 3 * stream.target_duration
+        )
+        if not available:
+            return JSONResponse(
+                status_code=503, content={"error": "Stream is not advancing"}
+            )
+        # The playlist for a given msn/part only changes by growing; caches
+        # can share it between the players waiting for the same part
+        cache_control = f"public, max-age={6 * stream.target_duration}"
+    return Response(
+        stream.render(),
+        media_type=HLS_PLAYLIST_TYPE,
+        headers={"Cache-Control": cache_control},
+    )
+
+
+async def _ll_file_response(stream: LLHLSStream | None, name: str):
+    """Init section, part or whole segment of an LL-HLS stream"""
+    if stream is None:
+        return JSONResponse(status_code=404, content={"error": "Unknown stream"})
+
+    stream.refresh()
+    cache_control = IMMUTABLE
+    if name == "init.mp4":
+        # Replaced when the encoder restarts
+        data = stream.read_init()
+        cache_control = "no-cache"
+    elif match := LL_HLS_FILE.fullmatch(name):
+        kind, number = match.group(1), int(match.group(2))
+        last = stream.last_sequence
+        if kind == "part":
+            # The preload hint names a part before it is written
+            if last is not None and last < number <= last + stream.segment_parts:
+                await stream.wait_for(
+                    lambda: number in stream.parts, 3 * stream.target_duration
+                )
+            data = stream.read_part(number)
+        else:
+            data = stream.read_segment(number)
+    else:
+        data = None
+
+    if data is None:
+        return JSONResponse(status_code=404, content={"error": f"No such file: {name}"})
+    return Response(
+        data, media_type="video/mp4", headers={"Cache-Control": cache_control}
+    )
+
+
+async def ll_playlist_endpoint(
+    msn: int | None = Query(None, alias="_HLS_msn", ge=0),
+    part: int | None = Query(None, alias="_HLS_part", ge=0),
+):
+    """LL-HLS playlist of the single camera (blocking reload with _HLS_msn)"""
+    return await _ll_playlist_response(get_ll_stream(), msn, part)
+
+
+async def camera_ll_playlist_endpoint(
+    camera_code: str,
+    msn: int | None = Query(None, alias="_HLS_msn", ge=0),
+    part: int | None = Query(None, alias="_HLS_part", ge=0),
+):
+    """LL-HLS playlist of one camera in multi-camera mode"""
+    return await _ll_playlist_response(get_ll_stream(camera_code), msn, part)
+
+
+async def ll_file_endpoint(name: str):
+    """Init section, parts and segments of the single camera"""
+    return await _ll_file_response(get_ll_stream(), name)
+
+
+async def camera_ll_file_endpoint(camera_code: str, name: str):
+    """Init section, parts and segments of one camera in multi-camera mode"""
+    return await _ll_file_response(get_ll_stream(camera_code), name)
+
+
+if config.OUTPUT_MODE == "hls" and config.HLS_LOW_LATENCY:
+    # Routes match in order, so these come before the static mount that
+    # lifespan adds and that would otherwise answer the same paths
+    app.get("/stream.m3u8")(ll_playlist_endpoint)
+    app.get("/ll/{name}")(ll_file_endpoint)
+    app.get("/{camera_code}/stream.m3u8")(camera_ll_playlist_endpoint)
+    app.get("/{camera_code}/ll/{name}")(camera_ll_file_endpoint)
+
+
+def start_http_server(
+    port: int,
+    directory: str,
+    output_mode: str = "hls",
+    workers: int = 1,
+    ready: threading.Event = None,
+):
     """Start FastAPI server in blocking mode
 
     Args:
         port: Server port number
         directory: Directory to serve (for HLS mode)
         output_mode: "hls" or "sse"
+        workers: uvicorn worker processes (more than one needs
+            HTTP_SERVER_PROCESS, as workers read frames from shared memory)
+        ready: Set once the port accepts connections (default: server_ready;
+            pass a multiprocessing Event when running in another process)
     """
     logger.info(f"Starting FastAPI server: mode={output_mode}, port={port}")
 
@@ -174,4 +567,35 @@ def start_http_server(port: int, directory: str, output_mode: str = "hls"):
     else:
         logger.info(f"HLS endpoint: http://localhost:{port}/stream.m3u8")
 
-    uvicorn.run(app, host="0.0.0.0", port=port, log_level="info")
+    ready = ready or server_ready
+    if workers > 1:
+        # uvicorn binds the port in a supervisor that reports nothing back
+        def signal_when_listening():
+            while True:
+                try:
+                    socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                    ready.set()
+                    return
+                except OSError:
+                    time.sleep(0.05)
+
+        threading.Thread(target=signal_when_listening, daemon=True).start()
+        # Worker processes import the app themselves
+        uvicorn.run(
+            "modules.http_server:app",
+            host="0.0.0.0",
+            port=port,
+            workers=workers,
+            log_level="info",
+        )
+    else:
+
+        class ReadyServer(uvicorn.Server):
+            async def startup(self, sockets=None):
+                await super().startup(sockets)
+                if self.started:
+                    ready.set()
+
+        ReadyServer(
+            uvicorn.Config(app, host="0.0.0.0", port=port, log_level="info")
+        ).run()
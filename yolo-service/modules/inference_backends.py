@@ -0,0 +1,439 @@
+"""Inference Backends Module
+
+Runtimes that execute the YOLO model for YOLODetector. Every backend returns,
+per frame, an (N, 6) float32 array of [x1, y1, x2, y2, confidence, class_id]
+in frame pixel coordinates, so the detector output is the same whichever
+runtime is used.
+
+The ONNX Runtime and OpenVINO backends export the PyTorch model once and
+cache the artifact next to it, keyed by model hash and input size.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+import cv2
+import numpy as np
+
+
+TORCH = "torch"
+ONNX = "onnx"
+OPENVINO = "openvino"
+
+LETTERBOX_COLOR = 114
+EMPTY_DETECTIONS = np.zeros((0, 6), dtype=np.float32)
+
+
+class InferenceBackend:
+    """Base class for model runtimes"""
+
+    def __init__(
+        self,
+        imgsz: int,
+        classes: list = None,
+        conf_threshold: float = 0.25,
+        iou_threshold: float = 0.7,
+        max_detections: int = 300,
+    ):
+        """Initialize backend
+
+        Args:
+            imgsz: Model input size in pixels (square)
+            classes: Class IDs to keep (None keeps all)
+            conf_threshold: Minimum confidence of a detection
+            iou_threshold: IoU threshold of non-maximum suppression
+            max_detections: Maximum detections per frame
+        """
+        self.imgsz = imgsz
+        self.classes = classes
+        self.conf_threshold = conf_threshold
+        self.iou_threshold = iou_threshold
+        self.max_detections = max_detections
+        self.names: dict[int, str] = {}
+
+    def predict(self, frames: list[np.ndarray]) -> list[np.ndarray]:
+        """Run the model on a batch of frames
+
+        Args:
+            frames: Input frames (each height, width, 3, BGR)
+
+        Returns:
+            One (N, 6) array [x1, y1, x2, y2, confidence, class_id] per frame
+        """
+        raise NotImplementedError
+
+    def warmup(self, runs: int = 1):
+        """Run the model on blank frames so the first real frame is not slow"""
+        blank = np.full((self.imgsz, self.imgsz, 3), LETTERBOX_COLOR, np.uint8)
+        for _ in range(runs):
+            self.predict([blank])
+
+
+class UltralyticsBackend(InferenceBackend):
+    """PyTorch model executed through Ultralytics"""
+
+    def __init__(
+        self,
+        model_path: str,
+        device: str = "auto",
+        intra_op_threads: int = 0,
+        inter_op_threads: int = 0,
+        **kwargs,
+    ):
+        """Initialize PyTorch backend
+
+        Args:
+            model_path: Path to the .pt model
+            device: "auto", "cpu", "cuda" or "mps"
+            intra_op_threads: Torch intra-op threads (0 = torch default)
+            inter_op_threads: Torch inter-op threads (0 = torch default)
+            **kwargs: Common backend options (see InferenceBackend)
+        """
+        super().__init__(**kwargs)
+        import torch
+        from ultralytics import YOLO
+
+        if intra_op_threads:
+            torch.set_num_threads(intra_op_threads)
+        if inter_op_threads:
+            try:
+                torch.set_num_interop_threads(inter_op_threads)
+            except RuntimeError:
+                # Can only be set once, before any parallel work started
+                pass
+
+        self.device = resolve_device(device)
+        self.model = YOLO(model_path)
+        self.names = dict(self.model.names)
+
+    def predict(self, frames: list[np.ndarray]) -> list[np.ndarray]:
+        results_list = self.model(
+            frames,
+            device=self.device,
+            verbose=False,
+            classes=self.classes,
+            imgsz=self.imgsz,
+            conf=self.conf_threshold,
+            iou=self.iou_threshold,
+            max_det=self.max_detections,
+        )
+        return [
+            results.boxes.data.cpu().numpy().astype(np.float32)
+            if results.boxes is not None
+            else EMPTY_DETECTIONS
+            for results in results_list
+        ]
+
+
+class ExportedModelBackend(InferenceBackend):
+    """Shared pre/post-processing for runtimes that run an exported graph"""
+
+    def predict(self, frames: list[np.ndarray]) -> list[np.ndarray]:
+        letterboxed = [letterbox(frame, self.imgsz) for frame in frames]
+        blob = cv2.dnn.blobFromImages(
+            [image for image, _, _ in letterboxed],
+            scalefactor=1 / 255.0,
+            swapRB=True,
+        )
+        output = self._run(blob)
+
+        detections = []
+        for index, (_, ratio, padding) in enumerate(letterboxed):
+            boxes = self._postprocess(output[index])
+            detections.append(
+                scale_boxes(boxes, ratio, padding, frames[index].shape[:2])
+            )
+        return detections
+
+    def _run(self, blob: np.ndarray) -> np.ndarray:
+        """Execute the graph on an (B, 3, imgsz, imgsz) float32 blob"""
+        raise NotImplementedError
+
+    def _postprocess(self, output: np.ndarray) -> np.ndarray:
+        """Decode the raw output of one image into (N, 6) detections
+
+        Supports NMS-free end-to-end heads (300, 6) as well as classic heads
+        (4 + num_classes, anchors) that still need non-maximum suppression.
+        """
+        if output.ndim == 2 and output.shape[1] == 6:
+            detections = output[output[:, 4] >= self.conf_threshold]
+        else:
+            predictions = output.T
+            scores = predictions[:, 4:]
+            class_ids = scores.argmax(axis=1)
+            confidences = scores[np.arange(len(scores)), class_ids]
+            keep = confidences >= self.conf_threshold
+            if self.classes is not None:
+                keep &= np.isin(class_ids, self.classes)
+
+            centers = predictions[keep, :4]
+            confidences = confidences[keep]
+            class_ids = class_ids[keep]
+            if not len(centers):
+                return EMPTY_DETECTIONS
+
+            xywh = centers.copy()
+            xywh[:, :2] -= xywh[:, 2:] / 2
+            indices = cv2.dnn.NMSBoxesBatched(
+                xywh.tolist(),
+                confidences.tolist(),
+                class_ids.tolist(),
+                self.conf_threshold,
+                self.iou_threshold,
+            )
+            indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+            xyxy = xywh[indices]
+            xyxy[:, 2:] += xyxy[:, :2]
+            detections = np.column_stack(
+                [xyxy, confidences[indices], class_ids[indices]]
+            )
+
+        if self.classes is not None:
+            detections = detections[np.isin(detections[:, 5], self.classes)]
+        order = np.argsort(-detections[:, 4])[: self.max_detections]
+        return detections[order].astype(np.float32)
+
+
+class OnnxRuntimeBackend(ExportedModelBackend):
+    """Exported ONNX model executed with ONNX Runtime on CPU"""
+
+    def __init__(
+        self,
+        model_path: str,
+        intra_op_threads: int = 0,
+        inter_op_threads: int = 0,
+        **kwargs,
+    ):
+        """Initialize ONNX Runtime backend
+
+        Args:
+            model_path: Path to the .pt model (exported once, then cached)
+            intra_op_threads: Threads used inside an operator (0 = all cores)
+            inter_op_threads: Threads running operators in parallel (0 = default)
+            **kwargs: Common backend options (see InferenceBackend)
+        """
+        super().__init__(**kwargs)
+        import onnxruntime as ort
+
+        artifact, self.names = export_model(model_path, ONNX, self.imgsz)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        if inter_op_threads:
+            options.inter_op_num_threads = inter_op_threads
+            options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+
+        self.session = ort.InferenceSession(
+            artifact, options, providers=["CPUExecutionProvider"]
+        )
+        self.input_name = self.session.get_inputs()[0].name
+
+    def _run(self, blob: np.ndarray) -> np.ndarray:
+        return self.session.run(None, {self.input_name: blob})[0]
+
+
+class OpenVINOBackend(ExportedModelBackend):
+    """Exported OpenVINO IR model executed on the CPU plugin"""
+
+    def __init__(
+        self,
+        model_path: str,
+        intra_op_threads: int = 0,
+        inter_op_threads: int = 0,
+        **kwargs,
+    ):
+        """Initialize OpenVINO backend
+
+        Args:
+            model_path: Path to the .pt model (exported once, then cached)
+            intra_op_threads: CPU threads used for inference (0 = all cores)
+            inter_op_threads: Parallel inference streams (0 = plugin default)
+            **kwargs: Common backend options (see InferenceBackend)
+        """
+        super().__init__(**kwargs)
+        import openvino as ov
+
+        artifact, self.names = export_model(model_path, OPENVINO, self.imgsz)
+
+        properties = {"PERFORMANCE_HINT": "LATENCY"}
+        if intra_op_threads:
+            properties["INFERENCE_NUM_THREADS"] = intra_op_threads
+        if inter_op_threads:
+            properties["NUM_STREAMS"] = inter_op_threads
+
+        core = ov.Core()
+        self.compiled_model = core.compile_model(
+            core.read_model(artifact), "CPU", properties
+        )
+        self.output = self.compiled_model.output(0)
+
+    def _run(self, blob: np.ndarray) -> np.ndarray:
+        return self.compiled_model(blob)[self.output]
+
+
+def create_backend(
+    backend: str,
+    model_path: str,
+    device: str = "auto",
+    intra_op_threads: int = 0,
+    inter_op_threads: int = 0,
+    **kwargs,
+) -> InferenceBackend:
+    """Create the inference backend selected in config
+
+    Args:
+        backend: TORCH, ONNX or OPENVINO
+        model_path: Path to the .pt model
+        device: Torch device (TORCH backend only)
+        intra_op_threads: Threads used inside an operator (0 = runtime default)
+        inter_op_threads: Operators/streams run in parallel (0 = runtime default)
+        **kwargs: Common backend options (see InferenceBackend)
+    """
+    threads = {
+        "intra_op_threads": intra_op_threads,
+        "inter_op_threads": inter_op_threads,
+    }
+    if backend == ONNX:
+        return OnnxRuntimeBackend(model_path, **threads, **kwargs)
+    if backend == OPENVINO:
+        return OpenVINOBackend(model_path, **threads, **kwargs)
+    return UltralyticsBackend(model_path, device=device, **threads, **kwargs)
+
+
+def resolve_device(device: str) -> str:
+    """Resolve "auto" to the best available torch device"""
+    if device != "auto":
+        return device
+
+    import torch
+
+    if torch.cuda.is_available():
+        return "cuda"
+    if torch.backends.mps.is_available():
+        return "mps"
+    return "cpu"
+
+
+def file_hash(path: str) -> str:
+    """Short SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def export_model(model_path: str, backend: str, imgsz: int) -> tuple[str, dict]:
+    """Export a .pt model for a runtime, reusing a cached artifact when present
+
+    Artifacts are stored next to the model as <stem>.<hash>.<imgsz>.onnx or
+    <stem>.<hash>.<imgsz>_openvino_model/, with the class names in a
+    <stem>.<hash>.<imgsz>.json sidecar. Both are moved into place under a
+    temporary name first, so a reader never sees a half-written cache; with
+    INFERENCE_WORKERS the parent exports before the workers start.
+
+    Args:
+        model_path: Path to the .pt model
+        backend: ONNX or OPENVINO
+        imgsz: Model input size
+
+    Returns:
+        (artifact_path, class_names) tuple
+    """
+    stem, _ = os.path.splitext(model_path)
+    cache_stem = f"{stem}.{file_hash(model_path)}.{imgsz}"
+    if backend == ONNX:
+        artifact = f"{cache_stem}.onnx"
+    else:
+        artifact = f"{cache_stem}_openvino_model"
+    names_file = f"{cache_stem}.json"
+
+    if os.path.exists(artifact) and os.path.exists(names_file):
+        print(f"[YOLO] Using cached {backend} model: {artifact}")
+    else:
+        from ultralytics import YOLO
+
+        print(f"[YOLO] Exporting {model_path} to {backend} (imgsz={imgsz})...")
+        model = YOLO(model_path)
+        exported = model.export(format=backend, imgsz=imgsz, dynamic=True)
+
+        suffix = f".tmp{os.getpid()}"
+        shutil.move(exported, artifact + suffix)
+        if os.path.isdir(artifact):
+            shutil.rmtree(artifact)
+        os.replace(artifact + suffix, artifact)
+
+        with open(names_file + suffix, "w") as f:
+            json.dump({str(k): v for k, v in model.names.items()}, f)
+        os.replace(names_file + suffix, names_file)
+        print(f"[YOLO] Cached {backend} model: {artifact}")
+
+    with open(names_file) as f:
+        names = {int(k): v for k, v in json.load(f).items()}
+
+    if backend == OPENVINO:
+        xml_files = [name for name in os.listdir(artifact) if name.endswith(".xml")]
+        return os.path.join(artifact, xml_files[0]), names
+    return artifact, names
+
+
+def letterbox(frame: np.ndarray, size: int) -> tuple[np.ndarray, float, tuple]:
+    """Resize keeping the aspect ratio and pad to a size x size square
+
+    Returns:
+        (image, ratio, (pad_left, pad_top)) tuple
+    """
+    height, width = frame.shape[:2]
+    ratio = min(size / height, size / width)
+    new_width, new_height = round(width * ratio), round(height * ratio)
+    if (new_width, new_height) != (width, height):
+        frame = cv2.resize(
+            frame, (new_width, new_height), interpolation=cv2.INTER_LINEAR
+        )
+
+    pad_left = (size - new_width) // 2
+    pad_top = (size - new_height) // 2
+    image = np.full((size, size, 3), LETTERBOX_COLOR, dtype=np.uint8)
+    image[pad_top : pad_top + new_height, pad_left : pad_left + new_width] = frame
+    return image, ratio, (pad_left, pad_top)
+
+
+def scale_boxes(
+    detections: np.ndarray, ratio: float, padding: tuple, shape: tuple
+) -> np.ndarray:
+    """Map letterboxed detections back to frame pixel coordinates"""
+    if not len(detections):
+        return EMPTY_DETECTIONS
+
+    detections = detections.copy()
+    pad_left, pad_top = padding
+    detections[:, [0, 2]] = (detections[:, [0, 2]] - pad_left) / ratio
+    detections[:, [1, 3]] = (detections[:, [1, 3]] - pad_top) / ratio
+    height, width = shape
+    detections[:, [0, 2]] = detections[:, [0, 2]].clip(0, width)
+    detections[:, [1, 3]] = detections[:, [1, 3]].clip(0, height)
+    return detections
+
+
+def rescale_boxes(detections: np.ndarray, from_shape: tuple, to_shape: tuple):
+    """Map detections found on a resized frame to another resolution
+
+    Args:
+        detections: (N, 6) detections in from_shape pixel coordinates
+        from_shape: (height, width) of the frame the model saw
+        to_shape: (height, width) of the target frame
+
+    Returns:
+        (N, 6) detections in to_shape pixel coordinates
+    """
+    if not len(detections) or tuple(from_shape) == tuple(to_shape):
+        return detections
+
+    detections = detections.copy()
+    detections[:, [0, 2]] *= to_shape[1] / from_shape[1]
+    detections[:, [1, 3]] *= to_shape[0] / from_shape[0]
+    return detections
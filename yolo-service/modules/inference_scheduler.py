@@ -0,0 +1,241 @@
+"""Inference Cadence Module
+
+Runs the model only on some frames and carries the last detections forward
+on the frames in between, so the output stream keeps the source FPS while
+inference stays within a CPU budget.
+"""
+
+import math
+import threading
+
+import cv2
+import numpy as np
+
+from .detections import Detections
+
+
+EVERY_FRAME = "every_frame"
+FIXED = "fixed"
+ADAPTIVE = "adaptive"
+
+
+class InferenceScheduler:
+    """Decide per camera which frames go through the model"""
+
+    def __init__(
+        self,
+        cadence: str = EVERY_FRAME,
+        interval: int = 1,
+        cpu_budget: float = 0.5,
+        target_fps: float = None,
+        max_interval: int = 15,
+        smoothing: float = 0.1,
+    ):
+        """Initialize inference scheduler
+
+        Args:
+            cadence: EVERY_FRAME, FIXED (every `interval` frames) or ADAPTIVE
+            interval: Frames per inference in FIXED mode
+            cpu_budget: ADAPTIVE: share of wall time the model may use (0-1]
+            target_fps: ADAPTIVE: optional cap on inferences per second per camera
+            max_interval: ADAPTIVE: upper bound for the interval in frames
+            smoothing: Weight of the newest latency sample in the moving average
+        """
+        assert cadence in (EVERY_FRAME, FIXED, ADAPTIVE), f"Unknown cadence: {cadence}"
+
+        self.cadence = cadence
+        self.fixed_interval = max(1, interval)
+        self.cpu_budget = cpu_budget
+        self.target_fps = target_fps
+        self.max_interval = max(1, max_interval)
+        self.smoothing = smoothing
+
+        self._lock = threading.Lock()
+        self.camera_fps: dict[str, float] = {}
+        self.intervals: dict[str, int] = {}
+        self._frames_since: dict[str, int] = {}
+        self.latency_per_frame = 0.0
+        self.scheduled_frames = 0
+        self.propagated_frames = 0
+
+    def add_camera(self, camera_code: str, fps: float):
+        """Register a camera and its source FPS"""
+        with self._lock:
+            self.camera_fps[camera_code] = fps or 25.0
+            self.intervals[camera_code] = (
+                self.fixed_interval if self.cadence == FIXED else 1
+            )
+            # Run the model on the very first frame
+            self._frames_since[camera_code] = self.intervals[camera_code]
+
+    def should_infer(self, camera_code: str) -> bool:
+        """Check whether the next frame of a camera must go through the model
+
+        Each call counts as one frame of that camera.
+        """
+        with self._lock:
+            frames_since = self._frames_since.get(camera_code, 0) + 1
+            if frames_since >= self.intervals.get(camera_code, 1):
+                self._frames_since[camera_code] = 0
+                self.scheduled_frames += 1
+                return True
+            self._frames_since[camera_code] = frames_since
+            self.propagated_frames += 1
+            return False
+
+    def record_latency(self, seconds: float, frames: int = 1):
+        """Feed the measured duration of a model call and adapt the intervals
+
+        Args:
+            seconds: Wall time of the model call
+            frames: Number of frames in the batch
+        """
+        if frames <= 0:
+            return
+
+        sample = seconds / frames
+        with self._lock:
+            if self.latency_per_frame == 0.0:
+                self.latency_per_frame = sample
+            else:
+                self.latency_per_frame += self.smoothing * (
+                    sample - self.latency_per_frame
+                )
+
+            if self.cadence == ADAPTIVE:
+                self._adapt_intervals()
+
+    def _adapt_intervals(self):
+        """Pick intervals so inference of all cameras fits the CPU budget
+
+        The budget allows cpu_budget / latency inferences per second in total.
+        The frames of all cameras share it, so every camera gets the same
+        interval N = ceil(total_source_fps / allowed_rate) (caller holds lock).
+        """
+        if self.latency_per_frame <= 0:
+            return
+
+        allowed_rate = self.cpu_budget / self.latency_per_frame
+        total_fps = sum(self.camera_fps.values())
+        shared_interval = math.ceil(total_fps / allowed_rate) if allowed_rate else 1
+
+        for camera_code, fps in self.camera_fps.items():
+            interval = shared_interval
+            if self.target_fps:
+                interval = max(interval, math.ceil(fps / self.target_fps))
+            self.intervals[camera_code] = min(max(1, interval), self.max_interval)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "cadence": self.cadence,
+                "intervals": dict(self.intervals),
+                "latency_ms": round(self.latency_per_frame * 1000, 2),
+                "scheduled_frames": self.scheduled_frames,
+                "propagated_frames": self.propagated_frames,
+            }
+
+
+class BoxPropagator:
+    """Carry detections of one camera forward with sparse optical flow
+
+    Between two inferences every box is shifted by the median motion of a
+    small grid of points inside it, tracked with pyramidal Lucas-Kanade on a
+    downscaled grayscale copy of the frame.
+    """
+
+    def __init__(
+        self, flow_width: int = 320, grid_size: int = 3, use_flow: bool = True
+    ):
+        """Initialize box propagator
+
+        Args:
+            flow_width: Width of the grayscale copy used for optical flow
+            grid_size: Points per box side tracked between frames
+            use_flow: False to hold the last boxes in place instead
+        """
+        self.flow_width = flow_width
+        self.grid_size = grid_size
+        self.use_flow = use_flow
+        self._previous_gray: np.ndarray = None
+        self._scale = 1.0
+        self.detections: Detections = None
+
+    def _to_gray(self, frame: np.ndarray) -> np.ndarray:
+        height, width = frame.shape[:2]
+        self._scale = min(1.0, self.flow_width / width)
+        if self._scale < 1.0:
+            frame = cv2.resize(
+                frame,
+                (self.flow_width, max(1, round(height * self._scale))),
+                interpolation=cv2.INTER_LINEAR,
+            )
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+    def reset(self, frame: np.ndarray, detections: Detections):
+        """Store fresh model detections and the frame they belong to"""
+        self.detections = detections
+        if self.use_flow:
+            self._previous_gray = self._to_gray(frame)
+
+    def propagate(self, frame: np.ndarray) -> Detections:
+        """Move the last detections onto a new frame
+
+        Args:
+            frame: Frame that was not run through the model
+
+        Returns:
+            Detections with shifted boxes
+        """
+        if (
+            self.detections is None
+            or not len(self.detections)
+            or not self.use_flow
+            or self._previous_gray is None
+        ):
+            return self.detections
+
+        gray = self._to_gray(frame)
+        points = self._grid_points(self.detections.xyxy)
+        moved, status, _ = cv2.calcOpticalFlowPyrLK(
+            self._previous_gray,
+            gray,
+            points.reshape(-1, 1, 2),
+            None,
+            winSize=(15, 15),
+            maxLevel=2,
+        )
+        self._previous_gray = gray
+
+        if moved is None:
+            return self.detections
+
+        # Median shift of the tracked points of every box, lost points ignored
+        per_box = self.grid_size * self.grid_size
+        displacement = ((moved.reshape(-1, 2) - points) / self._scale).reshape(
+            -1, per_box, 2
+        )
+        valid = status.reshape(-1, per_box).astype(bool)
+        displacement[~valid] = np.nan
+        shift = np.zeros((len(displacement), 2), dtype=np.float32)
+        tracked = valid.any(axis=1)
+        shift[tracked] = np.nanmedian(displacement[tracked], axis=1)
+
+        height, width = frame.shape[:2]
+        xyxy = self.detections.xyxy + np.tile(shift, 2)
+        xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, width)
+        xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, height)
+
+        self.detections = self.detections.with_boxes(xyxy)
+        return self.detections
+
+    def _grid_points(self, xyxy: np.ndarray) -> np.ndarray:
+        """Evenly spaced points inside every box, in flow-image coordinates"""
+        steps = (np.arange(self.grid_size) + 1) / (self.grid_size + 1)
+        x1, y1, x2, y2 = (xyxy * self._scale).T
+        xs = x1[:, None] + (x2 - x1)[:, None] * steps
+        ys = y1[:, None] + (y2 - y1)[:, None] * steps
+        shape = (len(xyxy), self.grid_size, self.grid_size)
+        grid_x = np.broadcast_to(xs[:, None, :], shape)
+        grid_y = np.broadcast_to(ys[:, :, None], shape)
+        return np.stack([grid_x, grid_y], axis=-1).reshape(-1, 2).astype(np.float32)
@@ -0,0 +1,508 @@
+"""Inference Worker Processes Module
+
+Runs the model in separate processes so inference no longer shares the GIL
+with capture, JPEG encoding, the HTTP server and the violation submitter.
+
+Frames reach the workers through a FrameRing: preallocated slots in one
+multiprocessing.shared_memory block. The parent copies a frame into a free
+slot and sends only (slot, shape) over the worker's pipe; the worker returns
+the compact (N, 6) detection array of every frame. A worker that dies is
+restarted, and the frames it held are reported back as failed.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from dataclasses import dataclass
+from multiprocessing import connection
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable
+
+import numpy as np
+
+import config
+from .detections import Detections
+from .inference_backends import rescale_boxes
+from .metrics import INFERENCE_WORKER_RESTARTS
+from .overlay import OverlayRenderer
+
+
+class FrameRing:
+    """Fixed-size frame slots in one shared memory block"""
+
+    def __init__(self, slot_count: int, slot_bytes: int):
+        """Allocate the ring
+
+        Args:
+            slot_count: Number of frames that can be in flight at once
+            slot_bytes: Size of one slot, at least the largest frame in bytes
+        """
+        self.slot_count = slot_count
+        self.slot_bytes = slot_bytes
+        self.shm = SharedMemory(create=True, size=slot_count * slot_bytes)
+        self._free = list(range(slot_count))
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def free(self) -> int:
+        return len(self._free)
+
+    def acquire(self) -> int | None:
+        """Take a free slot (caller holds the pool lock)"""
+        return self._free.pop() if self._free else None
+
+    def release(self, slot: int):
+        self._free.append(slot)
+
+    def write(self, slot: int, frame: np.ndarray) -> tuple:
+        """Copy a frame into a slot and return its shape"""
+        if frame.nbytes > self.slot_bytes:
+            raise ValueError(
+                f"Frame of {frame.nbytes} bytes does not fit a "
+                f"{self.slot_bytes}-byte ring slot"
+            )
+        np.copyto(slot_view(self.shm, self.slot_bytes, slot, frame.shape), frame)
+        return frame.shape
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def slot_view(shm: SharedMemory, slot_bytes: int, slot: int, shape: tuple):
+    """uint8 array of the given shape backed by a ring slot"""
+    return np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=slot * slot_bytes)
+
+
+def load_worker_backend():
+    """Default model loader of a worker: the configured YOLODetector's runtime"""
+    from .yolo_detector import YOLODetector
+
+    return YOLODetector().backend
+
+
+def _worker_main(conn, load_backend: Callable, intra_op_threads: int):
+    """Worker process: load the model, then run every batch sent over conn
+
+    Messages to the parent are ("ready", names), ("done", batch_id, arrays,
+    seconds) and ("error", batch_id, message).
+    """
+    if intra_op_threads:
+        config.YOLO_INTRA_OP_THREADS = intra_op_threads
+    backend = load_backend()
+    conn.send(("ready", backend.names))
+
+    rings: dict[str, SharedMemory] = {}
+    try:
+        while True:
+            task = conn.recv()
+            if task is None:
+                break
+            batch_id, ring_name, slot_bytes, frames = task
+            if ring_name not in rings:
+                rings[ring_name] = SharedMemory(name=ring_name)
+            shm = rings[ring_name]
+            try:
+                views = [
+                    slot_view(shm, slot_bytes, slot, shape) for slot, shape in frames
+                ]
+                started = time.perf_counter()
+                arrays = backend.predict(views)
+                elapsed = time.perf_counter() - started
+                del views
+                conn.send(("done", batch_id, arrays, elapsed))
+            except Exception as e:
+                views = None
+                conn.send(("error", batch_id, f"{type(e).__name__}: {e}"))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        for shm in rings.values():
+            shm.close()
+
+
+@dataclass
+class _Batch:
+    """Frames sent to a worker, waiting for their detections"""
+
+    batch_id: int
+    slots: list[int]
+    model_shapes: list[tuple]
+    display_shapes: list[tuple]
+    callback: Callable
+
+
+class _Worker:
+    """Parent-side handle of one worker process"""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.process: multiprocessing.Process = None
+        self.conn = None
+        self.ready = False
+        self.in_flight: dict[int, _Batch] = {}
+        self.restart_at: float = None
+        self.restarts = 0
+
+
+class InferenceWorkerPool:
+    """Model replicas in worker processes, fed through a shared-memory FrameRing
+
+    submit() copies frames into ring slots and hands the batch to the least
+    busy ready worker; a result thread receives the detections and calls the
+    batch's callback with them. Batches finish in any order across workers;
+    callers that need per-camera order restore it themselves (see
+    WorkerInferenceRunner in main.py).
+
+    Offers names, renderer, annotate() and detect_batch() like YOLODetector,
+    so the output stage draws with it unchanged.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        ring_slots: int = None,
+        load_backend: Callable = load_worker_backend,
+        max_in_flight: int = 2,
+        restart_delay: float = 1.0,
+        start_timeout: float = 300.0,
+    ):
+        """Initialize worker pool
+
+        Args:
+            workers: Number of worker processes
+            ring_slots: Frames that can be in flight (default: from config)
+            load_backend: Picklable callable run in each worker that returns
+                an object with names and predict(frames) -> [(N, 6) arrays]
+            max_in_flight: Batches queued per worker, so it never idles
+                between two batches
+            restart_delay: Seconds before a crashed worker is started again
+            start_timeout: Seconds start() waits for the first worker's model
+        """
+        self.worker_count = workers
+        self.ring_slots = ring_slots or config.INFERENCE_WORKER_RING_SLOTS
+        self.load_backend = load_backend
+        self.max_in_flight = max_in_flight
+        self.restart_delay = restart_delay
+        self.start_timeout = start_timeout
+        # Spawned workers never inherit locks held by the parent's threads
+        self._context = multiprocessing.get_context("spawn")
+        self._intra_op_threads = config.YOLO_INTRA_OP_THREADS or max(
+            1, (os.cpu_count() or 1) // workers
+        )
+
+        self.workers = [_Worker(index) for index in range(workers)]
+        self.ring: FrameRing = None
+        self.names: dict = {}
+        self.renderer: OverlayRenderer = None
+        self._cond = threading.Condition()
+        self._next_batch_id = 0
+        self._result_thread = None
+        self.running = False
+        self.batches = 0
+        self.failed_batches = 0
+
+    @property
+    def max_batch_size(self) -> int:
+        """Largest batch submit() accepts: a batch needs one slot per frame"""
+        return min(config.YOLO_MAX_BATCH_SIZE, self.ring_slots)
+
+    def start(self):
+        """Start the workers and wait until one of them has loaded the model"""
+        self.running = True
+        for worker in self.workers:
+            self._spawn(worker)
+
+        deadline = time.monotonic() + self.start_timeout
+        while not self.names:
+            if time.monotonic() > deadline:
+                self.stop()
+                raise RuntimeError("No inference worker loaded the model")
+            self._poll(timeout=0.5)
+            if not self.names and not any(
+                worker.process.is_alive() for worker in self.workers
+            ):
+                self.stop()
+                raise RuntimeError("Every inference worker exited at startup")
+
+        self.renderer = OverlayRenderer(self.names)
+        self._result_thread = threading.Thread(
+            target=self._run_results, name="inference-workers", daemon=True
+        )
+        self._result_thread.start()
+        print(
+            f"[Workers] {self.worker_count} inference workers, "
+            f"{self._intra_op_threads} threads each"
+        )
+
+    def open_ring(self, slot_bytes: int):
+        """Allocate the frame ring once the largest model frame is known"""
+        with self._cond:
+            if self.ring and self.ring.slot_bytes >= slot_bytes:
+                return
+            if self.ring:
+                raise RuntimeError("The frame ring is already in use")
+            self.ring = FrameRing(self.ring_slots, slot_bytes)
+        print(
+            f"[Workers] Frame ring: {self.ring_slots} slots of "
+            f"{slot_bytes / 1024 / 1024:.1f} MB"
+        )
+
+    def stop(self):
+        """Stop the workers and free the shared memory"""
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+        if self._result_thread and self._result_thread.is_alive():
+            self._result_thread.join(timeout=2)
+        for worker in self.workers:
+            if worker.conn:
+                try:
+                    worker.conn.send(None)
+                except (OSError, ValueError):
+                    pass
+        for worker in self.workers:
+            if worker.process:
+                worker.process.join(timeout=5)
+                if worker.process.is_alive():
+                    worker.process.terminate()
+                    worker.process.join(timeout=1)
+        for worker in self.workers:
+            self._fail_in_flight(worker)
+            if worker.conn:
+                worker.conn.close()
+                worker.conn = None
+        if self.ring:
+            self.ring.close()
+            self.ring = None
+        print("[Workers] Stopped")
+
+    def _spawn(self, worker: _Worker):
+        parent_conn, child_conn = self._context.Pipe()
+        worker.process = self._context.Process(
+            target=_worker_main,
+            args=(child_conn, self.load_backend, self._intra_op_threads),
+            name=f"inference-worker-{worker.index}",
+            daemon=True,
+        )
+        worker.process.start()
+        child_conn.close()
+        worker.conn = parent_conn
+        worker.ready = False
+        worker.restart_at = None
+
+    def submit(
+        self,
+        frames: list[np.ndarray],
+        display_frames: list[np.ndarray] = None,
+        callback: Callable[[list[Detections] | None, float], None] = None,
+    ) -> bool:
+        """Send a batch to a worker; blocks while no worker or slot is free
+
+        Args:
+            frames: Frames the model runs on (at most max_batch_size)
+            display_frames: Optional full-resolution frames matching frames;
+                boxes are mapped to their coordinates
+            callback: Called from the result thread with the Detections per
+                frame and the model seconds, or with (None, 0.0) when the
+                worker failed or died
+
+        Returns:
+            False if the pool stopped before the batch could be sent
+        """
+        display_frames = display_frames or frames
+        with self._cond:
+            while True:
+                if not self.running:
+                    return False
+                worker = self._idle_worker()
+                if worker and self.ring and self.ring.free >= len(frames):
+                    break
+                self._cond.wait(timeout=0.5)
+
+            slots = [self.ring.acquire() for _ in frames]
+            shapes = [
+                self.ring.write(slot, frame) for slot, frame in zip(slots, frames)
+            ]
+            self._next_batch_id += 1
+            batch = _Batch(
+                self._next_batch_id,
+                slots,
+                shapes,
+                [frame.shape[:2] for frame in display_frames],
+                callback,
+            )
+            worker.in_flight[batch.batch_id] = batch
+            try:
+                worker.conn.send(
+                    (
+                        batch.batch_id,
+                        self.ring.name,
+                        self.ring.slot_bytes,
+                        list(zip(slots, shapes)),
+                    )
+                )
+            except (OSError, ValueError):
+                # The result thread notices the dead worker and fails the batch
+                pass
+        return True
+
+    def _idle_worker(self) -> _Worker | None:
+        """Ready worker with the fewest batches in flight (caller holds lock)"""
+        candidates = [
+            worker
+            for worker in self.workers
+            if worker.ready and len(worker.in_flight) < self.max_in_flight
+        ]
+        return min(candidates, key=lambda w: len(w.in_flight), default=None)
+
+    def detect_batch(
+        self, frames: list[np.ndarray], display_frames: list[np.ndarray] = None
+    ) -> list[Detections]:
+        """Blocking detection like YOLODetector.detect_batch()"""
+        results = []
+        for start in range(0, len(frames), self.max_batch_size):
+            done = threading.Event()
+            chunk_results = []
+
+            def collect(detections, _elapsed, out=chunk_results, event=done):
+                out.append(detections)
+                event.set()
+
+            chunk = frames[start : start + self.max_batch_size]
+            display = (
+                display_frames[start : start + len(chunk)] if display_frames else None
+            )
+            if not self.submit(chunk, display, collect):
+                raise RuntimeError("Inference workers stopped")
+            done.wait()
+            if chunk_results[0] is None:
+                raise RuntimeError("Inference worker failed")
+            results.extend(chunk_results[0])
+        return results
+
+    def annotate(
+        self, frame: np.ndarray, detections: Detections, out: np.ndarray = None
+    ) -> np.ndarray:
+        """Draw detections onto a copy of a frame (see YOLODetector.annotate)"""
+        return self.renderer.render(frame, detections, out)
+
+    def _run_results(self):
+        while self.running:
+            self._poll(timeout=0.5)
+            self._check_workers()
+
+    def _poll(self, timeout: float):
+        """Receive and dispatch the messages of every worker"""
+        conns = {worker.conn: worker for worker in self.workers if worker.conn}
+        if not conns:
+            time.sleep(timeout)
+            return
+        for conn in connection.wait(list(conns), timeout=timeout):
+            worker = conns[conn]
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                # Closed pipe: the process is gone, _check_workers restarts it
+                continue
+            self._handle(worker, message)
+
+    def _handle(self, worker: _Worker, message: tuple):
+        kind = message[0]
+        if kind == "ready":
+            with self._cond:
+                worker.ready = True
+                self.names = self.names or message[1]
+                self._cond.notify_all()
+            return
+
+        with self._cond:
+            batch = worker.in_flight.pop(message[1], None)
+            if batch is None:
+                return
+            for slot in batch.slots:
+                self.ring.release(slot)
+            self._cond.notify_all()
+
+        if kind == "done":
+            _, _, arrays, elapsed = message
+            self.batches += 1
+            detections = [
+                Detections.from_array(
+                    rescale_boxes(boxes, model_shape[:2], display_shape),
+                    self.names,
+                )
+                for boxes, model_shape, display_shape in zip(
+                    arrays, batch.model_shapes, batch.display_shapes
+                )
+            ]
+            self._call(batch, detections, elapsed)
+        else:
+            print(f"[Workers] Worker {worker.index} failed a batch: {message[2]}")
+            self.failed_batches += 1
+            self._call(batch, None, 0.0)
+
+    def _call(self, batch: _Batch, detections, elapsed: float):
+        if batch.callback:
+            try:
+                batch.callback(detections, elapsed)
+            except Exception as e:
+                print(f"[Workers] Result callback error: {e}")
+
+    def _check_workers(self):
+        """Restart workers whose process exited"""
+        now = time.monotonic()
+        for worker in self.workers:
+            if worker.process.is_alive():
+                continue
+            if worker.restart_at is None:
+                print(
+                    f"[Workers] Worker {worker.index} exited with code "
+                    f"{worker.process.exitcode}, restarting"
+                )
+                with self._cond:
+                    worker.ready = False
+                # Results it sent before dying still count
+                while worker.conn.poll():
+                    try:
+                        self._handle(worker, worker.conn.recv())
+                    except (EOFError, OSError):
+                        break
+                self._fail_in_flight(worker)
+                worker.conn.close()
+                worker.conn = None
+                worker.restart_at = now + self.restart_delay
+            elif now >= worker.restart_at and self.running:
+                worker.restarts += 1
+                INFERENCE_WORKER_RESTARTS.inc()
+                self._spawn(worker)
+
+    def _fail_in_flight(self, worker: _Worker):
+        """Free the slots of a dead worker's batches and report them failed"""
+        with self._cond:
+            batches = list(worker.in_flight.values())
+            worker.in_flight.clear()
+            if self.ring:
+                for batch in batches:
+                    for slot in batch.slots:
+                        self.ring.release(slot)
+            self._cond.notify_all()
+        self.failed_batches += len(batches)
+        for batch in batches:
+            self._call(batch, None, 0.0)
+
+    def get_stats(self) -> dict:
+        with self._cond:
+            return {
+                "workers": self.worker_count,
+                "ready": sum(1 for worker in self.workers if worker.ready),
+                "in_flight": sum(len(worker.in_flight) for worker in self.workers),
+                "free_slots": self.ring.free if self.ring else 0,
+                "batches": self.batches,
+                "failed_batches": self.failed_batches,
+                "restarts": sum(worker.restarts for worker in self.workers),
+            }
@@ -0,0 +1,216 @@
+"""Low-Latency HLS Playlist Module
+
+In low-latency mode (HLS_LOW_LATENCY) FFmpegHLSEncoder writes every part as
+its own fMP4 fragment that starts with a keyframe, and lists the parts in
+ffmpeg's own playlist (parts.m3u8). LLHLSStream turns that list into an
+LL-HLS media playlist: HLS_SEGMENT_PARTS consecutive parts make a segment,
+segments near the live edge also list their parts (EXT-X-PART), and a
+preload hint names the part being encoded. A segment is served as the
+concatenation of its parts, which is valid fragmented MP4 after the shared
+init section.
+
+Clients can block a playlist reload until a part exists
+(_HLS_msn/_HLS_part) and request the hinted part before it is written, so a
+player follows the live edge with one round trip per part.
+"""
+
+import asyncio
+import math
+import os
+import time
+from dataclasses import dataclass
+
+import config
+
+# Playlist ffmpeg writes next to the parts
+PARTS_PLAYLIST = "parts.m3u8"
+# How often a blocked request checks for new parts
+POLL_SECONDS = 0.02
+
+
+@dataclass
+class Part:
+    """One fMP4 fragment written by ffmpeg"""
+
+    sequence: int
+    duration: float
+    path: str
+
+
+class LLHLSStream:
+    """LL-HLS view of the parts ffmpeg wrote for one camera"""
+
+    def __init__(self, directory: str, segment_parts: int = None):
+        """Initialize LL-HLS stream
+
+        Args:
+            directory: Directory with ffmpeg's parts playlist, init and parts
+            segment_parts: Parts per segment (default: config.HLS_SEGMENT_PARTS)
+        """
+        self.directory = directory
+        self.segment_parts = segment_parts or config.HLS_SEGMENT_PARTS
+        self.parts: dict[int, Part] = {}
+        self.init_path: str = None
+        self._mtime: int = None
+
+    def refresh(self):
+        """Re-read ffmpeg's playlist if it changed"""
+        path = os.path.join(self.directory, PARTS_PLAYLIST)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+            if mtime == self._mtime:
+                return
+            with open(path) as file:
+                text = file.read()
+        except OSError:
+            return
+        self._mtime = mtime
+        self._parse(text)
+
+    def _parse(self, text: str):
+        sequence = 0
+        duration = None
+        parts = {}
+        for line in text.splitlines():
+            line = line.strip()
+            if line.startswith("#EXT-X-MEDIA-SEQUENCE:"):
+                sequence = int(line.split(":", 1)[1])
+            elif line.startswith("#EXT-X-MAP:"):
+                uri = line.split('URI="', 1)[1].split('"', 1)[0]
+                self.init_path = os.path.join(self.directory, uri)
+            elif line.startswith("#EXTINF:"):
+                duration = float(line.split(":", 1)[1].split(",", 1)[0])
+            elif line and not line.startswith("#") and duration is not None:
+                parts[sequence] = Part(
+                    sequence, duration, os.path.join(self.directory, line)
+                )
+                sequence += 1
+                duration = None
+        self.parts = parts
+
+    @property
+    def last_sequence(self) -> int | None:
+        return max(self.parts) if self.parts else None
+
+    @property
+    def part_target(self) -> float:
+        """PART-TARGET: no part may be longer"""
+        longest = max((part.duration for part in self.parts.values()), default=0)
+        return math.ceil(max(longest, config.HLS_PART_DURATION) * 1000) / 1000
+
+    @property
+    def target_duration(self) -> int:
+        return math.ceil(self.part_target * self.segment_parts)
+
+    def segment(self, msn: int) -> list[Part] | None:
+        """Parts of a complete segment, or None"""
+        first = msn * self.segment_parts
+        parts = [self.parts.get(first + index) for index in range(self.segment_parts)]
+        return None if None in parts else parts
+
+    def has_part(self, msn: int, part: int = None) -> bool:
+        """Check whether a part (or, without part, the whole segment) exists"""
+        if part is None:
+            return self.segment(msn) is not None
+        return msn * self.segment_parts + part in self.parts
+
+    def next_msn(self) -> int:
+        """Sequence number of the segment being encoded"""
+        last = self.last_sequence
+        return 0 if last is None else (last + 1) // self.segment_parts
+
+    async def wait_for(self, check, timeout: float) -> bool:
+        """Poll ffmpeg's playlist until check() is true or timeout passes"""
+        deadline = time.monotonic() + timeout
+        while True:
+            self.refresh()
+            if check():
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(POLL_SECONDS)
+
+    def render(self) -> str:
+        """LL-HLS media playlist of the current parts"""
+        part_target = self.part_target
+        target_duration = self.target_duration
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:6",
+            f"#EXT-X-TARGETDURATION:{target_duration}",
+            (
+                "#EXT-X-SERVER-CONTROL:CAN-BLOCK-RELOAD=YES,"
+                f"PART-HOLD-BACK={3 * part_target:.3f}"
+            ),
+            f"#EXT-X-PART-INF:PART-TARGET={part_target:.3f}",
+        ]
+        last = self.last_sequence
+        if last is None:
+            return "\n".join(lines) + "\n"
+
+        open_msn = (last + 1) // self.segment_parts
+        # The oldest parts may belong to a segment that is already cut off
+        first_msn = -(-min(self.parts) // self.segment_parts)
+        segments = [
+            (msn, self.segment(msn))
+            for msn in range(first_msn, open_msn)
+            if self.segment(msn)
+        ]
+        lines += [
+            f"#EXT-X-MEDIA-SEQUENCE:{segments[0][0] if segments else open_msn}",
+            "#EXT-X-INDEPENDENT-SEGMENTS",
+            '#EXT-X-MAP:URI="ll/init.mp4"',
+        ]
+
+        # Parts are listed for the last three target durations only
+        listed_from = open_msn
+        remaining = 3 * target_duration
+        for msn, parts in reversed(segments):
+            remaining -= sum(part.duration for part in parts)
+            if remaining < 0:
+                break
+            listed_from = msn
+
+        for msn, parts in segments:
+            if msn >= listed_from:
+                lines += [self._part_line(part) for part in parts]
+            lines += [
+                f"#EXTINF:{sum(part.duration for part in parts):.3f},",
+                f"ll/seg{msn}.m4s",
+            ]
+        lines += [
+            self._part_line(self.parts[sequence])
+            for sequence in range(open_msn * self.segment_parts, last + 1)
+        ]
+        lines.append(f'#EXT-X-PRELOAD-HINT:TYPE=PART,URI="ll/part{last + 1}.m4s"')
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _part_line(part: Part) -> str:
+        return (
+            f"#EXT-X-PART:DURATION={part.duration:.3f},"
+            f'URI="ll/part{part.sequence}.m4s",INDEPENDENT=YES'
+        )
+
+    def read_part(self, sequence: int) -> bytes | None:
+        part = self.parts.get(sequence)
+        return _read_files([part.path]) if part else None
+
+    def read_segment(self, msn: int) -> bytes | None:
+        parts = self.segment(msn)
+        return _read_files([part.path for part in parts]) if parts else None
+
+    def read_init(self) -> bytes | None:
+        return _read_files([self.init_path]) if self.init_path else None
+
+
+def _read_files(paths: list[str]) -> bytes | None:
+    """Contents of the files in order, or None if ffmpeg deleted one"""
+    try:
+        chunks = []
+        for path in paths:
+            with open(path, "rb") as file:
+                chunks.append(file.read())
+        return b"".join(chunks)
+    except OSError:
+        return None
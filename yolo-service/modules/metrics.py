@@ -0,0 +1,367 @@
+"""Prometheus Metrics Module
+
+Counters and histograms are recorded into per-thread shards: the hot path
+only touches a dict owned by its own thread, so recording takes no lock and
+threads never contend. A scrape merges the shards of all threads and renders
+the Prometheus text exposition format.
+"""
+
+import threading
+from bisect import bisect_left
+from typing import Callable
+
+# Latency buckets in seconds, 1 ms to 10 s
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+# Outage buckets in seconds, 0.5 s to 5 min
+RECONNECT_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    """Render {name="value",...} with Prometheus label escaping"""
+    pairs = [
+        f'{name}="{escape_label_value(value)}"' for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def escape_label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_value(value: float) -> str:
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _ShardedMetric:
+    """Base for metrics whose series live in one dict per recording thread"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: list[dict] = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        """This thread's series; the lock is only taken on a thread's first use"""
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+            return shard
+
+    def _check_labels(self, labels: tuple):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, got {labels}"
+            )
+
+    def _snapshots(self) -> list[list[tuple]]:
+        """Copies of every shard's (labels, value) items"""
+        with self._shards_lock:
+            shards = list(self._shards)
+        return [list(shard.items()) for shard in shards]
+
+    def remove(self, *labels):
+        """Forget a series, e.g. of a client that disconnected"""
+        labels = tuple(str(label) for label in labels)
+        with self._shards_lock:
+            for shard in self._shards:
+                shard.pop(labels, None)
+
+    def collect(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self.collect(),
+        ]
+
+
+class Counter(_ShardedMetric):
+    """Monotonic counter, e.g. frames decoded per camera"""
+
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        """Add amount to the series of the given label values"""
+        labels = tuple(str(label) for label in labels)
+        shard = self._shard()
+        if labels not in shard:
+            self._check_labels(labels)
+            shard[labels] = 0
+        shard[labels] += amount
+
+    def get(self, *labels) -> float:
+        """Current total of one series over all threads"""
+        labels = tuple(str(label) for label in labels)
+        return sum(dict(items).get(labels, 0) for items in self._snapshots())
+
+    def collect(self) -> list[str]:
+        totals: dict[tuple, float] = {}
+        for items in self._snapshots():
+            for labels, value in items:
+                totals[labels] = totals.get(labels, 0) + value
+        return [
+            f"{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}"
+            for labels, value in sorted(totals.items())
+        ]
+
+
+class Histogram(_ShardedMetric):
+    """Latency distribution with fixed buckets"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple = (),
+        buckets: tuple = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels):
+        """Record one measurement for the series of the given label values"""
+        labels = tuple(str(label) for label in labels)
+        shard = self._shard()
+        series = shard.get(labels)
+        if series is None:
+            self._check_labels(labels)
+            # One count per bucket plus +Inf, then the sum
+            series = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def collect(self) -> list[str]:
+        merged: dict[tuple, list] = {}
+        for items in self._snapshots():
+            for labels, series in items:
+                total = merged.setdefault(labels, [0] * len(series))
+                for index, value in enumerate(list(series)):
+                    total[index] += value
+
+        lines = []
+        for labels, series in sorted(merged.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), series[:-1]):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(
+                    f"{self.name}_bucket"
+                    f"{format_labels(self.labelnames, labels, le)} {cumulative}"
+                )
+            label_text = format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {format_value(series[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class GaugeFunc:
+    """Gauge read from a callback at scrape time, e.g. queue depths
+
+    The callback returns a number, or {label values tuple: number}.
+    """
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        read: Callable[[], float | dict],
+        labelnames: tuple = (),
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+        self.labelnames = tuple(labelnames)
+
+    def collect(self) -> list[str]:
+        values = self.read()
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [
+            f"{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}"
+            for labels, value in values.items()
+        ]
+
+    def render(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self.collect(),
+        ]
+
+
+class CounterFunc(GaugeFunc):
+    """Counter read from a callback at scrape time, e.g. process CPU seconds"""
+
+    kind = "counter"
+
+
+class MetricsRegistry:
+    """The metrics served at /metrics"""
+
+    def __init__(self):
+        self._metrics: dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Add a metric; registering the same name again replaces it"""
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames=(),
+        buckets: tuple = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(
+        self, name: str, documentation: str, read: Callable, labelnames=()
+    ) -> GaugeFunc:
+        return self.register(GaugeFunc(name, documentation, read, labelnames))
+
+    def counter_func(
+        self, name: str, documentation: str, read: Callable, labelnames=()
+    ) -> CounterFunc:
+        return self.register(CounterFunc(name, documentation, read, labelnames))
+
+    def render(self, names: set = None) -> str:
+        """All metrics (or only the named ones) in the text exposition format"""
+        with self._lock:
+            metrics = [
+                metric
+                for name, metric in self._metrics.items()
+                if names is None or name in names
+            ]
+        lines = []
+        for metric in metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                print(f"[Metrics] Could not collect {metric.name}: {e}")
+        return "\n".join(lines) + "\n"
+
+
+def without_families(text: str, names: set) -> str:
+    """Drop the named metric families from exposition text rendered here"""
+    lines = []
+    skip = False
+    for line in text.splitlines():
+        if line.startswith("# HELP "):
+            skip = line.split(" ", 3)[2] in names
+        if not skip:
+            lines.append(line)
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+registry = MetricsRegistry()
+
+FRAME_READ_SECONDS = registry.histogram(
+    "yolo_frame_read_seconds",
+    "Time to read one decoded frame from the camera source",
+    ("camera",),
+)
+INFERENCE_SECONDS = registry.histogram(
+    "yolo_inference_seconds", "Model time per inference batch"
+)
+PLOT_SECONDS = registry.histogram(
+    "yolo_plot_seconds", "Time to draw the detections onto a frame", ("camera",)
+)
+JPEG_ENCODE_SECONDS = registry.histogram(
+    "yolo_jpeg_encode_seconds",
+    "Time to JPEG-encode a frame for one /stream variant",
+    ("camera",),
+)
+HLS_WRITE_SECONDS = registry.histogram(
+    "yolo_hls_write_seconds",
+    "Time to write a frame to the HLS encoder",
+    ("camera",),
+)
+VIOLATION_SUBMIT_SECONDS = registry.histogram(
+    "yolo_violation_submit_seconds",
+    "Duration of one violation upload to the backend",
+    ("outcome",),
+)
+STREAM_RECONNECT_SECONDS = registry.histogram(
+    "yolo_stream_reconnect_seconds",
+    "Time from losing a camera stream to its next frame",
+    ("camera",),
+    buckets=RECONNECT_BUCKETS,
+)
+EVENT_LOOP_LAG_SECONDS = registry.histogram(
+    "yolo_event_loop_lag_seconds",
+    "How late the HTTP server's event loop woke up from a timed sleep",
+)
+FRAMES_DECODED = registry.counter(
+    "yolo_frames_decoded_total", "Frames decoded from the source", ("camera",)
+)
+FRAMES_INFERRED = registry.counter(
+    "yolo_frames_inferred_total", "Frames the model ran on", ("camera",)
+)
+FRAMES_DROPPED = registry.counter(
+    "yolo_frames_dropped_total",
+    "Frames dropped by a full hand-off buffer",
+    ("buffer",),
+)
+SSE_BYTES_SENT = registry.counter(
+    "yolo_sse_bytes_sent_total", "Bytes streamed to /stream clients", ("camera",)
+)
+SSE_CLIENT_BYTES_SENT = registry.counter(
+    "yolo_sse_client_bytes_sent_total",
+    "Bytes streamed to each connected /stream client",
+    ("camera", "client"),
+)
+STREAM_RECONNECTS = registry.counter(
+    "yolo_stream_reconnects_total",
+    "Camera streams lost, by reason (eof, stall, error, start_failed)",
+    ("camera", "reason"),
+)
+INFERENCE_WORKER_RESTARTS = registry.counter(
+    "yolo_inference_worker_restarts_total",
+    "Inference worker processes restarted after they exited",
+)
+VIOLATION_SUBMITS = registry.counter(
+    "yolo_violation_submits_total",
+    "Violation uploads by outcome (sent, retry, rejected)",
+    ("outcome",),
+)
@@ -0,0 +1,114 @@
+"""Motion Gate Module - Skip Inference on Static Scenes"""
+
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """Cheap per-camera change detector placed in front of the model
+
+    Each frame is reduced to a tiny blurred grayscale thumbnail and compared
+    with the thumbnail of the last frame that went through the model. The
+    model is skipped while the share of changed pixels stays below the
+    threshold, but never for longer than max_skip_seconds.
+    """
+
+    def __init__(
+        self,
+        thumbnail_width: int = 64,
+        pixel_threshold: int = 25,
+        change_threshold: float = 0.01,
+        max_skip_seconds: float = 5.0,
+    ):
+        """Initialize motion gate
+
+        Args:
+            thumbnail_width: Width of the grayscale thumbnail that is compared
+            pixel_threshold: Gray level difference (0-255) that counts as change
+            change_threshold: Share of changed pixels (0-1) that counts as motion
+            max_skip_seconds: Run the model at least this often per camera
+        """
+        self.thumbnail_width = thumbnail_width
+        self.pixel_threshold = pixel_threshold
+        self.change_threshold = change_threshold
+        self.max_skip_seconds = max_skip_seconds
+
+        self._lock = threading.Lock()
+        self._references: dict[str, np.ndarray] = {}
+        self._reference_times: dict[str, float] = {}
+        self.checked_frames = 0
+        self.skipped_frames = 0
+        self.forced_frames = 0
+        self.gate_seconds = 0.0
+
+    def _thumbnail(self, frame: np.ndarray) -> np.ndarray:
+        height, width = frame.shape[:2]
+        thumbnail_height = max(1, round(height * self.thumbnail_width / width))
+        small = cv2.resize(
+            frame,
+            (self.thumbnail_width, thumbnail_height),
+            interpolation=cv2.INTER_NEAREST,
+        )
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(gray, (3, 3), 0)
+
+    def has_changed(self, camera_code: str, frame: np.ndarray) -> bool:
+        """Check whether a frame differs enough from the last inferred one
+
+        A True result makes the frame the new reference, since the caller is
+        expected to run the model on it.
+
+        Args:
+            camera_code: Camera the frame belongs to
+            frame: Frame (height, width, 3)
+
+        Returns:
+            True if the model should run on this frame
+        """
+        started = time.perf_counter()
+        thumbnail = self._thumbnail(frame)
+        now = time.monotonic()
+
+        with self._lock:
+            self.checked_frames += 1
+            reference = self._references.get(camera_code)
+
+            if reference is None or reference.shape != thumbnail.shape:
+                changed = True
+            elif now - self._reference_times[camera_code] >= self.max_skip_seconds:
+                changed = True
+                self.forced_frames += 1
+            else:
+                difference = cv2.absdiff(thumbnail, reference)
+                changed_share = (
+                    np.count_nonzero(difference > self.pixel_threshold)
+                    / difference.size
+                )
+                changed = changed_share >= self.change_threshold
+
+            if changed:
+                self._references[camera_code] = thumbnail
+                self._reference_times[camera_code] = now
+            else:
+                self.skipped_frames += 1
+
+            self.gate_seconds += time.perf_counter() - started
+
+        return changed
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            average_ms = (
+                self.gate_seconds / self.checked_frames * 1000
+                if self.checked_frames
+                else 0.0
+            )
+            return {
+                "checked_frames": self.checked_frames,
+                "skipped_frames": self.skipped_frames,
+                "forced_frames": self.forced_frames,
+                "average_gate_ms": round(average_ms, 3),
+            }
@@ -0,0 +1,161 @@
+"""Detection Overlay Rendering Module"""
+
+import threading
+
+import cv2
+import numpy as np
+
+from .detections import Detections
+
+
+# Class colours (RGB hex), the same cycle the Ultralytics plotter uses
+PALETTE = (
+    "042AFF",
+    "0BDBEB",
+    "F3F3F3",
+    "00DFB7",
+    "111F68",
+    "FF6FDD",
+    "FF444F",
+    "CCED00",
+    "00F344",
+    "BD00FF",
+    "00B4FF",
+    "DD00BA",
+    "00FFFF",
+    "26C000",
+    "01FFB3",
+    "7D24FF",
+    "7B0068",
+    "FF1B6C",
+    "FC6D2F",
+    "A2FF0B",
+)
+
+
+def hex_to_bgr(color: str) -> tuple[int, int, int]:
+    return int(color[4:6], 16), int(color[2:4], 16), int(color[0:2], 16)
+
+
+class OverlayRenderer:
+    """Draw detection boxes and labels onto frames with plain OpenCV
+
+    Every label ("name 0.87" on the class colour) is rasterised once and
+    cached as a small sprite; drawing a frame is then one copy into the
+    output buffer, a cv2.rectangle per box and a slice assignment per label.
+    """
+
+    def __init__(
+        self,
+        names: dict,
+        line_width: int = 2,
+        font_scale: float = 0.5,
+        max_sprites: int = 4096,
+    ):
+        """Initialize overlay renderer
+
+        Args:
+            names: Class id -> class name of the model
+            line_width: Box line width in pixels
+            font_scale: OpenCV font scale of the labels
+            max_sprites: Cached label sprites before the cache is cleared
+        """
+        self.names = names
+        self.line_width = line_width
+        self.font_scale = font_scale
+        self.max_sprites = max_sprites
+        self.colors = {
+            class_id: hex_to_bgr(PALETTE[class_id % len(PALETTE)]) for class_id in names
+        }
+        self._sprites: dict[tuple[int, int], np.ndarray] = {}
+        self._lock = threading.Lock()
+        self.rendered_frames = 0
+
+    def _sprite(self, class_id: int, confidence: float) -> np.ndarray:
+        """Label image for a class and a confidence rounded to two decimals"""
+        key = (class_id, int(round(confidence * 100)))
+        sprite = self._sprites.get(key)
+        if sprite is not None:
+            return sprite
+
+        text = f"{self.names.get(class_id, class_id)} {key[1] / 100:.2f}"
+        font = cv2.FONT_HERSHEY_SIMPLEX
+        (text_width, text_height), baseline = cv2.getTextSize(
+            text, font, self.font_scale, 1
+        )
+        padding = 3
+        color = self.colors.get(class_id, (255, 255, 255))
+        sprite = np.empty(
+            (text_height + baseline + 2 * padding, text_width + 2 * padding, 3),
+            dtype=np.uint8,
+        )
+        sprite[:] = color
+        # Dark text on light colours, white text on dark ones
+        luminance = 0.114 * color[0] + 0.587 * color[1] + 0.299 * color[2]
+        text_color = (0, 0, 0) if luminance > 150 else (255, 255, 255)
+        cv2.putText(
+            sprite,
+            text,
+            (padding, padding + text_height),
+            font,
+            self.font_scale,
+            text_color,
+            1,
+            cv2.LINE_AA,
+        )
+
+        with self._lock:
+            if len(self._sprites) >= self.max_sprites:
+                self._sprites.clear()
+            self._sprites[key] = sprite
+        return sprite
+
+    def render(
+        self, frame: np.ndarray, detections: Detections, out: np.ndarray = None
+    ) -> np.ndarray:
+        """Draw detections onto a copy of a frame
+
+        Args:
+            frame: Source frame (height, width, 3), left untouched
+            detections: Detections of the frame
+            out: Buffer to draw into; reused if it has the frame's shape
+
+        Returns:
+            The annotated frame (out when it could be reused)
+        """
+        if out is None or out.shape != frame.shape or out.dtype != frame.dtype:
+            out = np.empty_like(frame)
+        np.copyto(out, frame)
+        self.rendered_frames += 1
+
+        if detections is None or not len(detections):
+            return out
+
+        height, width = frame.shape[:2]
+        boxes = detections.xyxy.round().astype(np.int32)
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, width - 1)
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, height - 1)
+
+        for (x1, y1, x2, y2), class_id, confidence in zip(
+            boxes.tolist(), detections.class_id.tolist(), detections.confidence.tolist()
+        ):
+            color = self.colors.get(class_id, (255, 255, 255))
+            cv2.rectangle(out, (x1, y1), (x2, y2), color, self.line_width)
+
+            sprite = self._sprite(class_id, confidence)
+            sprite_height, sprite_width = sprite.shape[:2]
+            # Above the box, or inside its top edge when there is no room
+            top = y1 - sprite_height if y1 >= sprite_height else y1
+            visible_height = min(sprite_height, height - top)
+            visible_width = min(sprite_width, width - x1)
+            out[top : top + visible_height, x1 : x1 + visible_width] = sprite[
+                :visible_height, :visible_width
+            ]
+
+        return out
+
+    def get_stats(self) -> dict:
+        return {
+            "rendered_frames": self.rendered_frames,
+            "label_sprites": len(self._sprites),
+        }
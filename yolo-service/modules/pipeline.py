@@ -0,0 +1,353 @@
+"""Stage-Parallel Pipeline Module
+
+Each pipeline stage runs in its own thread and hands its output to the next
+stage through a bounded HandoffBuffer, so capture, inference and encoding
+overlap and throughput approaches that of the slowest stage.
+"""
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from .detections import Detections
+from .metrics import FRAMES_DROPPED
+
+DROP_OLDEST = "drop_oldest"
+BLOCK = "block"
+
+
+@dataclass
+class FramePacket:
+    """A frame travelling through the pipeline together with its results"""
+
+    camera_code: str
+    index: int
+    frame: np.ndarray
+    captured_at: float
+    detections: Detections = None
+    release: Optional[Callable[[np.ndarray], None]] = None
+    # Downscaled copy decoded for the model (None = run it on frame)
+    inference_frame: np.ndarray = None
+    # Set once a later stage owns the packet (forwarded or queued by the
+    # stage for later); until then a failing stage releases its frames
+    handed_off: bool = False
+
+    @property
+    def model_frame(self) -> np.ndarray:
+        """Frame the model runs on"""
+        return self.frame if self.inference_frame is None else self.inference_frame
+
+    def release_frame(self):
+        """Hand the raw frames back to their pool once no stage reads them"""
+        frames = (self.frame, self.inference_frame)
+        self.frame = self.inference_frame = None
+        if self.release:
+            for frame in frames:
+                if frame is not None:
+                    self.release(frame)
+
+
+class HandoffBuffer:
+    """Bounded, thread-safe hand-off between two pipeline stages"""
+
+    def __init__(
+        self,
+        name: str,
+        capacity: int = 1,
+        policy: str = DROP_OLDEST,
+        condition: threading.Condition = None,
+        on_drop: Optional[Callable[[Any], None]] = None,
+    ):
+        """Initialize hand-off buffer
+
+        Args:
+            name: Buffer name used in stats
+            capacity: Maximum number of queued items (1 = single slot)
+            policy: DROP_OLDEST (live sources) or BLOCK (file replay)
+            condition: Condition shared with other buffers so that a consumer
+                can wait on several buffers at once (see wait_any)
+            on_drop: Optional callback receiving every dropped item
+        """
+        assert capacity >= 1, "capacity must be at least 1"
+        assert policy in (DROP_OLDEST, BLOCK), f"Unknown policy: {policy}"
+
+        self.name = name
+        self.capacity = capacity
+        self.policy = policy
+        self.on_drop = on_drop
+        self._items = deque()
+        self._cond = condition or threading.Condition()
+        self.closed = False
+        self.put_count = 0
+        self.dropped = 0
+
+    @property
+    def condition(self) -> threading.Condition:
+        return self._cond
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put(self, item: Any, timeout: float = None) -> bool:
+        """Hand an item to the next stage
+
+        With DROP_OLDEST a full buffer discards its oldest item; with BLOCK
+        the caller waits until the consumer frees a slot.
+
+        Args:
+            item: Item to hand off
+            timeout: Maximum seconds to block (BLOCK policy only)
+
+        Returns:
+            True if the item was queued, False on timeout or closed buffer
+        """
+        dropped_item = None
+        with self._cond:
+            if self.closed:
+                return False
+
+            if len(self._items) >= self.capacity:
+                if self.policy == DROP_OLDEST:
+                    dropped_item = self._items.popleft()
+                    self.dropped += 1
+                elif not self._cond.wait_for(
+                    lambda: len(self._items) < self.capacity or self.closed,
+                    timeout=timeout,
+                ):
+                    return False
+                elif self.closed:
+                    return False
+
+            self._items.append(item)
+            self.put_count += 1
+            self._cond.notify_all()
+
+        if dropped_item is not None:
+            FRAMES_DROPPED.inc(self.name)
+            if self.on_drop:
+                self.on_drop(dropped_item)
+        return True
+
+    def get(self, timeout: float = None) -> Any:
+        """Take the oldest item, waiting up to timeout seconds
+
+        Returns:
+            Item or None on timeout or when the buffer is closed and empty
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._items or self.closed, timeout=timeout)
+            return self._take()
+
+    def get_nowait(self) -> Any:
+        """Take the oldest item without waiting
+
+        Must be called while holding the buffer's condition when the buffer
+        shares its condition with others.
+
+        Returns:
+            Item or None if the buffer is empty
+        """
+        with self._cond:
+            return self._take()
+
+    def _take(self) -> Any:
+        if not self._items:
+            return None
+        item = self._items.popleft()
+        self._cond.notify_all()
+        return item
+
+    def close(self):
+        """Close the buffer and wake every waiting producer and consumer"""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def get_stats(self) -> dict:
+        return {
+            "depth": len(self._items),
+            "capacity": self.capacity,
+            "policy": self.policy,
+            "put": self.put_count,
+            "dropped": self.dropped,
+        }
+
+
+def wait_any(
+    buffers: list[HandoffBuffer], timeout: float = None
+) -> list[tuple[int, Any]]:
+    """Wait until at least one buffer has an item, then take one from each
+
+    All buffers must share the same condition.
+
+    Args:
+        buffers: Buffers to wait on
+        timeout: Maximum seconds to wait
+
+    Returns:
+        List of (buffer_index, item) for every buffer that had an item
+    """
+    if not buffers:
+        return []
+
+    condition = buffers[0].condition
+    with condition:
+        condition.wait_for(
+            lambda: (
+                any(len(buffer) for buffer in buffers)
+                or all(buffer.closed for buffer in buffers)
+            ),
+            timeout=timeout,
+        )
+        items = []
+        for index, buffer in enumerate(buffers):
+            item = buffer.get_nowait()
+            if item is not None:
+                items.append((index, item))
+        return items
+
+
+def release_unhandled(items):
+    """Release the frames of packets a failed stage did not hand off
+
+    Without this their pooled buffers would never return to the FramePool.
+    Releasing a packet twice is harmless, so packets a stage already
+    released itself are fine too.
+    """
+    for item in items:
+        if isinstance(item, FramePacket) and not item.handed_off:
+            item.release_frame()
+
+
+class PipelineStage:
+    """A pipeline stage running in a dedicated thread"""
+
+    def __init__(
+        self,
+        name: str,
+        process: Callable,
+        inboxes: list[HandoffBuffer],
+        batch: bool = False,
+        poll_timeout: float = 0.5,
+        latency_window: int = 256,
+    ):
+        """Initialize pipeline stage
+
+        Args:
+            name: Stage name used for the thread and stats
+            process: Called with each item (batch=False) or with a list of
+                (inbox_index, item) pairs (batch=True); it is responsible for
+                putting its results into the next stage's buffers
+            inboxes: Buffers this stage consumes; with several inboxes they
+                must share one condition
+            batch: Take one item from every ready inbox and process them together
+            poll_timeout: Seconds between checks of the running flag
+            latency_window: Recent process() durations kept for percentiles
+        """
+        self.name = name
+        self.process = process
+        self.inboxes = inboxes
+        self.batch = batch
+        self.poll_timeout = poll_timeout
+
+        self.running = False
+        self.thread = None
+        self.processed = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.latencies = deque(maxlen=latency_window)
+
+    def start(self):
+        """Start the stage thread"""
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: float = 5):
+        """Stop the stage thread"""
+        self.running = False
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=timeout)
+
+    def _run(self):
+        while self.running:
+            items = wait_any(self.inboxes, timeout=self.poll_timeout)
+            if not items:
+                if all(inbox.closed for inbox in self.inboxes):
+                    break
+                continue
+
+            started = time.perf_counter()
+            try:
+                if self.batch:
+                    self.process(items)
+                else:
+                    for _, item in items:
+                        self.process(item)
+                self.processed += len(items)
+            except Exception as e:
+                self.errors += 1
+                print(f"[Pipeline] {self.name} error: {e}")
+                release_unhandled(item for _, item in items)
+            elapsed = time.perf_counter() - started
+            self.busy_seconds += elapsed
+            self.latencies.append(elapsed)
+
+    def get_latency_ms(self, percentile: float = 95) -> float:
+        """Percentile of the recent process() durations in milliseconds"""
+        latencies = list(self.latencies)
+        if not latencies:
+            return 0.0
+        return round(float(np.percentile(latencies, percentile)) * 1000, 2)
+
+    def get_stats(self) -> dict:
+        return {
+            "processed": self.processed,
+            "errors": self.errors,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "p95_ms": self.get_latency_ms(95),
+        }
+
+
+class Pipeline:
+    """Collection of stages and the buffers between them"""
+
+    def __init__(self):
+        self.buffers: list[HandoffBuffer] = []
+        self.stages: list[PipelineStage] = []
+
+    def add_buffer(self, buffer: HandoffBuffer) -> HandoffBuffer:
+        self.buffers.append(buffer)
+        return buffer
+
+    def add_stage(self, stage: PipelineStage) -> PipelineStage:
+        self.stages.append(stage)
+        return stage
+
+    def get_stage(self, name: str) -> Optional[PipelineStage]:
+        return next((stage for stage in self.stages if stage.name == name), None)
+
+    def get_buffer(self, name: str) -> Optional[HandoffBuffer]:
+        return next((buffer for buffer in self.buffers if buffer.name == name), None)
+
+    def start(self):
+        """Start all stages"""
+        for stage in self.stages:
+            stage.start()
+
+    def stop(self):
+        """Close all buffers and stop all stages"""
+        for buffer in self.buffers:
+            buffer.close()
+        for stage in self.stages:
+            stage.stop()
+
+    def get_stats(self) -> dict:
+        return {
+            "stages": {stage.name: stage.get_stats() for stage in self.stages},
+            "buffers": {buffer.name: buffer.get_stats() for buffer in self.buffers},
+        }
@@ -0,0 +1,274 @@
+"""Shared-Memory Frame and Status Slots Module
+
+With HTTP_SERVER_PROCESS the FastAPI app runs in its own process(es), and
+the pipeline hands it what it serves through named shared memory blocks:
+the latest JPEG of every camera, and a snapshot of the SystemStatus and the
+metrics. Each block is a SeqlockSlot with a single writer: the sequence
+counter is odd while a write is in progress, and a reader retries when it
+saw an odd counter or the counter moved during its copy. Neither side ever
+waits for the other.
+
+Demand flows the other way: while a server process has /stream subscribers
+it stamps wanted_at into the camera's frame slot, and the pipeline only
+encodes a JPEG while that stamp is fresh.
+"""
+
+import hashlib
+import json
+import struct
+import threading
+import time
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable
+
+import cv2
+import numpy as np
+
+import config
+from .metrics import JPEG_ENCODE_SECONDS
+
+# Header layout: counters first, then float timestamps, data from HEADER_SIZE
+SEQ, LENGTH, CAPACITY = 0, 8, 16
+CAPTURED_AT, WANTED_AT, MIN_INTERVAL = 24, 32, 40
+HEADER_SIZE = 64
+U64 = struct.Struct("<Q")
+F64 = struct.Struct("<d")
+
+# A demand stamp older than this means nobody is watching
+DEMAND_SECONDS = 2.0
+
+
+def shared_memory_name(kind: str, key: str = "") -> str:
+    """Fixed block name for this service instance
+
+    Derived from the port so two instances on one host do not collide, and
+    kept short enough for macOS (31 characters).
+    """
+    digest = hashlib.sha1(key.encode()).hexdigest()[:8]
+    return f"yolo{config.PORT}_{kind}_{digest}"
+
+
+def open_shared_memory(name: str, size: int = 0) -> SharedMemory:
+    """Create (size > 0) or attach to a block
+
+    Server processes are spawned from the pipeline process and share its
+    resource tracker, so a block is unlinked by the pipeline on shutdown, or
+    by the tracker if the pipeline dies.
+    """
+    if not size:
+        return SharedMemory(name)
+    try:
+        return SharedMemory(name, create=True, size=size)
+    except FileExistsError:
+        # Left behind by a run that was killed along with its tracker
+        remove_shared_memory(name)
+        return SharedMemory(name, create=True, size=size)
+
+
+def remove_shared_memory(name: str):
+    """Unlink a block left behind by an earlier run, if there is one
+
+    Lets a server process that starts before the pipeline created its slots
+    wait for the new block instead of attaching to the stale one.
+    """
+    try:
+        stale = SharedMemory(name)
+    except FileNotFoundError:
+        return
+    stale.close()
+    stale.unlink()
+
+
+class SeqlockSlot:
+    """Latest value of one writer, readable from any process without locks"""
+
+    def __init__(self, shm: SharedMemory, owner: bool):
+        self.shm = shm
+        self.owner = owner
+        self.capacity = self._get_u64(CAPACITY)
+
+    @classmethod
+    def create(cls, name: str, capacity: int) -> "SeqlockSlot":
+        """Create the slot as its writer"""
+        shm = open_shared_memory(name, HEADER_SIZE + capacity)
+        shm.buf[:HEADER_SIZE] = bytes(HEADER_SIZE)
+        U64.pack_into(shm.buf, CAPACITY, capacity)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SeqlockSlot":
+        """Open an existing slot as a reader (FileNotFoundError if missing)"""
+        return cls(open_shared_memory(name), owner=False)
+
+    def _get_u64(self, offset: int) -> int:
+        return U64.unpack_from(self.shm.buf, offset)[0]
+
+    def _get_f64(self, offset: int) -> float:
+        return F64.unpack_from(self.shm.buf, offset)[0]
+
+    @property
+    def sequence(self) -> int:
+        return self._get_u64(SEQ)
+
+    def write(self, data, captured_at: float = 0.0) -> bool:
+        """Publish data (bytes or a uint8 buffer); False if it does not fit"""
+        length = len(data)
+        if length > self.capacity:
+            return False
+        buf = self.shm.buf
+        sequence = self._get_u64(SEQ)
+        U64.pack_into(buf, SEQ, sequence + 1)
+        buf[HEADER_SIZE : HEADER_SIZE + length] = data
+        U64.pack_into(buf, LENGTH, length)
+        F64.pack_into(buf, CAPTURED_AT, captured_at)
+        U64.pack_into(buf, SEQ, sequence + 2)
+        return True
+
+    def read(self, last_sequence: int = 0, retries: int = 8):
+        """Copy the latest value if it is newer than last_sequence
+
+        Returns:
+            (sequence, data, captured_at), or None when nothing new was
+            written (or the writer kept overwriting it during every retry)
+        """
+        buf = self.shm.buf
+        for _ in range(retries):
+            sequence = self._get_u64(SEQ)
+            if sequence == last_sequence or sequence == 0:
+                return None
+            if sequence % 2:
+                time.sleep(0)
+                continue
+            length = min(self._get_u64(LENGTH), self.capacity)
+            captured_at = self._get_f64(CAPTURED_AT)
+            data = bytes(buf[HEADER_SIZE : HEADER_SIZE + length])
+            if self._get_u64(SEQ) == sequence:
+                return sequence, data, captured_at
+        return None
+
+    def signal_demand(self, min_interval: float = 0.0):
+        """Reader side: ask the writer for frames, at most one per min_interval
+
+        With several server processes the last one to signal sets the
+        interval.
+        """
+        F64.pack_into(self.shm.buf, MIN_INTERVAL, min_interval)
+        F64.pack_into(self.shm.buf, WANTED_AT, time.time())
+
+    def demand(self) -> tuple[float, float]:
+        """Writer side: (wanted_at, min_interval) last signalled by a reader"""
+        return self._get_f64(WANTED_AT), self._get_f64(MIN_INTERVAL)
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class SharedFrameWriter:
+    """Pipeline side of a camera's frame slot
+
+    Stands in for the camera's StreamHub in publish_detections(): it encodes
+    a full-resolution JPEG only while a server process asks for frames, and
+    no faster than the fastest subscriber wants them.
+    """
+
+    def __init__(
+        self, camera_code: str, width: int, height: int, jpeg_quality: int = None
+    ):
+        """Create the frame slot of a camera
+
+        Args:
+            camera_code: Camera whose frames the slot carries
+            width: Frame width in pixels
+            height: Frame height in pixels
+            jpeg_quality: JPEG quality (default: config.SSE_JPEG_QUALITY)
+        """
+        self.camera_code = camera_code
+        self.jpeg_quality = jpeg_quality or config.SSE_JPEG_QUALITY
+        # A JPEG stays below the raw frame size; the margin covers the
+        # headers of very small frames
+        self.slot = SeqlockSlot.create(
+            shared_memory_name("frame", camera_code), width * height * 3 + 65536
+        )
+        self.published_at = 0.0
+        self.published = 0
+
+    def wants_frame(self) -> bool:
+        """Check whether a server process is due for a new frame"""
+        wanted_at, min_interval = self.slot.demand()
+        now = time.time()
+        return (
+            now - wanted_at < DEMAND_SECONDS and now - self.published_at >= min_interval
+        )
+
+    def publish_frame(self, frame: np.ndarray, captured_at: float = None) -> int:
+        """Encode a frame and make it the camera's latest frame
+
+        Returns:
+            1 if the frame was published, else 0
+        """
+        started = time.perf_counter()
+        ok, jpeg = cv2.imencode(
+            ".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), self.jpeg_quality]
+        )
+        JPEG_ENCODE_SECONDS.observe(time.perf_counter() - started, self.camera_code)
+        if not ok or not self.slot.write(jpeg.reshape(-1), captured_at or 0.0):
+            return 0
+        self.published_at = time.time()
+        self.published += 1
+        return 1
+
+    def close(self):
+        self.slot.close()
+
+
+class StatusPublisher:
+    """Pipeline side of the status slot: a JSON snapshot every interval"""
+
+    def __init__(
+        self,
+        collect: Callable[[], dict],
+        interval: float = None,
+        capacity: int = 4 * 1024 * 1024,
+    ):
+        """Create the status slot
+
+        Args:
+            collect: Returns the snapshot, e.g. {"status": ..., "metrics": ...}
+            interval: Seconds between snapshots (default: from config)
+            capacity: Largest snapshot in bytes
+        """
+        self.collect = collect
+        self.interval = interval or config.HTTP_STATUS_INTERVAL_SECONDS
+        self.slot = SeqlockSlot.create(shared_memory_name("status"), capacity)
+        self._stop = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.publish()
+        self.thread = threading.Thread(
+            target=self._run, name="status-publisher", daemon=True
+        )
+        self.thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=self.interval + 1)
+        self.slot.close()
+
+    def publish(self):
+        data = json.dumps(self.collect(), default=str).encode()
+        if not self.slot.write(data):
+            print(f"[Shared] Status snapshot of {len(data)} bytes does not fit")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.publish()
+            except Exception as e:
+                print(f"[Shared] Status snapshot error: {e}")
@@ -17,33 +17,61 @@ class SSEncoder:
         self.boundary = boundary
         self.jpeg_quality = jpeg_quality
     
-    def encode_frame(self, frame: np.ndarray) -> bytes:
+    def encode_frame(
+        self,
+        frame: np.ndarray,
+        width: int = None,
+        jpeg_quality: int = None,
+        timestamp: float = None,
+    ) -> bytes:
         """Encode frame as JPEG with multipart boundary markers
         
         Args:
             frame: numpy array (height, width, 3)
+            width: Optional output width; the frame is downscaled keeping its
+                aspect ratio (never upscaled)
+            jpeg_quality: Optional JPEG quality overriding the encoder default
+            timestamp: Optional capture time (epoch seconds) sent as an
+                X-Timestamp part header, so clients can measure frame age
         
         Returns:
             Encoded frame with boundary markers in multipart format:
             --boundary\r\n
             Content-Type: image/jpeg\r\n
             Content-Length: XXXX\r\n
+            [X-Timestamp: 1700000000.123456\r\n]
             \r\n
             [JPEG_DATA]\r\n
         """
+        if width and width < frame.shape[1]:
+            height = max(1, round(frame.shape[0] * width / frame.shape[1]))
+            frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+
         ret, jpeg_buffer = cv2.imencode(
             '.jpg', 
             frame, 
-            [int(cv2.IMWRITE_JPEG_QUALITY), self.jpeg_quality]
+            [int(cv2.IMWRITE_JPEG_QUALITY), jpeg_quality or self.jpeg_quality]
         )
         
         if not ret:
             return None
         
-        jpeg_data = jpeg_buffer.tobytes()
+        return self.frame_jpeg(jpeg_buffer.tobytes(), timestamp)
+    
+    def frame_jpeg(self, jpeg_data: bytes, timestamp: float = None) -> bytes:
+        """Wrap already encoded JPEG data in a multipart part
+        
+        Args:
+            jpeg_data: JPEG file contents
+            timestamp: Optional capture time (epoch seconds), see encode_frame()
         
+        Returns:
+            Multipart part in the format described in encode_frame()
+        """
         boundary_marker = f"--{self.boundary}\r\n".encode()
         content_type = b"Content-Type: image/jpeg\r\n"
-        content_length = f"Content-Length: {len(jpeg_data)}\r\n\r\n".encode()
+        headers = f"Content-Length: {len(jpeg_data)}\r\n".encode()
+        if timestamp is not None:
+            headers += f"X-Timestamp: {timestamp:.6f}\r\n".encode()
         
-        return boundary_marker + content_type + content_length + jpeg_data + b"\r\n"
+        return boundary_marker + content_type + headers + b"\r\n" + jpeg_data + b"\r\n"
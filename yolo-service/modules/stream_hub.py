@@ -0,0 +1,270 @@
+"""Stream Broadcast Hub Module - Multi-Client SSE Fan-Out"""
+
+import asyncio
+import threading
+import time
+from typing import AsyncIterator, Callable
+
+import cv2
+import numpy as np
+
+from .metrics import JPEG_ENCODE_SECONDS
+from .sse_encoder import SSEncoder
+
+
+class StreamVariant:
+    """One encoded rendition (width / JPEG quality) of a camera stream"""
+
+    def __init__(self, width: int = None, jpeg_quality: int = None):
+        """Initialize stream variant
+
+        Args:
+            width: Output width in pixels (None = source resolution)
+            jpeg_quality: JPEG quality (None = encoder default)
+        """
+        self.width = width
+        self.jpeg_quality = jpeg_quality
+        self.frame: bytes = None
+        self.sequence = 0
+        self.subscribers = 0
+        self.last_used = time.monotonic()
+        self.encoded_at = 0.0
+        self.frame_intervals: list[float] = []
+
+    def is_due(self, now: float) -> bool:
+        """Check whether the fastest subscriber is ready for a new frame"""
+        if not self.subscribers:
+            return False
+        min_interval = min(self.frame_intervals, default=0.0)
+        return now - self.encoded_at >= min_interval
+
+    @property
+    def key(self) -> tuple:
+        return self.width, self.jpeg_quality
+
+
+class StreamHub:
+    """Latest-frame slots shared by every /stream subscriber of one camera
+
+    The pipeline publishes each annotated frame once. The hub encodes it once
+    per variant that currently has subscribers, and no faster than the
+    fastest of them asked for (max fps), so viewers of the same variant share
+    one JPEG and nothing is encoded while nobody is watching.
+    Subscribers read the newest frame of their variant at their own pace: a
+    slow client skips straight to the latest frame instead of queueing old
+    ones, and never takes frames away from the other clients.
+    """
+
+    def __init__(self, camera_code: str, encoder: SSEncoder, idle_seconds: float = 10):
+        """Initialize stream hub
+
+        Args:
+            camera_code: Camera whose frames this hub broadcasts
+            encoder: SSE encoder used for every variant
+            idle_seconds: Seconds a variant without subscribers is kept before
+                it is evicted
+        """
+        self.camera_code = camera_code
+        self.encoder = encoder
+        self.idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        self.variants: dict[tuple, StreamVariant] = {}
+        self.sequence = 0
+        self.loop: asyncio.AbstractEventLoop = None
+        self._changed: asyncio.Event = None
+
+    def attach(self, loop: asyncio.AbstractEventLoop):
+        """Bind the hub to the server event loop that serves its subscribers"""
+        self.loop = loop
+        self._changed = asyncio.Event()
+
+    @property
+    def subscribers(self) -> int:
+        with self._lock:
+            return sum(variant.subscribers for variant in self.variants.values())
+
+    def has_subscribers(self) -> bool:
+        return self.subscribers > 0
+
+    def min_frame_interval(self) -> float:
+        """Shortest frame interval any subscriber asked for (0 = every frame)"""
+        with self._lock:
+            return min(
+                (
+                    interval
+                    for variant in self.variants.values()
+                    for interval in variant.frame_intervals
+                ),
+                default=0.0,
+            )
+
+    def wants_frame(self) -> bool:
+        """Check whether publish_frame() would encode anything right now
+
+        Lets the caller skip drawing frames nobody is going to see.
+        """
+        if not self.loop or self.loop.is_closed():
+            return False
+        now = time.monotonic()
+        with self._lock:
+            return any(variant.is_due(now) for variant in self.variants.values())
+
+    def publish_frame(self, frame: np.ndarray, captured_at: float = None) -> int:
+        """Encode a frame for every active variant and publish it
+
+        Safe to call from any thread; encoding runs in the caller's thread.
+
+        Args:
+            frame: Annotated frame (height, width, 3)
+            captured_at: Unix time the frame was captured, sent to clients as
+                the part's X-Timestamp header so they can measure frame age
+
+        Returns:
+            Number of variants encoded
+        """
+        return self._publish(
+            lambda variant: self.encoder.encode_frame(
+                frame, variant.width, variant.jpeg_quality, captured_at
+            )
+        )
+
+    def publish_jpeg(self, jpeg: bytes, captured_at: float = None) -> int:
+        """Publish a frame that arrives JPEG-encoded at the default quality
+
+        Used by the HTTP server process, which gets the pipeline's frames from
+        shared memory. The default variant sends the JPEG as it is; the other
+        variants decode it once and encode their own rendition.
+
+        Args:
+            jpeg: Full-resolution JPEG at config.SSE_JPEG_QUALITY
+            captured_at: Unix time the frame was captured
+
+        Returns:
+            Number of variants published
+        """
+        decoded = None
+
+        def encode(variant: StreamVariant) -> bytes:
+            nonlocal decoded
+            if variant.key == (None, None):
+                return self.encoder.frame_jpeg(jpeg, captured_at)
+            if decoded is None:
+                decoded = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+            return self.encoder.encode_frame(
+                decoded, variant.width, variant.jpeg_quality, captured_at
+            )
+
+        return self._publish(encode)
+
+    def _publish(self, encode: Callable[[StreamVariant], bytes]) -> int:
+        """Encode the current frame for every due variant and wake subscribers"""
+        if not self.loop or self.loop.is_closed():
+            return 0
+
+        with self._lock:
+            self._evict_idle_variants()
+            now = time.monotonic()
+            active = [v for v in self.variants.values() if v.is_due(now)]
+            if not active:
+                return 0
+            self.sequence += 1
+            sequence = self.sequence
+            for variant in active:
+                variant.encoded_at = now
+
+        encoded = []
+        for variant in active:
+            started = time.perf_counter()
+            data = encode(variant)
+            JPEG_ENCODE_SECONDS.observe(time.perf_counter() - started, self.camera_code)
+            encoded.append((variant, data))
+
+        with self._lock:
+            for variant, data in encoded:
+                if data:
+                    variant.frame = data
+                    variant.sequence = sequence
+
+        try:
+            self.loop.call_soon_threadsafe(self._notify)
+        except RuntimeError:
+            return 0
+        return len(encoded)
+
+    def _evict_idle_variants(self):
+        """Drop variants nobody has used for idle_seconds (caller holds lock)"""
+        now = time.monotonic()
+        for key, variant in list(self.variants.items()):
+            if variant.subscribers == 0 and now - variant.last_used > self.idle_seconds:
+                del self.variants[key]
+
+    def _notify(self):
+        """Wake all waiting subscribers (runs on the server loop)"""
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def _acquire_variant(
+        self, width: int = None, jpeg_quality: int = None, frame_interval: float = 0.0
+    ) -> StreamVariant:
+        key = (width, jpeg_quality)
+        with self._lock:
+            variant = self.variants.get(key)
+            if variant is None:
+                variant = StreamVariant(width, jpeg_quality)
+                self.variants[key] = variant
+            variant.subscribers += 1
+            variant.frame_intervals.append(frame_interval)
+            variant.last_used = time.monotonic()
+            return variant
+
+    def _release_variant(self, variant: StreamVariant, frame_interval: float):
+        with self._lock:
+            variant.subscribers -= 1
+            variant.frame_intervals.remove(frame_interval)
+            variant.last_used = time.monotonic()
+
+    def latest(self, variant: StreamVariant) -> tuple[int, bytes]:
+        """Return (sequence, frame) of the newest frame of a variant"""
+        with self._lock:
+            return variant.sequence, variant.frame
+
+    async def subscribe(
+        self,
+        width: int = None,
+        jpeg_quality: int = None,
+        max_fps: float = None,
+        timeout: float = 1.0,
+    ) -> AsyncIterator[bytes]:
+        """Yield every new frame of a variant, skipping to the newest when behind
+
+        Args:
+            width: Output width in pixels (None = source resolution)
+            jpeg_quality: JPEG quality (None = encoder default)
+            max_fps: Maximum frames per second delivered to this subscriber
+            timeout: Seconds between checks while no frame is published
+        """
+        min_interval = 1.0 / max_fps if max_fps else 0.0
+        variant = self._acquire_variant(width, jpeg_quality, min_interval)
+        last_sequence = 0
+        last_sent = 0.0
+        try:
+            while True:
+                if min_interval:
+                    wait = last_sent + min_interval - time.monotonic()
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+
+                sequence, frame = self.latest(variant)
+                if sequence > last_sequence and frame is not None:
+                    last_sequence = sequence
+                    last_sent = time.monotonic()
+                    yield frame
+                    continue
+
+                changed = self._changed
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    continue
+        finally:
+            self._release_variant(variant, min_interval)
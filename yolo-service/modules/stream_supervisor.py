@@ -0,0 +1,292 @@
+"""Stream Supervisor Module
+
+Keeps one camera's streamer (FFmpegStreamer or WebcamStreamer) delivering
+frames. A watchdog thread interrupts a read that has blocked for longer than
+the read timeout, e.g. a remote HLS source that stalls without closing the
+connection. A lost stream is restarted after a jittered exponential backoff,
+or replaced at once by a hot standby: a second streamer that is kept running
+and drained so it is connected and current when it is needed.
+"""
+
+import random
+import threading
+import time
+from collections import Counter
+from typing import Callable
+
+import config
+from .metrics import FRAME_READ_SECONDS, STREAM_RECONNECT_SECONDS, STREAM_RECONNECTS
+
+# A connection that delivered frames this long resets the backoff
+STABLE_SECONDS = 30.0
+
+
+class StandbyStreamer:
+    """A started streamer whose frames are read and discarded until needed"""
+
+    def __init__(self, streamer):
+        self.streamer = streamer
+        self.last_frame_at: float = None
+        self.failed = False
+        self._lock = threading.Lock()
+        self._draining = True
+        self.thread = threading.Thread(target=self._drain, daemon=True)
+
+    def start(self):
+        self.streamer.start()
+        self.last_frame_at = time.monotonic()
+        self.thread.start()
+
+    def _drain(self):
+        while True:
+            with self._lock:
+                if not self._draining:
+                    return
+                try:
+                    frame, inference_frame = self.streamer.get_frames()
+                except Exception:
+                    frame = inference_frame = None
+                if frame is None:
+                    self.failed = True
+                    return
+                self.last_frame_at = time.monotonic()
+            self.streamer.release_frame(frame)
+            self.streamer.release_frame(inference_frame)
+
+    def take(self, max_age: float):
+        """Stop draining and hand over the streamer
+
+        Returns:
+            The streamer, or None if it failed or stopped delivering frames
+        """
+        # The drain thread holds the lock for one read; a stalled standby
+        # keeps it longer than that
+        if not self._lock.acquire(timeout=1.0):
+            self.stop()
+            return None
+        try:
+            self._draining = False
+            if self.failed or time.monotonic() - self.last_frame_at > max_age:
+                self.streamer.stop()
+                return None
+            return self.streamer
+        finally:
+            self._lock.release()
+
+    def stop(self):
+        self._draining = False
+        self.streamer.interrupt()
+        self.streamer.stop()
+
+
+class StreamSupervisor:
+    """Connects, watches and reconnects the streamer of one camera"""
+
+    def __init__(
+        self,
+        camera_code: str,
+        create_streamer: Callable[[], object],
+        read_timeout: float = None,
+        backoff_base: float = None,
+        backoff_max: float = None,
+        hot_standby: bool = None,
+        on_status: Callable[[bool], None] = None,
+    ):
+        """Initialize stream supervisor
+
+        Args:
+            camera_code: Camera the stream belongs to (logs and metrics)
+            create_streamer: Returns a new, not yet started streamer
+            read_timeout: Seconds without a frame before the stream is
+                restarted (default: config.STREAM_READ_TIMEOUT_SECONDS)
+            backoff_base: First reconnect delay, doubled per failed attempt
+                (default: config.STREAM_RECONNECT_BASE_SECONDS)
+            backoff_max: Reconnect delay cap
+                (default: config.STREAM_RECONNECT_MAX_SECONDS)
+            hot_standby: Keep a second streamer running to swap in
+                (default: config.STREAM_HOT_STANDBY)
+            on_status: Optional callback(connected) on status change
+        """
+        self.camera_code = camera_code
+        self.create_streamer = create_streamer
+        self.read_timeout = read_timeout or config.STREAM_READ_TIMEOUT_SECONDS
+        self.backoff_base = backoff_base or config.STREAM_RECONNECT_BASE_SECONDS
+        self.backoff_max = backoff_max or config.STREAM_RECONNECT_MAX_SECONDS
+        self.hot_standby = (
+            config.STREAM_HOT_STANDBY if hot_standby is None else hot_standby
+        )
+        self.on_status = on_status
+
+        self.streamer = None
+        self.standby: StandbyStreamer = None
+        self.attempts = 0
+        self.connected_at: float = None
+        self.disconnected_at: float = None
+        self.reconnects = Counter()
+        self.standby_swaps = 0
+        self.last_reconnect_seconds: float = None
+        self._read_started: float = None
+        self._stalled = False
+        self._stopped = threading.Event()
+        self.watchdog = None
+
+    def start(self):
+        """Start the watchdog; streams are opened by get_frames()"""
+        self._stopped.clear()
+        self.watchdog = threading.Thread(
+            target=self._watch, name=f"watchdog-{self.camera_code}", daemon=True
+        )
+        self.watchdog.start()
+
+    def stop(self):
+        """Stop the watchdog and close the streams (unblocks get_frames)"""
+        self._stopped.set()
+        if self.standby:
+            self.standby.stop()
+            self.standby = None
+        streamer = self.streamer
+        if streamer:
+            streamer.interrupt()
+            streamer.stop()
+        if self.watchdog and self.watchdog.is_alive():
+            self.watchdog.join(timeout=5)
+
+    def get_frames(self) -> tuple:
+        """Read the next frames, reconnecting for as long as it takes
+
+        Returns:
+            (frame, inference_frame) like the streamer's get_frames(), or
+            (None, None) once stopped
+        """
+        while not self._stopped.is_set():
+            if self.streamer is None and not self._connect():
+                continue
+
+            reason = None
+            self._read_started = started = time.monotonic()
+            try:
+                frame, inference_frame = self.streamer.get_frames()
+            except Exception as e:
+                print(f"[Capture {self.camera_code}] Error: {e}")
+                frame = inference_frame = None
+                reason = "error"
+            finally:
+                self._read_started = None
+
+            if frame is not None:
+                FRAME_READ_SECONDS.observe(time.monotonic() - started, self.camera_code)
+                if self.disconnected_at is not None:
+                    self._record_reconnect()
+                return frame, inference_frame
+
+            if not self._stopped.is_set():
+                self._disconnect(reason or ("stall" if self._stalled else "eof"))
+        return None, None
+
+    def _connect(self) -> bool:
+        """Open the next stream: the standby if it is healthy, else a new one"""
+        streamer = None
+        if self.standby:
+            streamer = self.standby.take(self.read_timeout)
+            self.standby = None
+            if streamer:
+                self.standby_swaps += 1
+                print(f"[Capture {self.camera_code}] Switched to standby stream")
+
+        if streamer is None:
+            if self.attempts:
+                delay = min(
+                    self.backoff_max, self.backoff_base * 2 ** (self.attempts - 1)
+                ) * random.uniform(0.5, 1.0)
+                print(
+                    f"[Capture {self.camera_code}] Reconnecting in {delay:.1f} "
+                    f"seconds (attempt {self.attempts + 1})..."
+                )
+                if self._stopped.wait(delay):
+                    return False
+            self.attempts += 1
+            streamer = self.create_streamer()
+            try:
+                streamer.start()
+            except Exception as e:
+                print(f"[Capture {self.camera_code}] Could not start stream: {e}")
+                streamer.stop()
+                self._count_reconnect("start_failed")
+                return False
+
+        self.streamer = streamer
+        self.connected_at = time.monotonic()
+        self._set_status(True)
+        print(f"[Capture {self.camera_code}] Stream connected")
+        if self.hot_standby:
+            self._start_standby()
+        return True
+
+    def _start_standby(self):
+        standby = StandbyStreamer(self.create_streamer())
+        try:
+            standby.start()
+        except Exception as e:
+            print(f"[Capture {self.camera_code}] Could not start standby: {e}")
+            standby.stop()
+            return
+        self.standby = standby
+
+    def _disconnect(self, reason: str):
+        print(f"[Capture {self.camera_code}] Stream lost ({reason})")
+        self._count_reconnect(reason)
+        self._stalled = False
+        if time.monotonic() - self.connected_at >= STABLE_SECONDS:
+            self.attempts = 0
+        self.streamer.stop()
+        self.streamer = None
+        if self.disconnected_at is None:
+            self.disconnected_at = time.monotonic()
+        self._set_status(False)
+
+    def _count_reconnect(self, reason: str):
+        self.reconnects[reason] += 1
+        STREAM_RECONNECTS.inc(self.camera_code, reason)
+
+    def _record_reconnect(self):
+        """First frame after a disconnect: the outage is over"""
+        self.last_reconnect_seconds = time.monotonic() - self.disconnected_at
+        self.disconnected_at = None
+        STREAM_RECONNECT_SECONDS.observe(self.last_reconnect_seconds, self.camera_code)
+        print(
+            f"[Capture {self.camera_code}] Frames again after "
+            f"{self.last_reconnect_seconds:.1f}s"
+        )
+
+    def _set_status(self, connected: bool):
+        if self.on_status:
+            self.on_status(connected)
+
+    def _watch(self):
+        """Interrupt a read that has blocked for longer than read_timeout"""
+        interval = min(1.0, self.read_timeout / 4)
+        while not self._stopped.wait(interval):
+            started = self._read_started
+            streamer = self.streamer
+            if started is None or streamer is None:
+                continue
+            if time.monotonic() - started > self.read_timeout:
+                print(
+                    f"[Capture {self.camera_code}] No frame for "
+                    f"{self.read_timeout:.0f}s, restarting stream"
+                )
+                self._stalled = True
+                self._read_started = None
+                streamer.interrupt()
+
+    def get_stats(self) -> dict:
+        return {
+            "connected": self.streamer is not None,
+            "reconnects": dict(self.reconnects),
+            "connect_attempts": self.attempts,
+            "last_reconnect_seconds": round(self.last_reconnect_seconds, 2)
+            if self.last_reconnect_seconds is not None
+            else None,
+            "standby_ready": bool(self.standby and not self.standby.failed),
+            "standby_swaps": self.standby_swaps,
+        }
@@ -0,0 +1,192 @@
+"""Multi-Object Tracking Module"""
+
+import threading
+import time
+
+import numpy as np
+
+from .detections import Detections
+
+
+def box_iou(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU of two sets of xyxy boxes
+
+    Args:
+        boxes_a: (N, 4) boxes
+        boxes_b: (M, 4) boxes
+
+    Returns:
+        (N, M) IoU matrix
+    """
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    intersection = np.prod((bottom_right - top_left).clip(0), axis=2)
+    area_a = np.prod((boxes_a[:, 2:] - boxes_a[:, :2]).clip(0), axis=1)
+    area_b = np.prod((boxes_b[:, 2:] - boxes_b[:, :2]).clip(0), axis=1)
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return np.divide(
+        intersection, union, out=np.zeros_like(intersection), where=union > 0
+    )
+
+
+def greedy_match(scores: np.ndarray, threshold: float) -> list[tuple[int, int]]:
+    """Pair rows and columns by descending score, each used at most once"""
+    if not scores.size:
+        return []
+
+    rows, cols = np.nonzero(scores >= threshold)
+    order = np.argsort(-scores[rows, cols], kind="stable")
+    used_rows, used_cols, matches = set(), set(), []
+    for row, col in zip(rows[order].tolist(), cols[order].tolist()):
+        if row in used_rows or col in used_cols:
+            continue
+        used_rows.add(row)
+        used_cols.add(col)
+        matches.append((row, col))
+    return matches
+
+
+class IoUTracker:
+    """ByteTrack-style IoU tracker for the detections of one camera
+
+    Confident detections are matched to existing tracks of the same class
+    first; the remaining low-confidence detections may then only extend
+    tracks that are still unmatched, so a briefly uncertain box keeps its
+    track id. Only confident detections start new tracks, and tracks not
+    seen for max_age seconds are dropped. Frames the model skips keep the
+    tracks of their reused detections alive through keep_alive().
+    """
+
+    def __init__(
+        self,
+        iou_threshold: float = 0.3,
+        high_confidence: float = 0.5,
+        max_age: float = 2.0,
+    ):
+        """Initialize tracker
+
+        Args:
+            iou_threshold: Minimum IoU between a track and a detection to match
+            high_confidence: Confidence needed to start a track or match first
+            max_age: Seconds a track survives without a matching detection
+        """
+        self.iou_threshold = iou_threshold
+        self.high_confidence = high_confidence
+        self.max_age = max_age
+
+        self._next_id = 1
+        self.track_ids = np.zeros(0, dtype=np.int64)
+        self.boxes = np.zeros((0, 4), dtype=np.float32)
+        self.class_ids = np.zeros(0, dtype=np.int32)
+        self.last_seen = np.zeros(0, dtype=np.float64)
+
+    @property
+    def total_tracks(self) -> int:
+        return self._next_id - 1
+
+    def update(self, detections: Detections, now: float = None) -> Detections:
+        """Associate the detections of a new frame with the existing tracks
+
+        Args:
+            detections: Model detections of the frame
+            now: Timestamp of the frame (defaults to time.monotonic())
+
+        Returns:
+            The detections with track_id set (-1 for unconfirmed low-confidence
+            boxes that matched no track)
+        """
+        now = time.monotonic() if now is None else now
+        alive = now - self.last_seen <= self.max_age
+        self.track_ids = self.track_ids[alive]
+        self.boxes = self.boxes[alive]
+        self.class_ids = self.class_ids[alive]
+        self.last_seen = self.last_seen[alive]
+
+        assigned = np.full(len(detections), -1, dtype=np.int64)
+        unmatched_tracks = np.ones(len(self.track_ids), dtype=bool)
+        confident = detections.confidence >= self.high_confidence
+
+        for stage in (confident, ~confident):
+            candidates = np.flatnonzero(stage)
+            tracks = np.flatnonzero(unmatched_tracks)
+            if not len(candidates) or not len(tracks):
+                continue
+
+            scores = box_iou(detections.xyxy[candidates], self.boxes[tracks])
+            same_class = (
+                detections.class_id[candidates][:, None]
+                == self.class_ids[tracks][None, :]
+            )
+            scores[~same_class] = 0.0
+            for row, col in greedy_match(scores, self.iou_threshold):
+                detection, track = candidates[row], tracks[col]
+                assigned[detection] = self.track_ids[track]
+                self.boxes[track] = detections.xyxy[detection]
+                self.last_seen[track] = now
+                unmatched_tracks[track] = False
+
+        new = np.flatnonzero((assigned < 0) & confident)
+        if len(new):
+            new_ids = np.arange(self._next_id, self._next_id + len(new))
+            self._next_id += len(new)
+            assigned[new] = new_ids
+            self.track_ids = np.concatenate([self.track_ids, new_ids])
+            self.boxes = np.concatenate([self.boxes, detections.xyxy[new]])
+            self.class_ids = np.concatenate([self.class_ids, detections.class_id[new]])
+            self.last_seen = np.concatenate([self.last_seen, np.full(len(new), now)])
+
+        return detections.with_track_ids(assigned)
+
+    def keep_alive(self, detections: Detections, now: float = None):
+        """Refresh the tracks of detections reused on a frame the model skipped
+
+        A frame held by the motion gate or propagated by the scheduler still
+        shows its tracks, so they must not age out however long the model is
+        skipped; propagated boxes also move the tracks along.
+
+        Args:
+            detections: Reused detections of the frame (with track_id)
+            now: Timestamp of the frame (defaults to time.monotonic())
+        """
+        if detections is None or detections.track_id is None:
+            return
+        now = time.monotonic() if now is None else now
+        positions = {track_id: i for i, track_id in enumerate(self.track_ids.tolist())}
+        for detection, track_id in enumerate(detections.track_id.tolist()):
+            track = positions.get(track_id)
+            if track is not None:
+                self.boxes[track] = detections.xyxy[detection]
+                self.last_seen[track] = now
+
+
+class TrackerBank:
+    """One IoUTracker per camera, created on first use"""
+
+    def __init__(self, **tracker_options):
+        self.tracker_options = tracker_options
+        self._trackers: dict[str, IoUTracker] = {}
+        self._lock = threading.Lock()
+
+    def update(self, camera_code: str, detections: Detections) -> Detections:
+        with self._lock:
+            tracker = self._trackers.get(camera_code)
+            if tracker is None:
+                tracker = IoUTracker(**self.tracker_options)
+                self._trackers[camera_code] = tracker
+        return tracker.update(detections)
+
+    def keep_alive(self, camera_code: str, detections: Detections):
+        with self._lock:
+            tracker = self._trackers.get(camera_code)
+        if tracker:
+            tracker.keep_alive(detections)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                camera_code: {
+                    "active_tracks": len(tracker.track_ids),
+                    "total_tracks": tracker.total_tracks,
+                }
+                for camera_code, tracker in self._trackers.items()
+            }
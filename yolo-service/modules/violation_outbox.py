@@ -0,0 +1,278 @@
+"""Violation Outbox Module - Durable Queue for Backend Submissions"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+
+@dataclass
+class OutboxEntry:
+    """A violation report waiting to be delivered"""
+
+    id: int
+    idempotency_key: str
+    camera_code: str
+    violation_details: list[dict]
+    notes: str
+    image_path: str
+    created_at: float
+    attempts: int
+
+
+class ViolationOutbox:
+    """Disk-backed outbox of violation reports
+
+    Every report is written to SQLite (WAL mode) and its evidence JPEG to
+    evidence_dir before the first send attempt, so backend outages and
+    process restarts do not lose violations. Entries stay until they are
+    delivered, dropped as undeliverable, or pushed out by the size/age caps.
+    Each entry carries an idempotency key that is sent with every attempt,
+    so a retry after a lost response does not create a duplicate.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        evidence_dir: str,
+        max_items: int = 1000,
+        max_age_seconds: float = 7 * 24 * 3600,
+    ):
+        """Initialize outbox
+
+        Args:
+            path: SQLite database file
+            evidence_dir: Directory for the evidence images
+            max_items: Maximum queued reports; the oldest are dropped first
+            max_age_seconds: Reports older than this are dropped undelivered
+        """
+        self.path = path
+        self.evidence_dir = evidence_dir
+        self.max_items = max_items
+        self.max_age_seconds = max_age_seconds
+
+        os.makedirs(evidence_dir, exist_ok=True)
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS violations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                idempotency_key TEXT NOT NULL UNIQUE,
+                camera_code TEXT NOT NULL,
+                violation_details TEXT NOT NULL,
+                notes TEXT,
+                image_path TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                last_error TEXT
+            )
+            """
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS violations_due ON violations (next_attempt_at)"
+        )
+        self._db.commit()
+
+        self.sent = 0
+        self.failed_attempts = 0
+        self.dropped = 0
+
+    def add(
+        self,
+        frame: np.ndarray,
+        camera_code: str,
+        violation_details: list[dict],
+        notes: str = None,
+    ) -> str:
+        """Persist a violation report and its evidence image
+
+        Args:
+            frame: Evidence image
+            camera_code: Camera that detected the violation
+            violation_details: Detail objects as sent to the backend
+            notes: Optional notes
+
+        Returns:
+            Idempotency key of the new entry
+        """
+        key = uuid.uuid4().hex
+        image_path = os.path.join(self.evidence_dir, f"{key}.jpg")
+        if not cv2.imwrite(image_path, frame):
+            raise OSError(f"Could not write evidence image {image_path}")
+
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                """
+                INSERT INTO violations (idempotency_key, camera_code,
+                    violation_details, notes, image_path, created_at,
+                    next_attempt_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    key,
+                    camera_code,
+                    json.dumps(violation_details),
+                    notes,
+                    image_path,
+                    now,
+                    now,
+                ),
+            )
+            self._db.commit()
+            self._enforce_caps(now)
+        return key
+
+    def claim(
+        self, limit: int, lease_seconds: float, now: float = None
+    ) -> list[OutboxEntry]:
+        """Take the oldest due entries for delivery
+
+        Claimed entries are not due again until the lease runs out, so they
+        are not handed out twice while in flight; after a crash they simply
+        become due again.
+
+        Args:
+            limit: Maximum entries to return
+            lease_seconds: How long the caller has to report the outcome
+            now: Current time (defaults to time.time())
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            rows = self._db.execute(
+                """
+                SELECT id, idempotency_key, camera_code, violation_details,
+                    notes, image_path, created_at, attempts
+                FROM violations WHERE next_attempt_at <= ?
+                ORDER BY next_attempt_at, id LIMIT ?
+                """,
+                (now, limit),
+            ).fetchall()
+            self._db.executemany(
+                "UPDATE violations SET next_attempt_at = ? WHERE id = ?",
+                [(now + lease_seconds, row[0]) for row in rows],
+            )
+            self._db.commit()
+        return [
+            OutboxEntry(
+                id=row[0],
+                idempotency_key=row[1],
+                camera_code=row[2],
+                violation_details=json.loads(row[3]),
+                notes=row[4],
+                image_path=row[5],
+                created_at=row[6],
+                attempts=row[7],
+            )
+            for row in rows
+        ]
+
+    def next_attempt_at(self) -> float | None:
+        """Time the earliest entry becomes due, or None if the outbox is empty"""
+        with self._lock:
+            (next_attempt,) = self._db.execute(
+                "SELECT MIN(next_attempt_at) FROM violations"
+            ).fetchone()
+        return next_attempt
+
+    def mark_sent(self, entry: OutboxEntry):
+        """Remove a delivered entry and its image"""
+        self._delete([entry.id], [entry.image_path])
+        with self._lock:
+            self.sent += 1
+
+    def mark_failed(self, entry: OutboxEntry, error: str, retry_at: float):
+        """Record a failed attempt and schedule the next one"""
+        with self._lock:
+            self._db.execute(
+                """
+                UPDATE violations SET attempts = attempts + 1,
+                    next_attempt_at = ?, last_error = ?
+                WHERE id = ?
+                """,
+                (retry_at, error[:500], entry.id),
+            )
+            self._db.commit()
+            self.failed_attempts += 1
+
+    def drop(self, entry: OutboxEntry):
+        """Remove an entry the backend will never accept"""
+        self._delete([entry.id], [entry.image_path])
+        with self._lock:
+            self.dropped += 1
+
+    def _delete(self, ids: list[int], image_paths: list[str]):
+        with self._lock:
+            self._db.executemany(
+                "DELETE FROM violations WHERE id = ?", [(id_,) for id_ in ids]
+            )
+            self._db.commit()
+        for image_path in image_paths:
+            try:
+                os.remove(image_path)
+            except FileNotFoundError:
+                pass
+
+    def _enforce_caps(self, now: float):
+        """Drop entries beyond max_items or max_age_seconds (caller holds lock)"""
+        rows = self._db.execute(
+            """
+            SELECT id, image_path FROM violations
+            WHERE created_at < ?
+                OR id NOT IN (
+                    SELECT id FROM violations ORDER BY id DESC LIMIT ?
+                )
+            """,
+            (now - self.max_age_seconds, self.max_items),
+        ).fetchall()
+        if not rows:
+            return
+
+        self._db.executemany(
+            "DELETE FROM violations WHERE id = ?", [(row[0],) for row in rows]
+        )
+        self._db.commit()
+        self.dropped += len(rows)
+        for _, image_path in rows:
+            try:
+                os.remove(image_path)
+            except FileNotFoundError:
+                pass
+        print(f"[Outbox] Dropped {len(rows)} undelivered violations (size/age cap)")
+
+    def get_stats(self) -> dict:
+        now = time.time()
+        with self._lock:
+            depth, oldest, due = self._db.execute(
+                """
+                SELECT COUNT(*), MIN(created_at),
+                    SUM(CASE WHEN next_attempt_at <= ? THEN 1 ELSE 0 END)
+                FROM violations
+                """,
+                (now,),
+            ).fetchone()
+            return {
+                "depth": depth,
+                "due": due or 0,
+                "oldest_age_seconds": round(now - oldest, 1) if oldest else 0.0,
+                "sent": self.sent,
+                "failed_attempts": self.failed_attempts,
+                "dropped": self.dropped,
+            }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -7,6 +7,9 @@ import config
 
 
 class ViolationQueue:
+    # Expired keys are pruned once this many accumulate (one per track)
+    MAX_KEYS = 1024
+
     def __init__(self, delay_seconds: int = None):
         self.delay = delay_seconds or config.VIOLATION_DELAY
         self._last_submissions: dict = {}
@@ -16,12 +19,22 @@ class ViolationQueue:
         current_time = time.time()
 
         with self._lock:
+            if len(self._last_submissions) >= self.MAX_KEYS:
+                self._prune(current_time)
             last_time = self._last_submissions.get(violation_type, 0)
             if current_time - last_time >= self.delay:
                 self._last_submissions[violation_type] = current_time
                 return True
             return False
 
+    def _prune(self, current_time: float):
+        """Forget keys whose delay has passed (caller holds lock)"""
+        self._last_submissions = {
+            key: last_time
+            for key, last_time in self._last_submissions.items()
+            if current_time - last_time < self.delay
+        }
+
     def get_remaining_time(self, violation_type: str) -> float:
         current_time = time.time()
 
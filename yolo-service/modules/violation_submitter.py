@@ -0,0 +1,351 @@
+"""Violation Submitter Module - Event-Driven Delivery to the Backend"""
+
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import numpy as np
+
+import config
+from .backend_client import BackendClient
+from .metrics import VIOLATION_SUBMIT_SECONDS, VIOLATION_SUBMITS
+from .violation_outbox import OutboxEntry, ViolationOutbox
+from .violation_queue import ViolationQueue
+
+
+def is_permanent_failure(error: Exception) -> bool:
+    """Whether a failed submission must not be retried
+
+    Client errors (4xx) mean the backend rejected the report itself, except
+    for timeouts, conflicts and rate limits; a missing image cannot be sent.
+    """
+    if isinstance(error, FileNotFoundError):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return 400 <= status < 500 and status not in (408, 409, 425, 429)
+    return False
+
+
+def get_throttle_key(
+    camera_code: str, violation_type: str, track_id: int = None
+) -> str:
+    """ViolationQueue key: per tracked offender and type, or per type untracked"""
+    if track_id is None:
+        return f"{camera_code}:{violation_type}"
+    return f"{camera_code}:{violation_type}:{track_id}"
+
+
+class ViolationSubmitter:
+    """Async violation submitter with throttling
+
+    Runs one long-lived event loop in its own thread. The pipeline hands
+    over reports with add_violations(), which wakes the loop directly
+    instead of being polled. Reports are written to the durable
+    ViolationOutbox and delivered by at most `concurrency` uploads in
+    flight over one pooled keep-alive HTTP client. Failures are retried
+    with exponential backoff. Outbox reads and writes (SQLite with fsync)
+    run on one dedicated thread, so the loop itself only does network I/O.
+    """
+
+    def __init__(
+        self,
+        backend_client: BackendClient,
+        violation_queue: ViolationQueue,
+        outbox: ViolationOutbox,
+        concurrency: int = None,
+        drain_timeout: float = None,
+    ):
+        """Initialize violation submitter
+
+        Args:
+            backend_client: Client used for the uploads
+            violation_queue: Throttle deciding which violations are reported
+            outbox: Durable store the reports pass through
+            concurrency: Maximum uploads in flight (default: from config)
+            drain_timeout: Seconds stop() waits for in-flight uploads
+        """
+        self.backend_client = backend_client
+        self.violation_queue = violation_queue
+        self.outbox = outbox
+        self.concurrency = concurrency or config.OUTBOX_CONCURRENCY
+        self.drain_timeout = (
+            config.SUBMITTER_DRAIN_TIMEOUT if drain_timeout is None else drain_timeout
+        )
+        # Uploads still running after the backend timeout are considered lost
+        self.lease_seconds = backend_client.timeout + 5
+
+        # camera_code -> (latest evidence frame, {throttle key: violation})
+        self.pending_reports: dict[str, tuple[np.ndarray, dict[str, dict]]] = {}
+        self._lock = threading.Lock()
+        self.event_loop: asyncio.AbstractEventLoop = None
+        self.thread = None
+        self.running = False
+        self._ready = threading.Event()
+        self._reports: asyncio.Queue = None
+        self._work: asyncio.Event = None
+        self._in_flight: set[asyncio.Task] = set()
+        self._outbox_executor: ThreadPoolExecutor = None
+
+    def start(self):
+        """Start the submitter thread and wait until its loop runs"""
+        self.running = True
+        self.thread = threading.Thread(
+            target=self._run_loop, name="violation-submitter", daemon=True
+        )
+        self.thread.start()
+        self._ready.wait(timeout=5)
+        print("[Submitter] Violation submitter started")
+
+    def stop(self):
+        """Stop accepting reports, drain in-flight uploads and stop the loop
+
+        Reports not delivered by then stay in the outbox for the next run.
+        """
+        self.running = False
+        if self.event_loop and not self.event_loop.is_closed():
+            try:
+                # None tells the intake to finish after the queued reports
+                self.event_loop.call_soon_threadsafe(self._reports.put_nowait, None)
+                self.event_loop.call_soon_threadsafe(self._work.set)
+            except RuntimeError:
+                pass
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=self.drain_timeout + 5)
+        print("[Submitter] Violation submitter stopped")
+
+    def _run_loop(self):
+        """Run the event loop in this thread until stopped"""
+        asyncio.run(self._main())
+
+    async def _main(self):
+        self.event_loop = asyncio.get_running_loop()
+        self._outbox_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="outbox"
+        )
+        self._reports = asyncio.Queue()
+        self._work = asyncio.Event()
+        # The HTTP client must belong to the loop that uses it
+        await self.backend_client.open(
+            max_connections=self.concurrency,
+            max_keepalive_connections=self.concurrency,
+        )
+        self._ready.set()
+
+        intake = asyncio.create_task(self._intake())
+        try:
+            await self._dispatch()
+        finally:
+            await intake
+            await self._store_pending()
+            await self._drain()
+            await self.backend_client.close()
+            self._outbox_executor.shutdown(wait=True)
+
+    def add_violations(
+        self, frame: np.ndarray, violations: list[dict], camera_code: str = None
+    ):
+        """Queue the violations found in one frame as a single report
+
+        Safe to call from any thread. Violations of a camera arriving before
+        the previous report was stored are merged into it.
+
+        Args:
+            frame: Evidence image
+            violations: Dicts with violation_type (YOLO class name, e.g.
+                "no-mask"), violation_code, confidence and track_id (None
+                when untracked; throttling is then per type)
+            camera_code: Camera that saw them (defaults to CAMERA_CODE)
+        """
+        if not self.running or not self.event_loop:
+            return
+
+        camera_code = camera_code or config.CAMERA_CODE
+        with self._lock:
+            queued = camera_code in self.pending_reports
+            _, pending = self.pending_reports.get(camera_code, (None, {}))
+            for violation in violations:
+                key = get_throttle_key(
+                    camera_code, violation["violation_type"], violation["track_id"]
+                )
+                previous = pending.get(key)
+                if previous is None or violation["confidence"] > previous["confidence"]:
+                    pending[key] = violation
+            # Keep only the latest frame per camera
+            self.pending_reports[camera_code] = (frame, pending)
+
+        if not queued:
+            try:
+                self.event_loop.call_soon_threadsafe(
+                    self._reports.put_nowait, camera_code
+                )
+            except RuntimeError:
+                pass
+
+    def wants_violation(
+        self, violation_type: str, camera_code: str = None, track_id: int = None
+    ) -> bool:
+        """Check whether a violation would be submitted now (not throttled)
+
+        Lets the caller skip rendering evidence images that would be dropped.
+        """
+        key = get_throttle_key(
+            camera_code or config.CAMERA_CODE, violation_type, track_id
+        )
+        return self.violation_queue.get_remaining_time(key) <= 0
+
+    async def _in_outbox_thread(self, function, *args):
+        """Run a blocking outbox call on the outbox thread"""
+        return await self.event_loop.run_in_executor(
+            self._outbox_executor, function, *args
+        )
+
+    async def _intake(self):
+        """Store every queued report in the outbox and wake the dispatcher"""
+        while True:
+            camera_code = await self._reports.get()
+            if camera_code is None:
+                return
+            with self._lock:
+                report = self.pending_reports.pop(camera_code, None)
+            try:
+                if report and await self._in_outbox_thread(
+                    self._store, camera_code, *report
+                ):
+                    self._work.set()
+            except Exception as e:
+                print(f"[Submitter] Could not store violation report: {e}")
+
+    async def _store_pending(self):
+        """Store reports that arrived but were not taken by _intake yet"""
+        with self._lock:
+            reports = list(self.pending_reports.items())
+            self.pending_reports.clear()
+        for camera_code, report in reports:
+            await self._in_outbox_thread(self._store, camera_code, *report)
+
+    def _store(
+        self, camera_code: str, frame: np.ndarray, violations: dict[str, dict]
+    ) -> bool:
+        """Write the unthrottled violations of a report to the outbox"""
+        submitted = [
+            violation
+            for key, violation in violations.items()
+            if self.violation_queue.can_submit(key)
+        ]
+        if not submitted:
+            return False
+
+        self.outbox.add(
+            frame,
+            camera_code,
+            [
+                {
+                    "violation_code": violation["violation_code"],
+                    "confidence_score": round(violation["confidence"], 4),
+                    "additional_info": None
+                    if violation["track_id"] is None
+                    else f"track {violation['track_id']}",
+                }
+                for violation in submitted
+            ],
+            notes="Detected "
+            + ", ".join(
+                sorted({violation["violation_type"] for violation in submitted})
+            ),
+        )
+        return True
+
+    async def _dispatch(self):
+        """Start uploads for due entries whenever a slot is free"""
+        while self.running:
+            self._work.clear()
+            await self._start_deliveries()
+
+            timeout = None
+            if len(self._in_flight) < self.concurrency:
+                next_attempt = await self._in_outbox_thread(self.outbox.next_attempt_at)
+                if next_attempt is not None:
+                    timeout = max(0.0, next_attempt - time.time())
+            try:
+                await asyncio.wait_for(self._work.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _drain(self):
+        """On shutdown, deliver what is due now until drain_timeout runs out"""
+        deadline = time.monotonic() + self.drain_timeout
+        while time.monotonic() < deadline:
+            await self._start_deliveries()
+            if not self._in_flight:
+                return
+            await asyncio.wait(
+                set(self._in_flight),
+                timeout=deadline - time.monotonic(),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+
+    async def _start_deliveries(self):
+        """Claim due entries for the free upload slots and start sending them"""
+        free_slots = self.concurrency - len(self._in_flight)
+        if free_slots <= 0:
+            return
+        entries = await self._in_outbox_thread(
+            self.outbox.claim, free_slots, self.lease_seconds
+        )
+        for entry in entries:
+            task = asyncio.create_task(self._deliver(entry))
+            self._in_flight.add(task)
+            task.add_done_callback(self._delivery_done)
+
+    def _delivery_done(self, task: asyncio.Task):
+        self._in_flight.discard(task)
+        self._work.set()
+
+    async def _deliver(self, entry: OutboxEntry):
+        """Send one outbox entry and record the outcome"""
+        started = time.perf_counter()
+        try:
+            await self.backend_client.submit_violation(
+                image_path=entry.image_path,
+                violation_details=entry.violation_details,
+                notes=entry.notes,
+                camera_code=entry.camera_code,
+                idempotency_key=entry.idempotency_key,
+            )
+        except Exception as e:
+            outcome = "rejected" if is_permanent_failure(e) else "retry"
+            VIOLATION_SUBMIT_SECONDS.observe(time.perf_counter() - started, outcome)
+            VIOLATION_SUBMITS.inc(outcome)
+            if outcome == "rejected":
+                await self._in_outbox_thread(self.outbox.drop, entry)
+                print(f"[Submitter] Violation rejected, dropped: {e}")
+                return
+            delay = min(
+                config.OUTBOX_RETRY_MAX_SECONDS,
+                config.OUTBOX_RETRY_BASE_SECONDS * 2**entry.attempts,
+            ) * random.uniform(0.5, 1.0)
+            await self._in_outbox_thread(
+                self.outbox.mark_failed, entry, str(e), time.time() + delay
+            )
+            print(
+                f"[Submitter] Failed to submit violation (attempt "
+                f"{entry.attempts + 1}), retrying in {delay:.0f}s: {e}"
+            )
+            return
+
+        VIOLATION_SUBMIT_SECONDS.observe(time.perf_counter() - started, "sent")
+        VIOLATION_SUBMITS.inc("sent")
+        await self._in_outbox_thread(self.outbox.mark_sent, entry)
+        codes = ", ".join(
+            detail["violation_code"] for detail in entry.violation_details
+        )
+        print(f"[Submitter] Violation submitted: {entry.camera_code} {codes}")
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            pending = len(self.pending_reports)
+        return {"pending_reports": pending, "in_flight": len(self._in_flight)}
@@ -1,31 +1,57 @@
 """YOLO Object Detection Module"""
 
 import numpy as np
-from ultralytics import YOLO
 import config
+from .detections import Detections
+from .inference_backends import create_backend, rescale_boxes
+from .overlay import OverlayRenderer
 
 
 class YOLODetector:
     """YOLO object detector"""
 
     def __init__(
-        self, model_path: str = None, device: str = None, classes: list = None
+        self,
+        model_path: str = None,
+        device: str = None,
+        classes: list = None,
+        backend: str = None,
+        imgsz: int = None,
     ):
         """Initialize YOLO model
 
         Args:
             model_path: Path to YOLO model file
-            device: Device to run on (mps, cuda, cpu)
+            device: Device to run on (auto, mps, cuda, cpu; torch backend only)
             classes: List of class IDs to detect
+            backend: Runtime executing the model (torch, onnx, openvino)
+            imgsz: Model input size in pixels
         """
         model_path = model_path or config.YOLO_MODEL_PATH
         device = device or config.YOLO_DEVICE
         classes = classes or config.YOLO_CLASSES
+        backend = backend or config.YOLO_BACKEND
+        imgsz = imgsz or config.YOLO_IMGSZ
 
-        self.model = YOLO(model_path)
+        self.backend = create_backend(
+            backend,
+            model_path,
+            device=device,
+            intra_op_threads=config.YOLO_INTRA_OP_THREADS,
+            inter_op_threads=config.YOLO_INTER_OP_THREADS,
+            imgsz=imgsz,
+            classes=classes,
+            conf_threshold=config.YOLO_CONF_THRESHOLD,
+            iou_threshold=config.YOLO_IOU_THRESHOLD,
+        )
+        self.names = self.backend.names
+        self.renderer = OverlayRenderer(self.names)
         self.device = device
         self.classes = classes
 
+        if config.YOLO_WARMUP_RUNS:
+            self.backend.warmup(config.YOLO_WARMUP_RUNS)
+
     def detect(self, frame: np.ndarray) -> np.ndarray:
         """Run detection and return annotated frame
 
@@ -35,10 +61,7 @@ class YOLODetector:
         Returns:
             Annotated frame with bounding boxes
         """
-        results = self.model(
-            frame, device=self.device, verbose=False, classes=self.classes
-        )[0]
-        annotated_frame = results.plot()
+        annotated_frame, _ = self.detect_with_info(frame)
         return annotated_frame
 
     def detect_with_info(self, frame: np.ndarray) -> tuple[np.ndarray, list[dict]]:
@@ -51,21 +74,48 @@ class YOLODetector:
             Tuple of (annotated_frame, detections) where detections is a list of
             dicts with keys: class_id, class_name, confidence, bbox
         """
-        results = self.model(
-            frame, device=self.device, verbose=False, classes=self.classes
-        )[0]
-        annotated_frame = results.plot()
-
-        detections = []
-        if results.boxes is not None:
-            for box in results.boxes:
-                detections.append(
-                    {
-                        "class_id": int(box.cls[0]),
-                        "class_name": self.model.names[int(box.cls[0])],
-                        "confidence": float(box.conf[0]),
-                        "bbox": box.xyxy[0].tolist(),
-                    }
-                )
-
-        return annotated_frame, detections
+        detections = self.detect_batch([frame])[0]
+        return self.annotate(frame, detections), detections.to_dicts()
+
+    def detect_batch(
+        self, frames: list[np.ndarray], display_frames: list[np.ndarray] = None
+    ) -> list[Detections]:
+        """Run detection on several frames in a single model call
+
+        Nothing is drawn; call annotate() for the frames somebody looks at.
+
+        Args:
+            frames: Input frames, one per camera (each height, width, 3)
+            display_frames: Optional full-resolution frames matching frames;
+                boxes are mapped to their coordinates
+
+        Returns:
+            Detections per frame in the same order as frames
+        """
+        if not frames:
+            return []
+
+        display_frames = display_frames or frames
+        results = []
+        for frame, display_frame, boxes in zip(
+            frames, display_frames, self.backend.predict(frames)
+        ):
+            if display_frame is not frame:
+                boxes = rescale_boxes(boxes, frame.shape[:2], display_frame.shape[:2])
+            results.append(Detections.from_array(boxes, self.names))
+        return results
+
+    def annotate(
+        self, frame: np.ndarray, detections: Detections, out: np.ndarray = None
+    ) -> np.ndarray:
+        """Draw detections onto a copy of a frame
+
+        Args:
+            frame: Input frame (height, width, 3)
+            detections: Detections of the frame
+            out: Optional buffer of the frame's shape to draw into
+
+        Returns:
+            Annotated frame
+        """
+        return self.renderer.render(frame, detections, out)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import config and modules like main.py does, from yolo-service/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
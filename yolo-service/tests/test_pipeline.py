@@ -0,0 +1,143 @@
+"""Hand-off buffers and pipeline stages"""
+
+import threading
+import time
+
+from modules.frame_pool import FramePool
+from modules.pipeline import (
+    BLOCK,
+    DROP_OLDEST,
+    FramePacket,
+    HandoffBuffer,
+    PipelineStage,
+    wait_any,
+)
+
+
+def test_drop_oldest_keeps_newest_items():
+    dropped = []
+    buffer = HandoffBuffer(
+        "frames", capacity=2, policy=DROP_OLDEST, on_drop=dropped.append
+    )
+
+    for item in range(5):
+        assert buffer.put(item)
+
+    assert [buffer.get_nowait(), buffer.get_nowait()] == [3, 4]
+    assert dropped == [0, 1, 2]
+    assert buffer.get_stats()["dropped"] == 3
+
+
+def test_block_waits_for_a_free_slot():
+    buffer = HandoffBuffer("frames", capacity=1, policy=BLOCK)
+    assert buffer.put("first")
+    assert not buffer.put("second", timeout=0.05)
+
+    threading.Timer(0.05, buffer.get).start()
+    started = time.monotonic()
+    assert buffer.put("second", timeout=2)
+    assert time.monotonic() - started < 1
+    assert buffer.get_nowait() == "second"
+    assert buffer.get_stats()["dropped"] == 0
+
+
+def test_close_wakes_blocked_producer_and_consumer():
+    buffer = HandoffBuffer("frames", capacity=1, policy=BLOCK)
+    buffer.put("first")
+    results = {}
+
+    def produce():
+        results["put"] = buffer.put("second", timeout=5)
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    time.sleep(0.05)
+    buffer.close()
+    producer.join(timeout=2)
+
+    assert results["put"] is False
+    assert buffer.get(timeout=0) == "first"
+    assert buffer.get(timeout=5) is None
+
+
+def test_wait_any_takes_one_item_from_each_ready_buffer():
+    condition = threading.Condition()
+    buffers = [
+        HandoffBuffer(f"camera-{index}", capacity=2, condition=condition)
+        for index in range(3)
+    ]
+    buffers[0].put("a1")
+    buffers[0].put("a2")
+    buffers[2].put("c1")
+
+    assert wait_any(buffers, timeout=1) == [(0, "a1"), (2, "c1")]
+    assert wait_any(buffers, timeout=1) == [(0, "a2")]
+    assert wait_any(buffers, timeout=0.05) == []
+
+
+def test_wait_any_wakes_on_put_from_another_thread():
+    condition = threading.Condition()
+    buffers = [
+        HandoffBuffer("a", condition=condition),
+        HandoffBuffer("b", condition=condition),
+    ]
+    threading.Timer(0.05, buffers[1].put, args=("b1",)).start()
+
+    assert wait_any(buffers, timeout=2) == [(1, "b1")]
+
+
+def test_failed_stage_keeps_frames_it_handed_off():
+    pool = FramePool((4, 4, 3), size=3, max_size=3)
+    inbox = HandoffBuffer("frames", capacity=3)
+    outbox = HandoffBuffer("results", capacity=3)
+    for index in range(3):
+        inbox.put(
+            FramePacket("CAM001", index, pool.acquire(), 0.0, release=pool.release)
+        )
+    assert pool.get_stats()["free"] == 0
+
+    def process(items):
+        # Forward the packet, then fail
+        for _, packet in items:
+            packet.handed_off = True
+            outbox.put(packet)
+        raise RuntimeError("output failed")
+
+    stage = PipelineStage("inference", process, [inbox], batch=True)
+    stage.start()
+    deadline = time.monotonic() + 2
+    while stage.errors < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    stage.stop()
+
+    assert stage.errors == 3
+    assert len(outbox) == 3
+    # Forwarded frames stay with the next stage; nothing else leaked
+    assert pool.get_stats()["free"] == 0
+    for _ in range(3):
+        outbox.get_nowait().release_frame()
+    assert pool.get_stats()["free"] == 3
+
+
+def test_failed_batch_returns_every_frame_to_the_pool():
+    pool = FramePool((4, 4, 3), size=2, max_size=2)
+    condition = threading.Condition()
+    inboxes = [
+        HandoffBuffer(f"camera-{index}", condition=condition) for index in range(2)
+    ]
+    for index, inbox in enumerate(inboxes):
+        inbox.put(
+            FramePacket(f"CAM00{index}", 0, pool.acquire(), 0.0, release=pool.release)
+        )
+
+    def process(items):
+        raise RuntimeError("model failed")
+
+    stage = PipelineStage("inference", process, inboxes, batch=True)
+    stage.start()
+    deadline = time.monotonic() + 2
+    while stage.errors < 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    stage.stop()
+
+    assert pool.get_stats()["free"] == 2
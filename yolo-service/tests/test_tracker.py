@@ -0,0 +1,136 @@
+"""Tracking across frames the model skips"""
+
+import time
+
+import numpy as np
+import pytest
+
+from main import InferenceRunner, publish_detections
+from modules.detections import Detections
+from modules.inference_scheduler import InferenceScheduler
+from modules.motion_gate import MotionGate
+from modules.pipeline import FramePacket
+from modules.tracker import TrackerBank
+from modules.violation_queue import ViolationQueue
+from modules.violation_submitter import get_throttle_key
+
+NAMES = {0: "apron", 3: "no-apron"}
+FPS = 25
+MAX_SKIP_SECONDS = 5.0
+
+
+class StaticDetector:
+    """The same offenders in every frame the model runs on"""
+
+    def __init__(self, boxes=((100, 100, 200, 300, 0.9, 3),)):
+        self.boxes = np.array(boxes, dtype=np.float32)
+        self.calls = 0
+
+    def detect_batch(self, frames, display_frames):
+        self.calls += len(frames)
+        return [Detections.from_array(self.boxes, NAMES) for _ in frames]
+
+
+class ResultBuffer:
+    closed = False
+
+    def __init__(self):
+        self.packets = []
+
+    def put(self, packet, timeout=None):
+        self.packets.append(packet)
+        return True
+
+
+class IdleHub:
+    def wants_frame(self):
+        return False
+
+
+class RecordingSubmitter:
+    """ViolationSubmitter stand-in: same throttle keys, reports kept in a list"""
+
+    def __init__(self):
+        self.violation_queue = ViolationQueue(delay_seconds=300)
+        self.reports = []
+
+    def wants_violation(self, violation_type, camera_code=None, track_id=None):
+        key = get_throttle_key(camera_code, violation_type, track_id)
+        return self.violation_queue.get_remaining_time(key) <= 0
+
+    def add_violations(self, frame, violations, camera_code=None):
+        for violation in violations:
+            key = get_throttle_key(
+                camera_code, violation["violation_type"], violation["track_id"]
+            )
+            if self.violation_queue.can_submit(key):
+                self.reports.append(violation)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake monotonic clock shared by the motion gate and the tracker"""
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    return now
+
+
+def run_static_scene(clock, detector, trackers, seconds, cadence="every_frame"):
+    """Feed the same frame through the gated runner and report violations"""
+    runner = InferenceRunner(
+        detector,
+        InferenceScheduler(cadence=cadence, interval=3),
+        {"CAM001": ResultBuffer()},
+        MotionGate(max_skip_seconds=MAX_SKIP_SECONDS),
+        trackers,
+    )
+    runner.add_camera("CAM001", FPS)
+    submitter = RecordingSubmitter()
+    frame = np.full((360, 640, 3), 80, dtype=np.uint8)
+
+    for index in range(int(seconds * FPS)):
+        packet = FramePacket("CAM001", index, frame, captured_at=clock[0])
+        runner.process([(index, packet)])
+        publish_detections(
+            "CAM001",
+            packet.detections,
+            lambda: frame,
+            None,
+            IdleHub(),
+            submitter,
+        )
+        clock[0] += 1 / FPS
+    return submitter
+
+
+@pytest.mark.parametrize("cadence", ["every_frame", "fixed"])
+def test_gated_static_scene_is_reported_once(clock, cadence):
+    detector = StaticDetector()
+    trackers = TrackerBank(max_age=2.0)
+
+    # Long enough for the gate to force the model several times, each time
+    # after the tracker's max_age has passed
+    submitter = run_static_scene(
+        clock, detector, trackers, 4 * MAX_SKIP_SECONDS, cadence
+    )
+
+    assert detector.calls >= 4
+    assert trackers.get_stats()["CAM001"]["total_tracks"] == 1
+    assert len(submitter.reports) == 1
+    assert submitter.reports[0]["track_id"] == 1
+
+
+def test_untracked_low_confidence_violation_is_throttled_per_type(clock):
+    # Below the tracker's high_confidence: it never starts a track
+    detector = StaticDetector(
+        [(100, 100, 200, 300, 0.9, 3), (400, 100, 500, 300, 0.3, 3)]
+    )
+    trackers = TrackerBank(max_age=2.0, high_confidence=0.5)
+
+    submitter = run_static_scene(clock, detector, trackers, 2 * MAX_SKIP_SECONDS)
+
+    assert trackers.get_stats()["CAM001"]["total_tracks"] == 1
+    assert sorted(
+        (report["track_id"] is None, report["confidence"])
+        for report in submitter.reports
+    ) == [(False, pytest.approx(0.9)), (True, pytest.approx(0.3))]
@@ -0,0 +1,76 @@
+"""Frame order and forwarding with inference workers"""
+
+import threading
+import time
+
+import numpy as np
+
+from main import WorkerInferenceRunner
+from modules.detections import Detections
+from modules.inference_scheduler import InferenceScheduler
+from modules.pipeline import BLOCK, FramePacket, HandoffBuffer
+
+NAMES = {0: "apron", 3: "no-apron"}
+
+
+class ManualPool:
+    """InferenceWorkerPool stand-in: the test answers each batch itself"""
+
+    max_batch_size = 1
+
+    def __init__(self):
+        self.callbacks = []
+
+    def submit(self, frames, display_frames, callback):
+        self.callbacks.append(callback)
+        return True
+
+    def answer(self, index):
+        box = np.array([[100, 100, 200, 300, 0.9, 3]], dtype=np.float32)
+        self.callbacks[index]([Detections.from_array(box, NAMES)], 0.01)
+
+
+def make_packet(camera_code, index):
+    frame = np.zeros((64, 64, 3), dtype=np.uint8)
+    return FramePacket(camera_code, index, frame, captured_at=0.0)
+
+
+def test_blocked_camera_does_not_hold_up_other_cameras():
+    pool = ManualPool()
+    buffers = {
+        "CAM001": HandoffBuffer("CAM001", capacity=1, policy=BLOCK),
+        "CAM002": HandoffBuffer("CAM002", capacity=4, policy=BLOCK),
+    }
+    runner = WorkerInferenceRunner(
+        pool, InferenceScheduler(cadence="every_frame"), buffers
+    )
+    runner.add_camera("CAM001", 25)
+    runner.add_camera("CAM002", 25)
+
+    runner.process([(0, make_packet("CAM001", 0))])
+    buffers["CAM001"].put("earlier frame")
+    # The result thread blocks forwarding into the full buffer
+    result_thread = threading.Thread(target=pool.answer, args=(0,))
+    result_thread.start()
+    time.sleep(0.1)
+    assert result_thread.is_alive()
+
+    finished = threading.Event()
+
+    def infer_more():
+        runner.process([(0, make_packet("CAM001", 1))])
+        runner.process([(1, make_packet("CAM002", 0))])
+        pool.answer(1)
+        pool.answer(2)
+        finished.set()
+
+    threading.Thread(target=infer_more, daemon=True).start()
+    assert finished.wait(timeout=2)
+    assert buffers["CAM002"].get_nowait().frame_id == 0
+
+    # CAM001 keeps its order once its buffer drains
+    assert buffers["CAM001"].get(timeout=1) == "earlier frame"
+    assert buffers["CAM001"].get(timeout=1).frame_id == 0
+    assert buffers["CAM001"].get(timeout=1).frame_id == 1
+    result_thread.join(timeout=2)
+    assert not result_thread.is_alive()
@@ -0,0 +1,543 @@
+"""Offline Pipeline Benchmark
+
+Replays a video file or synthetic frames through every stage in isolation
+(decode, detect, render, jpeg, hls) and through the full capture ->
+inference -> output pipeline, and prints fps, per-stage p50/p95/p99 latency,
+CPU% and peak RSS as JSON so builds can be compared.
+
+Run from yolo-service/:
+    python tools/benchmark.py --detector stub --resolution 1280x720 --detections 20
+    python tools/benchmark.py --source assets/demo.mp4 --output bench.json
+
+The stub detector returns random boxes (optionally after a fixed delay), so
+everything but the model can be measured on machines without it.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+from modules.detections import Detections  # noqa: E402
+from modules.overlay import OverlayRenderer  # noqa: E402
+from modules.pipeline import (  # noqa: E402
+    BLOCK,
+    FramePacket,
+    HandoffBuffer,
+    Pipeline,
+    PipelineStage,
+)
+from modules.sse_encoder import SSEncoder  # noqa: E402
+
+STAGES = ("decode", "detect", "render", "jpeg", "hls", "pipeline")
+STUB_NAMES = {
+    0: "apron",
+    1: "hairnet",
+    2: "mask",
+    3: "no-apron",
+    4: "no-hairnet",
+    5: "no-mask",
+}
+
+
+class StubDetector:
+    """Stands in for YOLODetector: random boxes, optional fixed model latency"""
+
+    def __init__(self, detections: int = 10, latency: float = 0.0, seed: int = 0):
+        """Initialize stub detector
+
+        Args:
+            detections: Boxes returned per frame
+            latency: Seconds every detect_batch() call sleeps per frame
+            seed: Random seed, so runs are comparable
+        """
+        self.detections = detections
+        self.latency = latency
+        self.names = STUB_NAMES
+        self.renderer = OverlayRenderer(self.names)
+        self._rng = np.random.default_rng(seed)
+
+    def _random_detections(self, shape: tuple) -> Detections:
+        height, width = shape[:2]
+        count = self.detections
+        size = self._rng.uniform(0.05, 0.25, (count, 2)) * (width, height)
+        top_left = self._rng.uniform(0, 1, (count, 2)) * ((width, height) - size)
+        boxes = np.column_stack(
+            [
+                top_left,
+                top_left + size,
+                self._rng.uniform(0.3, 0.95, count),
+                self._rng.integers(0, len(self.names), count),
+            ]
+        )
+        return Detections.from_array(boxes, self.names)
+
+    def detect_batch(
+        self, frames: list[np.ndarray], display_frames: list[np.ndarray] = None
+    ) -> list[Detections]:
+        if self.latency:
+            time.sleep(self.latency * len(frames))
+        return [
+            self._random_detections(frame.shape) for frame in display_frames or frames
+        ]
+
+    def annotate(
+        self, frame: np.ndarray, detections: Detections, out: np.ndarray = None
+    ) -> np.ndarray:
+        return self.renderer.render(frame, detections, out)
+
+
+class ResourceMeter:
+    """CPU time (this process and reaped ffmpeg children) over a wall interval"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.cpu_started = self._cpu_seconds()
+
+    @staticmethod
+    def _cpu_seconds() -> float:
+        total = 0.0
+        for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN):
+            usage = resource.getrusage(who)
+            total += usage.ru_utime + usage.ru_stime
+        return total
+
+    def stop(self) -> dict:
+        wall = time.perf_counter() - self.started
+        cpu = self._cpu_seconds() - self.cpu_started
+        return {
+            "wall_seconds": round(wall, 3),
+            "cpu_percent": round(100 * cpu / wall, 1) if wall else 0.0,
+            "peak_rss_mb": get_peak_rss_mb(),
+        }
+
+
+def get_peak_rss_mb() -> float:
+    """Peak resident set size of this process so far"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def summarize(latencies: list[float], frames: int, meter: ResourceMeter) -> dict:
+    """fps, latency percentiles in ms and resource usage of one run"""
+    usage = meter.stop()
+    result = {
+        "frames": frames,
+        "fps": round(frames / usage["wall_seconds"], 2)
+        if usage["wall_seconds"]
+        else 0.0,
+    }
+    if latencies:
+        p50, p95, p99 = np.percentile(np.asarray(latencies) * 1000, [50, 95, 99])
+        result["latency_ms"] = {
+            "p50": round(float(p50), 3),
+            "p95": round(float(p95), 3),
+            "p99": round(float(p99), 3),
+            "max": round(max(latencies) * 1000, 3),
+        }
+    result.update(usage)
+    return result
+
+
+def measure(items: list, process) -> dict:
+    """Time process(item) for every item"""
+    latencies = []
+    meter = ResourceMeter()
+    for item in items:
+        started = time.perf_counter()
+        process(item)
+        latencies.append(time.perf_counter() - started)
+    return summarize(latencies, len(items), meter)
+
+
+def parse_resolution(text: str) -> tuple[int, int]:
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def synthetic_frames(width: int, height: int, count: int, seed: int = 0):
+    """Textured frames with moving blocks, roughly as hard to encode as video"""
+    rng = np.random.default_rng(seed)
+    background = cv2.GaussianBlur(
+        rng.integers(0, 256, (height, width, 3), dtype=np.uint8), (0, 0), 3
+    )
+    frames = []
+    for index in range(count):
+        frame = background.copy()
+        for block in range(8):
+            x = int((index * 7 + block * width / 8) % max(1, width - 40))
+            y = int(height * (block + 1) / 10)
+            color = tuple(int(c) for c in rng.integers(0, 256, 3))
+            cv2.rectangle(frame, (x, y), (x + 40, y + 40), color, -1)
+        frames.append(frame)
+    return frames
+
+
+def load_frames(path: str, width: int, height: int, count: int) -> list[np.ndarray]:
+    """Up to count frames of a video file, scaled to width x height"""
+    capture = cv2.VideoCapture(path)
+    frames = []
+    try:
+        while len(frames) < count:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            if frame.shape[1] != width or frame.shape[0] != height:
+                frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+            frames.append(frame)
+    finally:
+        capture.release()
+    if not frames:
+        raise RuntimeError(f"Could not read frames from {path}")
+    return frames
+
+
+def bench_decode(path: str, count: int) -> dict:
+    """FFmpegStreamer reading a file at its own resolution"""
+    from modules.ffmpeg_ops import FFmpegStreamer, StreamInfo
+    from modules.frame_pool import FramePool
+
+    width, height = StreamInfo.get_dimensions(path)
+    pool = FramePool((height, width, 3), size=config.FRAME_POOL_SIZE)
+    streamer = FFmpegStreamer(path, width, height, pool)
+    latencies = []
+    meter = ResourceMeter()
+    streamer.start()
+    try:
+        while len(latencies) < count:
+            started = time.perf_counter()
+            frame = streamer.get_frame()
+            if frame is None:
+                break
+            latencies.append(time.perf_counter() - started)
+            streamer.release_frame(frame)
+    finally:
+        streamer.stop()
+    result = summarize(latencies, len(latencies), meter)
+    result["resolution"] = f"{width}x{height}"
+    return result
+
+
+def bench_hls(frames: list[np.ndarray], fps: float) -> dict:
+    """FFmpegHLSEncoder writing into a temporary directory"""
+    from modules.ffmpeg_ops import FFmpegHLSEncoder
+
+    height, width = frames[0].shape[:2]
+    output_dir = tempfile.mkdtemp(prefix="hls-bench-")
+    encoder = FFmpegHLSEncoder(
+        width,
+        height,
+        fps,
+        os.path.join(output_dir, "stream.m3u8"),
+        config.HLS_TIME,
+        config.HLS_LIST_SIZE,
+        config.HLS_DELETE_THRESHOLD,
+    )
+    try:
+        encoder.start()
+        latencies = []
+        meter = ResourceMeter()
+        for frame in frames:
+            started = time.perf_counter()
+            encoder.write_frame(frame)
+            latencies.append(time.perf_counter() - started)
+        # Includes flushing the last segment
+        encoder.stop()
+        return summarize(latencies, len(frames), meter)
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+
+def bench_pipeline(
+    frames: list[np.ndarray], detector, count: int, source_fps: float
+) -> dict:
+    """Capture -> inference -> output (render + JPEG) through the real stages
+
+    Inference goes through main.InferenceRunner, so the configured cadence,
+    box propagation and tracking apply. Capture is unpaced unless source_fps
+    is set; with the block hand-off no frame is dropped.
+    """
+    from main import InferenceRunner
+    from modules.inference_scheduler import InferenceScheduler
+    from modules.tracker import TrackerBank
+
+    pipeline = Pipeline()
+    frame_buffer = pipeline.add_buffer(
+        HandoffBuffer(
+            "bench.frames", capacity=config.PIPELINE_BUFFER_SIZE, policy=BLOCK
+        )
+    )
+    result_buffer = pipeline.add_buffer(
+        HandoffBuffer(
+            "bench.results", capacity=config.PIPELINE_BUFFER_SIZE, policy=BLOCK
+        )
+    )
+    trackers = None
+    if config.VIOLATION_TRACKING:
+        trackers = TrackerBank(
+            iou_threshold=config.TRACKER_IOU_THRESHOLD,
+            high_confidence=config.TRACKER_HIGH_CONFIDENCE,
+            max_age=config.TRACKER_MAX_AGE_SECONDS,
+        )
+    inference = InferenceRunner(
+        detector,
+        InferenceScheduler(
+            cadence=config.INFERENCE_CADENCE,
+            interval=config.INFERENCE_INTERVAL,
+            cpu_budget=config.INFERENCE_CPU_BUDGET,
+            target_fps=config.INFERENCE_TARGET_FPS,
+            max_interval=config.INFERENCE_MAX_INTERVAL,
+        ),
+        {"BENCH": result_buffer},
+        trackers=trackers,
+    )
+    inference.add_camera("BENCH", source_fps or 30.0)
+
+    encoder = SSEncoder(
+        boundary=config.SSE_BOUNDARY, jpeg_quality=config.SSE_JPEG_QUALITY
+    )
+    end_to_end = []
+    annotated = None
+    done = threading.Event()
+
+    def output(packet: FramePacket):
+        nonlocal annotated
+        annotated = detector.annotate(packet.frame, packet.detections, annotated)
+        encoder.encode_frame(annotated)
+        end_to_end.append(time.perf_counter() - packet.captured_at)
+        if len(end_to_end) >= count:
+            done.set()
+
+    inference_stage = pipeline.add_stage(
+        PipelineStage(
+            "inference",
+            inference.process,
+            [frame_buffer],
+            batch=True,
+            latency_window=count,
+        )
+    )
+    output_stage = pipeline.add_stage(
+        PipelineStage("output", output, [result_buffer], latency_window=count)
+    )
+
+    meter = ResourceMeter()
+    pipeline.start()
+    try:
+        interval = 1.0 / source_fps if source_fps else 0.0
+        next_frame_at = time.perf_counter()
+        for index in range(count):
+            if interval:
+                time.sleep(max(0.0, next_frame_at - time.perf_counter()))
+                next_frame_at += interval
+            packet = FramePacket(
+                camera_code="BENCH",
+                index=index,
+                frame=frames[index % len(frames)],
+                captured_at=time.perf_counter(),
+            )
+            while not frame_buffer.put(packet, timeout=1.0):
+                pass
+        done.wait(timeout=max(60.0, count))
+    finally:
+        pipeline.stop()
+
+    result = summarize(end_to_end, len(end_to_end), meter)
+    result["inferred_frames"] = inference.inferred_frames["BENCH"]
+    result["stages"] = {}
+    for stage in (inference_stage, output_stage):
+        latencies = np.asarray(stage.latencies) * 1000
+        if not len(latencies):
+            continue
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        result["stages"][stage.name] = {
+            "p50": round(float(p50), 3),
+            "p95": round(float(p95), 3),
+            "p99": round(float(p99), 3),
+        }
+    return result
+
+
+def create_detector(args):
+    if args.detector == "stub":
+        return StubDetector(args.detections, args.stub_latency_ms / 1000)
+
+    from modules.yolo_detector import YOLODetector
+
+    return YOLODetector(
+        model_path=config.YOLO_MODEL_PATH,
+        device=config.YOLO_DEVICE,
+        classes=config.YOLO_CLASSES,
+    )
+
+
+def run_resolution(args, detector, width: int, height: int) -> dict:
+    """Run the selected stages on frames of one resolution"""
+    if args.source == "synthetic":
+        frames = synthetic_frames(width, height, min(args.frames, 60))
+    else:
+        frames = load_frames(args.source, width, height, args.frames)
+    items = [frames[index % len(frames)] for index in range(args.frames)]
+    stages = {}
+
+    def skip(reason: str) -> dict:
+        return {"skipped": reason}
+
+    if "decode" in args.stages:
+        if args.source == "synthetic":
+            stages["decode"] = skip("needs --source with a video file")
+        elif not shutil.which("ffmpeg"):
+            stages["decode"] = skip("ffmpeg not found")
+        else:
+            stages["decode"] = bench_decode(args.source, args.frames)
+
+    detections = []
+    if "detect" in args.stages:
+        stages["detect"] = measure(
+            items, lambda frame: detections.extend(detector.detect_batch([frame]))
+        )
+        stages["detect"]["detections_per_frame"] = round(
+            float(np.mean([len(d) for d in detections])), 2
+        )
+    else:
+        detections = [detector.detect_batch([frame])[0] for frame in frames]
+
+    renderer = detector.renderer
+    if "render" in args.stages:
+        out = None
+
+        def render(index: int):
+            nonlocal out
+            out = renderer.render(
+                items[index], detections[index % len(detections)], out
+            )
+
+        stages["render"] = measure(range(len(items)), render)
+    annotated = [
+        renderer.render(frame, detections[index % len(detections)])
+        for index, frame in enumerate(frames)
+    ]
+    annotated_items = [
+        annotated[index % len(annotated)] for index in range(args.frames)
+    ]
+
+    if "jpeg" in args.stages:
+        encoder = SSEncoder(
+            boundary=config.SSE_BOUNDARY, jpeg_quality=config.SSE_JPEG_QUALITY
+        )
+        stages["jpeg"] = measure(annotated_items, encoder.encode_frame)
+
+    if "hls" in args.stages:
+        if not shutil.which("ffmpeg"):
+            stages["hls"] = skip("ffmpeg not found")
+        else:
+            stages["hls"] = bench_hls(annotated_items, args.source_fps or 30.0)
+
+    if "pipeline" in args.stages:
+        stages["pipeline"] = bench_pipeline(
+            frames, detector, args.frames, args.source_fps
+        )
+
+    return {"resolution": f"{width}x{height}", "stages": stages}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the capture, inference and output stages"
+    )
+    parser.add_argument(
+        "--source",
+        default="synthetic",
+        help="'synthetic' or a video file, e.g. assets/demo.mp4",
+    )
+    parser.add_argument(
+        "--resolution",
+        action="append",
+        type=parse_resolution,
+        help="WIDTHxHEIGHT, may be repeated (default: 1280x720)",
+    )
+    parser.add_argument("--frames", type=int, default=300, help="Frames per stage")
+    parser.add_argument(
+        "--stages",
+        default=",".join(STAGES),
+        help=f"Comma-separated subset of {', '.join(STAGES)}",
+    )
+    parser.add_argument("--detector", choices=["stub", "model"], default="stub")
+    parser.add_argument(
+        "--detections", type=int, default=10, help="Boxes per frame (stub detector)"
+    )
+    parser.add_argument(
+        "--stub-latency-ms",
+        type=float,
+        default=0.0,
+        help="Simulated model time per frame (stub detector)",
+    )
+    parser.add_argument(
+        "--source-fps",
+        type=float,
+        default=0.0,
+        help="Pace pipeline capture at this rate (default: as fast as possible)",
+    )
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    args.stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = set(args.stages) - set(STAGES)
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(sorted(unknown))}")
+    args.resolution = args.resolution or [(1280, 720)]
+    return args
+
+
+def main(argv=None) -> dict:
+    args = parse_args(argv)
+    report = {
+        "benchmark": {
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "opencv": cv2.__version__,
+            "source": args.source,
+            "detector": args.detector,
+            "detections": args.detections if args.detector == "stub" else None,
+            "frames": args.frames,
+            "yolo_backend": config.YOLO_BACKEND if args.detector == "model" else None,
+            "inference_cadence": config.INFERENCE_CADENCE,
+        },
+        "runs": [],
+    }
+
+    # Module output (ffmpeg logs, prints) must not mix with the JSON report
+    with contextlib.redirect_stdout(sys.stderr):
+        detector = create_detector(args)
+        for width, height in args.resolution:
+            print(f"[Benchmark] {width}x{height}: {', '.join(args.stages)}")
+            report["runs"].append(run_resolution(args, detector, width, height))
+    report["peak_rss_mb"] = get_peak_rss_mb()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    print(text)
+    return report
+
+
+if __name__ == "__main__":
+    main()
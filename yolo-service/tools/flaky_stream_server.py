@@ -0,0 +1,240 @@
+"""Flaky Stream Stand-In
+
+Serves a local video file as an endless HTTP stream that fails on purpose:
+after about --fault-after seconds (0.5x to 1.5x, so connections do not all
+fail together) a connection is either closed mid-stream (drop) or kept open
+without sending another byte (stall), and for --refuse-seconds
+after a fault new connections get 503. Point a camera at it to watch the
+StreamSupervisor reconnect, or let this tool run a supervisor itself with
+--supervise and print a JSON report of reconnects and outage durations.
+
+The file is sent byte by byte, so use a format ffmpeg can read from any
+offset, e.g. MPEG-TS:
+    ffmpeg -i assets/demo.mp4 -c copy -f mpegts assets/demo.ts
+
+Run from yolo-service/:
+    python tools/flaky_stream_server.py --source assets/demo.ts --fault stall
+    python tools/flaky_stream_server.py --source assets/demo.ts --fault mixed \\
+        --fault-after 15 --supervise 90
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+from fastapi import FastAPI, Response
+from fastapi.responses import StreamingResponse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import config  # noqa: E402
+from stub_backend import start_in_thread  # noqa: E402
+
+CHUNK_SIZE = 16 * 1024
+
+
+class FlakyStream:
+    """Looping byte stream of a file with injected drops, stalls and refusals"""
+
+    def __init__(
+        self,
+        data: bytes,
+        rate_kbps: float,
+        fault: str = "drop",
+        fault_after: float = 20.0,
+        refuse_seconds: float = 0.0,
+        seed: int = None,
+    ):
+        """Initialize flaky stream
+
+        Args:
+            data: File contents, sent in a loop
+            rate_kbps: Sending rate in kilobits per second
+            fault: "drop", "stall", "mixed" (alternating) or "none"
+            fault_after: Mean seconds into each connection before its fault
+            refuse_seconds: Seconds to answer 503 after a fault
+            seed: Random seed for the fault times
+        """
+        self.data = data
+        self.rate = rate_kbps * 1000 / 8
+        self.fault = fault
+        self.fault_after = fault_after
+        self.refuse_seconds = refuse_seconds
+        self.refuse_until = 0.0
+        self.counts = Counter()
+        self._random = random.Random(seed)
+
+        self.app = FastAPI()
+        self.app.get("/stream.ts")(self.stream)
+        self.app.get("/stats")(self.stats)
+
+    async def stream(self):
+        if time.monotonic() < self.refuse_until:
+            self.counts["refused"] += 1
+            return Response(status_code=503)
+        self.counts["connections"] += 1
+        fault = self.fault
+        if fault == "mixed":
+            fault = "drop" if self.counts["connections"] % 2 else "stall"
+        fault_after = self.fault_after * self._random.uniform(0.5, 1.5)
+        return StreamingResponse(
+            self._body(fault, fault_after), media_type="video/mp2t"
+        )
+
+    async def _body(self, fault: str, fault_after: float):
+        started = time.monotonic()
+        offset = sent = 0
+        while True:
+            elapsed = time.monotonic() - started
+            if fault != "none" and elapsed >= fault_after:
+                self.counts[f"{fault}s"] += 1
+                self.refuse_until = time.monotonic() + self.refuse_seconds
+                if fault == "stall":
+                    # Hold the connection open until the client gives up
+                    await asyncio.sleep(3600)
+                return
+
+            if sent > elapsed * self.rate:
+                await asyncio.sleep(CHUNK_SIZE / self.rate)
+                continue
+            chunk = self.data[offset : offset + CHUNK_SIZE]
+            offset = (offset + len(chunk)) % len(self.data)
+            sent += len(chunk)
+            self.counts["bytes_sent"] += len(chunk)
+            yield chunk
+
+    async def stats(self):
+        return dict(self.counts)
+
+
+def supervise(
+    url: str, source: str, seconds: float, read_timeout: float, hot_standby: bool
+) -> dict:
+    """Read the stream through a StreamSupervisor and report its reconnects"""
+    from modules.ffmpeg_ops import FFmpegStreamer, StreamInfo
+    from modules.stream_supervisor import StreamSupervisor
+
+    info = StreamInfo.probe(source)
+    width, height = info["width"], info["height"]
+    supervisor = StreamSupervisor(
+        "FLAKY",
+        lambda: FFmpegStreamer(url, width, height),
+        read_timeout=read_timeout,
+        hot_standby=hot_standby,
+    )
+    frames = 0
+    started = time.monotonic()
+    supervisor.start()
+    try:
+        while time.monotonic() - started < seconds:
+            frame, _ = supervisor.get_frames()
+            if frame is None:
+                break
+            frames += 1
+            supervisor.streamer.release_frame(frame)
+    finally:
+        supervisor.stop()
+    elapsed = time.monotonic() - started
+    return {
+        "seconds": round(elapsed, 1),
+        "frames": frames,
+        "fps": round(frames / elapsed, 2),
+        "supervisor": supervisor.get_stats(),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP video stream that fails")
+    parser.add_argument("--source", required=True, help="Video file to serve")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument(
+        "--rate-kbps", type=float, default=4000, help="Sending rate (kbit/s)"
+    )
+    parser.add_argument(
+        "--fault", choices=["drop", "stall", "mixed", "none"], default="drop"
+    )
+    parser.add_argument(
+        "--fault-after",
+        type=float,
+        default=20.0,
+        help="Mean seconds into each connection before it fails",
+    )
+    parser.add_argument(
+        "--refuse-seconds",
+        type=float,
+        default=5.0,
+        help="Answer 503 this long after a fault",
+    )
+    parser.add_argument(
+        "--supervise",
+        type=float,
+        metavar="SECONDS",
+        help="Read the stream through a StreamSupervisor and print a report",
+    )
+    parser.add_argument(
+        "--read-timeout",
+        type=float,
+        default=None,
+        help="Supervisor read timeout (default: from config)",
+    )
+    parser.add_argument(
+        "--hot-standby",
+        action="store_true",
+        help="Supervisor keeps a second connection to swap in",
+    )
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with open(args.source, "rb") as file:
+        data = file.read()
+    flaky = FlakyStream(
+        data,
+        args.rate_kbps,
+        args.fault,
+        args.fault_after,
+        args.refuse_seconds,
+        args.seed,
+    )
+
+    if not args.supervise:
+        import uvicorn
+
+        print(f"[Flaky] Serving http://{args.host}:{args.port}/stream.ts")
+        uvicorn.run(flaky.app, host=args.host, port=args.port, log_level="warning")
+        return
+
+    server, port = start_in_thread(flaky, args.host, args.port)
+    url = f"http://{args.host}:{port}/stream.ts"
+    # Supervisor logs must not mix with the JSON report
+    with contextlib.redirect_stdout(sys.stderr):
+        report = supervise(
+            url,
+            args.source,
+            args.supervise,
+            args.read_timeout or config.STREAM_READ_TIMEOUT_SECONDS,
+            args.hot_standby,
+        )
+    report["server"] = dict(flaky.counts)
+    server.should_exit = True
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
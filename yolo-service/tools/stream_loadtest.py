@@ -0,0 +1,467 @@
+"""Live View Load Test
+
+Opens concurrent viewers against a running http_server: /stream multipart
+clients in SSE mode (some of them deliberately slow readers) and playlist /
+segment pollers in HLS mode. Prints a JSON report with per-client delivered
+fps, frame age, bytes/s and stalls, plus the server's CPU usage and event
+loop lag scraped from /metrics.
+
+Run from yolo-service/ while the service is running:
+    python tools/stream_loadtest.py --clients 1,5,10,20 --duration 20
+    python tools/stream_loadtest.py --clients 10 --slow-clients 3 --slow-rate-kb 50
+
+Frame age is the receive time minus the capture time the server puts in each
+part's X-Timestamp header, so it is only exact when client and server share a
+clock (same host, or NTP-synced).
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import re
+import sys
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urljoin
+
+import httpx
+import numpy as np
+
+METRIC_LINE = re.compile(r"^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{[^}]*\})? (\S+)$")
+
+
+class ViewerStats:
+    """What one viewer received: frames (SSE) or segments (HLS)"""
+
+    def __init__(self, kind: str, index: int, stall_seconds: float):
+        self.kind = kind
+        self.index = index
+        self.stall_seconds = stall_seconds
+        self.connected_at: float = None
+        self.finished_at: float = None
+        self.frames = 0
+        self.bytes = 0
+        self.ages: list[float] = []
+        self.fetch_times: list[float] = []
+        self.last_frame_at: float = None
+        self.max_gap = 0.0
+        self.stalls = 0
+        self.error: str = None
+
+    def record_frame(self, captured_at: float | None):
+        """Count a complete frame, captured_at being its server-side Unix time"""
+        now = time.monotonic()
+        if captured_at is not None:
+            self.ages.append(time.time() - captured_at)
+        gap = now - (self.last_frame_at or self.connected_at)
+        self.max_gap = max(self.max_gap, gap)
+        if gap > self.stall_seconds:
+            self.stalls += 1
+        self.last_frame_at = now
+        self.frames += 1
+
+    def summary(self) -> dict:
+        end = self.finished_at or time.monotonic()
+        elapsed = end - self.connected_at if self.connected_at else 0.0
+        # Time since the last frame counts as a gap too
+        max_gap = max(self.max_gap, end - (self.last_frame_at or end))
+        rate = round(self.frames / elapsed, 2) if elapsed else 0.0
+        result = {"kind": self.kind, "index": self.index}
+        if self.kind == "hls":
+            result.update(segments=self.frames, segments_per_second=rate)
+        else:
+            result.update(frames=self.frames, fps=rate)
+        result.update(
+            connected=self.connected_at is not None,
+            kbytes_per_second=round(self.bytes / 1024 / elapsed, 1) if elapsed else 0.0,
+            age_ms=percentiles_ms(self.ages),
+            max_gap_ms=round(max_gap * 1000, 1),
+            stalls=self.stalls,
+        )
+        if self.fetch_times:
+            result["segment_fetch_ms"] = percentiles_ms(self.fetch_times)
+        if self.error:
+            result["error"] = self.error
+        return result
+
+
+def percentiles_ms(values: list[float]) -> dict:
+    if not values:
+        return {}
+    p50, p95 = np.percentile(np.asarray(values) * 1000, [50, 95])
+    return {
+        "p50": round(float(p50), 1),
+        "p95": round(float(p95), 1),
+        "max": round(max(values) * 1000, 1),
+    }
+
+
+def take_parts(buffer: bytearray) -> list[float | None]:
+    """Remove every complete part from a multipart buffer
+
+    Returns:
+        X-Timestamp of each removed part (None when the server sent none)
+    """
+    timestamps = []
+    while True:
+        header_end = buffer.find(b"\r\n\r\n")
+        if header_end < 0:
+            return timestamps
+        headers = {}
+        for line in bytes(buffer[:header_end]).split(b"\r\n"):
+            name, _, value = line.partition(b":")
+            if value:
+                headers[name.strip().lower()] = value.strip()
+        if b"content-length" not in headers:
+            raise ValueError("Multipart part without Content-Length")
+        end = header_end + 4 + int(headers[b"content-length"]) + 2
+        if len(buffer) < end:
+            return timestamps
+        timestamp = headers.get(b"x-timestamp")
+        timestamps.append(float(timestamp) if timestamp else None)
+        del buffer[:end]
+
+
+async def run_stream_viewer(
+    client: httpx.AsyncClient, url: str, params: dict, stats: ViewerStats, rate: float
+):
+    """Read a /stream response until cancelled
+
+    Args:
+        rate: Bytes per second a slow reader drains the socket at (0 = as fast
+            as the server sends); the server feels it as TCP back-pressure
+    """
+    buffer = bytearray()
+    try:
+        async with client.stream("GET", url, params=params) as response:
+            content_type = response.headers.get("content-type", "")
+            if response.status_code != 200 or not content_type.startswith("multipart/"):
+                stats.error = f"HTTP {response.status_code} {content_type}"
+                return
+            stats.connected_at = time.monotonic()
+            async for chunk in response.aiter_raw():
+                stats.bytes += len(chunk)
+                buffer += chunk
+                for captured_at in take_parts(buffer):
+                    stats.record_frame(captured_at)
+                if rate:
+                    await asyncio.sleep(len(chunk) / rate)
+            stats.error = "Stream ended by server"
+    except (httpx.HTTPError, ValueError) as e:
+        stats.error = f"{type(e).__name__}: {e}"
+    finally:
+        stats.finished_at = time.monotonic()
+
+
+async def run_hls_viewer(
+    client: httpx.AsyncClient, playlist_url: str, stats: ViewerStats
+):
+    """Poll a live playlist like a player and download each new segment"""
+    seen: set[str] = set()
+    try:
+        while True:
+            response = await client.get(playlist_url)
+            if response.status_code != 200:
+                stats.error = f"HTTP {response.status_code} for the playlist"
+                await asyncio.sleep(1.0)
+                continue
+            if stats.connected_at is None:
+                stats.connected_at = time.monotonic()
+            stats.bytes += len(response.content)
+
+            target_duration = 2.0
+            segments = []
+            for line in response.text.splitlines():
+                if line.startswith("#EXT-X-TARGETDURATION:"):
+                    target_duration = float(line.split(":", 1)[1])
+                    # Segments arrive once per target duration
+                    stats.stall_seconds = max(stats.stall_seconds, 2 * target_duration)
+                elif line and not line.startswith("#"):
+                    segments.append(line)
+            # A player joins at the live edge instead of fetching the window
+            new = [segment for segment in segments if segment not in seen]
+            if not seen:
+                new = new[-1:]
+            seen.update(segments)
+
+            for segment in new:
+                started = time.monotonic()
+                segment_response = await client.get(urljoin(playlist_url, segment))
+                if segment_response.status_code != 200:
+                    continue
+                stats.fetch_times.append(time.monotonic() - started)
+                stats.bytes += len(segment_response.content)
+                modified = segment_response.headers.get("last-modified")
+                stats.record_frame(
+                    parsedate_to_datetime(modified).timestamp() if modified else None
+                )
+
+            await asyncio.sleep(target_duration / 2)
+    except httpx.HTTPError as e:
+        stats.error = f"{type(e).__name__}: {e}"
+    finally:
+        stats.finished_at = time.monotonic()
+
+
+def parse_metrics(text: str) -> dict[str, float]:
+    """Prometheus text exposition -> {"name{labels}": value}"""
+    samples = {}
+    for line in text.splitlines():
+        match = METRIC_LINE.match(line)
+        if match:
+            name, labels, value = match.groups()
+            samples[name + (labels or "")] = float(value)
+    return samples
+
+
+async def scrape_metrics(client: httpx.AsyncClient, base_url: str) -> dict | None:
+    try:
+        response = await client.get(f"{base_url}/metrics")
+    except httpx.HTTPError:
+        return None
+    if response.status_code != 200:
+        return None
+    return {"at": time.monotonic(), "samples": parse_metrics(response.text)}
+
+
+def server_report(before: dict | None, after: dict | None) -> dict:
+    """Server CPU and event loop lag between two scrapes of /metrics"""
+    if not before or not after:
+        return {"error": "GET /metrics failed"}
+
+    old, new = before["samples"], after["samples"]
+
+    def delta(key: str) -> float:
+        return new.get(key, 0.0) - old.get(key, 0.0)
+
+    elapsed = after["at"] - before["at"]
+    report = {
+        "cpu_percent": round(delta("process_cpu_seconds_total") / elapsed * 100, 1)
+        if "process_cpu_seconds_total" in new
+        else None,
+        "sse_clients": new.get("yolo_sse_clients"),
+        "sse_mbytes_sent": round(
+            sum(
+                new[key] - old.get(key, 0.0)
+                for key in new
+                if key.startswith("yolo_sse_bytes_sent_total")
+            )
+            / 1024
+            / 1024,
+            2,
+        ),
+    }
+
+    count = delta("yolo_event_loop_lag_seconds_count")
+    if count > 0:
+        # Smallest bucket bound holding 95% of the new samples
+        prefix = 'yolo_event_loop_lag_seconds_bucket{le="'
+        bounds = sorted(
+            (float(key[len(prefix) : -2]), delta(key))
+            for key in new
+            if key.startswith(prefix) and "+Inf" not in key
+        )
+        p95 = next((bound for bound, seen in bounds if seen >= 0.95 * count), None)
+        report["event_loop_lag_ms"] = {
+            "samples": int(count),
+            "mean": round(delta("yolo_event_loop_lag_seconds_sum") / count * 1000, 2),
+            "p95_at_most": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+    return report
+
+
+def summarize_group(viewers: list[ViewerStats]) -> dict:
+    """Aggregate the viewers of one kind"""
+    summaries = [viewer.summary() for viewer in viewers]
+    rate_key = "segments_per_second" if viewers[0].kind == "hls" else "fps"
+    rates = [summary[rate_key] for summary in summaries if summary["connected"]]
+    ages = [age for viewer in viewers for age in viewer.ages]
+    return {
+        "viewers": len(viewers),
+        "connected": len(rates),
+        "errors": sum(1 for summary in summaries if "error" in summary),
+        rate_key: {
+            "min": round(min(rates), 2),
+            "mean": round(float(np.mean(rates)), 2),
+            "max": round(max(rates), 2),
+        }
+        if rates
+        else {},
+        "age_ms": percentiles_ms(ages),
+        "kbytes_per_second": round(
+            sum(summary["kbytes_per_second"] for summary in summaries), 1
+        ),
+        "stalls": sum(summary["stalls"] for summary in summaries),
+        "clients": summaries,
+    }
+
+
+def stream_paths(args, mode: str) -> str:
+    if mode == "hls":
+        return f"/{args.camera}/stream.m3u8" if args.camera else "/stream.m3u8"
+    return f"/stream/{args.camera}" if args.camera else "/stream"
+
+
+async def run_level(client: httpx.AsyncClient, args, mode: str, viewers: int) -> dict:
+    """Hold one number of concurrent viewers for args.duration seconds"""
+    base_url = args.url.rstrip("/")
+    url = base_url + stream_paths(args, mode)
+    params = {
+        key: value
+        for key, value in (
+            ("width", args.width),
+            ("quality", args.quality),
+            ("fps", args.fps),
+        )
+        if value is not None
+    }
+
+    groups: dict[str, list[ViewerStats]] = {}
+    tasks = []
+    slow = args.slow_clients if mode == "sse" else 0
+    for index in range(viewers + slow):
+        if mode == "hls":
+            kind, rate = "hls", 0
+        elif index >= viewers:
+            kind, rate = "slow", args.slow_rate_kb * 1024
+        else:
+            kind, rate = "stream", 0
+        stats = ViewerStats(kind, index, args.stall_seconds)
+        groups.setdefault(kind, []).append(stats)
+        if mode == "hls":
+            coroutine = run_hls_viewer(client, url, stats)
+        else:
+            coroutine = run_stream_viewer(client, url, params, stats, rate)
+        tasks.append(asyncio.create_task(coroutine))
+        if args.ramp_seconds:
+            await asyncio.sleep(args.ramp_seconds / (viewers + slow))
+
+    # Let every viewer get its first frame before measuring the server
+    await asyncio.sleep(min(args.warmup, args.duration))
+    before = await scrape_metrics(client, base_url)
+    cpu_before, wall_before = time.process_time(), time.monotonic()
+    await asyncio.sleep(max(args.duration - args.warmup, 0.0))
+    after = await scrape_metrics(client, base_url)
+    cpu_after, wall_after = time.process_time(), time.monotonic()
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    loadtest_cpu = (cpu_after - cpu_before) / max(wall_after - wall_before, 1e-6)
+    return {
+        "viewers": viewers,
+        "url": url,
+        **{kind: summarize_group(stats) for kind, stats in groups.items()},
+        "server": server_report(before, after),
+        # Near 100 means this tool, not the server, was the bottleneck
+        "loadtest_cpu_percent": round(loadtest_cpu * 100, 1),
+    }
+
+
+async def run(args) -> dict:
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    timeout = httpx.Timeout(10.0, read=None)
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+        mode = args.mode
+        if mode == "auto":
+            try:
+                response = await client.get(f"{args.url.rstrip('/')}/health")
+                mode = response.json().get("mode", "sse")
+            except (httpx.HTTPError, ValueError) as e:
+                raise SystemExit(f"[LoadTest] No service at {args.url}: {e}")
+        print(f"[LoadTest] {args.url} in {mode} mode")
+
+        levels = []
+        for viewers in args.clients:
+            print(f"[LoadTest] {viewers} viewers for {args.duration}s")
+            levels.append(await run_level(client, args, mode, viewers))
+            await asyncio.sleep(args.pause)
+
+    return {
+        "load": {
+            "url": args.url,
+            "mode": mode,
+            "camera": args.camera,
+            "duration_seconds": args.duration,
+            "slow_clients": args.slow_clients if mode == "sse" else 0,
+            "slow_rate_kb": args.slow_rate_kb,
+            "params": {"width": args.width, "quality": args.quality, "fps": args.fps},
+        },
+        "levels": levels,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the live view endpoints")
+    parser.add_argument("--url", default="http://127.0.0.1:8081")
+    parser.add_argument("--camera", help="Camera code (default: the default camera)")
+    parser.add_argument(
+        "--mode",
+        choices=["auto", "sse", "hls"],
+        default="auto",
+        help="auto reads OUTPUT_MODE from /health",
+    )
+    parser.add_argument(
+        "--clients",
+        type=lambda text: [int(value) for value in text.split(",")],
+        default=[10],
+        help="Concurrent viewers; a comma-separated list runs one level each",
+    )
+    parser.add_argument(
+        "--slow-clients",
+        type=int,
+        default=0,
+        help="Slow-reading viewers added to every level (SSE mode)",
+    )
+    parser.add_argument(
+        "--slow-rate-kb",
+        type=float,
+        default=64.0,
+        help="Kilobytes per second a slow viewer reads",
+    )
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds/level")
+    parser.add_argument(
+        "--warmup",
+        type=float,
+        default=2.0,
+        help="Seconds after connecting before the server is measured",
+    )
+    parser.add_argument(
+        "--ramp-seconds", type=float, default=0.0, help="Spread the connects over"
+    )
+    parser.add_argument(
+        "--pause", type=float, default=1.0, help="Seconds between levels"
+    )
+    parser.add_argument(
+        "--stall-seconds",
+        type=float,
+        default=2.0,
+        help="Gap between frames counted as a stall (HLS: two target durations)",
+    )
+    parser.add_argument("--width", type=int, help="/stream width parameter")
+    parser.add_argument("--quality", type=int, help="/stream quality parameter")
+    parser.add_argument("--fps", type=float, help="/stream fps parameter")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args(argv)
+    if args.warmup >= args.duration:
+        parser.error("--warmup must be shorter than --duration")
+    return args
+
+
+def main(argv=None) -> dict:
+    args = parse_args(argv)
+    with contextlib.redirect_stdout(sys.stderr):
+        report = asyncio.run(run(args))
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    print(text)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""Local Backend Stand-In
+
+Implements the parts of the Laravel API the YOLO service talks to:
+POST /api/violations, POST /api/camera-heartbeat and GET /health, with
+configurable latency, error rate, rejection rate and rate limiting.
+GET /stub/stats returns what the stub received.
+
+Run from yolo-service/:
+    python tools/stub_backend.py --port 8000 --latency-ms 80 --error-rate 0.05
+
+Then point BACKEND_API_URL at it, or use tools/violation_loadgen.py, which
+can also start it in-process.
+"""
+
+import argparse
+import asyncio
+import random
+import re
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+CAMERA_CODE_FIELD = re.compile(rb'name="camera_code"\r\n\r\n([^\r]*)\r\n')
+VIOLATION_CODE_FIELD = re.compile(
+    rb'name="violation_details\[\d+\]\[violation_code\]"\r\n\r\n([^\r]*)\r\n'
+)
+
+
+def respond(status: int, message: str, data=None, headers: dict = None):
+    """Response in the backend's {statusCode, message, data} envelope"""
+    return JSONResponse(
+        {"statusCode": status, "message": message, "data": data},
+        status_code=status,
+        headers=headers,
+    )
+
+
+class StubBackend:
+    """In-memory backend answering like the Laravel API, with fault injection"""
+
+    def __init__(
+        self,
+        latency_ms: float = 50.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        reject_rate: float = 0.0,
+        rate_limit: float = 0.0,
+        seed: int = None,
+    ):
+        """Initialize stub backend
+
+        Args:
+            latency_ms: Mean response delay
+            jitter_ms: Standard deviation of the delay
+            error_rate: Share of violation requests answered with 503
+            reject_rate: Share of violation requests answered with 422
+            rate_limit: Violation requests per second before 429 (0 = off)
+            seed: Random seed for the injected faults
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.reject_rate = reject_rate
+        self.rate_limit = rate_limit
+        self._random = random.Random(seed)
+
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.counts = Counter()
+        self.violation_codes = Counter()
+        self.cameras = Counter()
+        self.heartbeats: dict[str, dict] = {}
+        self.service_times: list[float] = []
+        self._ids_by_key: dict[str, int] = {}
+        self._next_id = 1
+        self._window_start = time.monotonic()
+        self._window_count = 0
+
+        self.app = FastAPI()
+        self.app.post("/api/violations")(self.store_violation)
+        self.app.post("/api/camera-heartbeat")(self.store_heartbeat)
+        self.app.get("/health")(self.health)
+        self.app.get("/stub/stats")(self.stats_endpoint)
+
+    async def _delay(self):
+        delay = self._random.gauss(self.latency_ms, self.jitter_ms) / 1000
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _rate_limited(self) -> bool:
+        """Fixed one-second window counter"""
+        if not self.rate_limit:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            if now - self._window_start >= 1.0:
+                self._window_start = now
+                self._window_count = 0
+            self._window_count += 1
+            return self._window_count > self.rate_limit
+
+    async def store_violation(self, request: Request):
+        started = time.perf_counter()
+        body = await request.body()
+        await self._delay()
+
+        with self._lock:
+            self.counts["violation_requests"] += 1
+        if self._rate_limited():
+            with self._lock:
+                self.counts["throttled"] += 1
+            return respond(429, "Too Many Requests", headers={"Retry-After": "1"})
+
+        roll = self._random.random()
+        if roll < self.error_rate:
+            with self._lock:
+                self.counts["server_errors"] += 1
+            return respond(503, "Service Unavailable")
+
+        camera_match = CAMERA_CODE_FIELD.search(body)
+        codes = [code.decode() for code in VIOLATION_CODE_FIELD.findall(body)]
+        if (
+            roll < self.error_rate + self.reject_rate
+            or not camera_match
+            or not codes
+            or b'name="image"' not in body
+        ):
+            with self._lock:
+                self.counts["rejected"] += 1
+            return respond(422, "Validation failed", {"camera_code": ["invalid"]})
+
+        key = request.headers.get("Idempotency-Key")
+        with self._lock:
+            if key and key in self._ids_by_key:
+                self.counts["duplicates"] += 1
+                violation_id = self._ids_by_key[key]
+            else:
+                violation_id = self._next_id
+                self._next_id += 1
+                if key:
+                    self._ids_by_key[key] = violation_id
+                self.counts["accepted"] += 1
+                self.counts["violation_details"] += len(codes)
+                self.violation_codes.update(codes)
+                self.cameras[camera_match.group(1).decode()] += 1
+            self.service_times.append(time.perf_counter() - started)
+
+        return respond(201, "Violation created", {"id": violation_id})
+
+    async def store_heartbeat(self, request: Request):
+        await self._delay()
+        try:
+            payload = await request.json()
+        except ValueError:
+            payload = {}
+        camera_code = payload.get("camera_code")
+        if not camera_code:
+            return respond(422, "Validation failed", {"camera_code": ["required"]})
+
+        with self._lock:
+            self.counts["heartbeats"] += 1
+            self.heartbeats[camera_code] = {**payload, "received_at": time.time()}
+        return respond(200, "Heartbeat received", {"code": camera_code})
+
+    async def health(self):
+        return {"status": "ok"}
+
+    async def stats_endpoint(self):
+        return self.get_stats()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            elapsed = time.time() - self.started_at
+            service_ms = np.asarray(self.service_times) * 1000
+            stats = {
+                "uptime_seconds": round(elapsed, 1),
+                **dict(self.counts),
+                "accepted_per_second": round(self.counts["accepted"] / elapsed, 2)
+                if elapsed
+                else 0.0,
+                "violation_codes": dict(self.violation_codes),
+                "cameras": dict(self.cameras),
+                "heartbeats_by_camera": dict(self.heartbeats),
+            }
+        if len(service_ms):
+            p50, p95, p99 = np.percentile(service_ms, [50, 95, 99])
+            stats["service_ms"] = {
+                "p50": round(float(p50), 2),
+                "p95": round(float(p95), 2),
+                "p99": round(float(p99), 2),
+            }
+        return stats
+
+
+def start_in_thread(
+    backend: StubBackend, host: str = "127.0.0.1", port: int = 0
+) -> tuple[object, int]:
+    """Serve a StubBackend from a background thread
+
+    Returns:
+        (uvicorn server, bound port); set server.should_exit to stop it
+    """
+    import uvicorn
+
+    server = uvicorn.Server(
+        uvicorn.Config(backend.app, host=host, port=port, log_level="warning")
+    )
+    thread = threading.Thread(target=server.run, name="stub-backend", daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline or not thread.is_alive():
+            raise RuntimeError("Stub backend did not start")
+        time.sleep(0.01)
+    bound_port = server.servers[0].sockets[0].getsockname()[1]
+    return server, bound_port
+
+
+def add_fault_arguments(parser: argparse.ArgumentParser):
+    """Latency and fault options shared with the load generator"""
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="Share of 503 answers"
+    )
+    parser.add_argument(
+        "--reject-rate", type=float, default=0.0, help="Share of 422 answers"
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=0.0,
+        help="Violation requests per second before 429 (0 = unlimited)",
+    )
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def create_backend(args) -> StubBackend:
+    return StubBackend(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        reject_rate=args.reject_rate,
+        rate_limit=args.rate_limit,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the backend API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    backend = create_backend(args)
+    print(f"[Stub] Backend stand-in on http://{args.host}:{args.port}")
+    uvicorn.run(backend.app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
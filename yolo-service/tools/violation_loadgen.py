@@ -0,0 +1,303 @@
+"""Violation Submission Load Generator
+
+Drives synthetic violation bursts (many types, many cameras, many tracked
+offenders) through the real ViolationQueue -> ViolationSubmitter ->
+ViolationOutbox -> BackendClient path, against tools/stub_backend.py started
+in-process or any backend given with --backend-url. Prints a JSON report:
+achieved requests/s, stored -> delivered latency, memory held in the
+submitter's pending reports, and how many violations were throttled
+(deduplicated), merged, retried or dropped.
+
+Run from yolo-service/:
+    python tools/violation_loadgen.py --cameras 8 --fps 10 --duration 30
+    python tools/violation_loadgen.py --error-rate 0.2 --rate-limit 20
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import config  # noqa: E402
+from modules.backend_client import BackendClient  # noqa: E402
+from modules.violation_outbox import OutboxEntry, ViolationOutbox  # noqa: E402
+from modules.violation_queue import ViolationQueue  # noqa: E402
+from modules.violation_submitter import ViolationSubmitter  # noqa: E402
+from stub_backend import add_fault_arguments, create_backend, start_in_thread  # noqa: E402
+
+VIOLATION_TYPES = ("no-apron", "no-hairnet", "no-mask")
+
+
+class MeasuredOutbox(ViolationOutbox):
+    """ViolationOutbox that records how long stored reports took to deliver"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stored_reports = 0
+        self.stored_violations = 0
+        self.delivery_latencies: list[float] = []
+        self.rejected = 0
+
+    def add(self, frame, camera_code, violation_details, notes=None) -> str:
+        key = super().add(frame, camera_code, violation_details, notes)
+        self.stored_reports += 1
+        self.stored_violations += len(violation_details)
+        return key
+
+    def mark_sent(self, entry: OutboxEntry):
+        super().mark_sent(entry)
+        self.delivery_latencies.append(time.time() - entry.created_at)
+
+    def drop(self, entry: OutboxEntry):
+        super().drop(entry)
+        self.rejected += 1
+
+
+def percentiles_ms(values: list[float]) -> dict:
+    if not values:
+        return {}
+    p50, p95, p99 = np.percentile(np.asarray(values) * 1000, [50, 95, 99])
+    return {
+        "p50": round(float(p50), 1),
+        "p95": round(float(p95), 1),
+        "p99": round(float(p99), 1),
+        "max": round(max(values) * 1000, 1),
+    }
+
+
+def pending_bytes(submitter: ViolationSubmitter) -> tuple[int, int]:
+    """(reports, evidence bytes) currently held in memory by the submitter"""
+    with submitter._lock:
+        reports = list(submitter.pending_reports.values())
+    return len(reports), sum(frame.nbytes for frame, _ in reports)
+
+
+def generate(args, submitter: ViolationSubmitter, counts: dict, stop: threading.Event):
+    """Offer violations like publish_detections() does, frame by frame
+
+    Every camera produces fps frames per second; each frame carries each
+    violation type with probability --density, on one of --tracks offenders.
+    """
+    rng = random.Random(args.seed)
+    types = list(VIOLATION_TYPES) + [f"no-extra-{i}" for i in range(args.extra_types)]
+    cameras = [f"LOAD{index:03d}" for index in range(args.cameras)]
+    frame = np.zeros((args.frame_height, args.frame_width, 3), dtype=np.uint8)
+    interval = 1.0 / args.fps
+    next_tick = time.perf_counter()
+    deadline = next_tick + args.duration
+
+    while not stop.is_set() and time.perf_counter() < deadline:
+        for camera_code in cameras:
+            offered = []
+            for violation_type in types:
+                if rng.random() >= args.density:
+                    continue
+                track_id = rng.randrange(args.tracks) if args.tracks else None
+                counts["offered"] += 1
+                if not submitter.wants_violation(violation_type, camera_code, track_id):
+                    counts["throttled"] += 1
+                    continue
+                offered.append(
+                    {
+                        "violation_type": violation_type,
+                        "violation_code": violation_type.upper().replace("-", "_"),
+                        "confidence": rng.uniform(0.5, 0.99),
+                        "track_id": track_id,
+                    }
+                )
+            if offered:
+                counts["handed_over"] += len(offered)
+                submitter.add_violations(frame.copy(), offered, camera_code)
+
+        next_tick += interval
+        time.sleep(max(0.0, next_tick - time.perf_counter()))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Load-test the violation submission path"
+    )
+    parser.add_argument(
+        "--backend-url",
+        help="Existing backend or stub (default: start tools/stub_backend.py here)",
+    )
+    parser.add_argument("--cameras", type=int, default=4)
+    parser.add_argument("--fps", type=float, default=10.0, help="Frames per camera/s")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds")
+    parser.add_argument(
+        "--density",
+        type=float,
+        default=0.3,
+        help="Chance a frame shows each violation type",
+    )
+    parser.add_argument(
+        "--extra-types",
+        type=int,
+        default=0,
+        help="Additional synthetic violation types beyond the three real ones",
+    )
+    parser.add_argument(
+        "--tracks",
+        type=int,
+        default=20,
+        help="Offenders per camera (0 = untracked, throttled per type)",
+    )
+    parser.add_argument(
+        "--rereport-seconds",
+        type=float,
+        default=None,
+        help="ViolationQueue delay (default: from config)",
+    )
+    parser.add_argument("--frame-width", type=int, default=1280)
+    parser.add_argument("--frame-height", type=int, default=720)
+    parser.add_argument("--concurrency", type=int, default=None)
+    parser.add_argument(
+        "--drain-timeout",
+        type=float,
+        default=30.0,
+        help="Seconds to wait for the outbox to empty after the load stops",
+    )
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    add_fault_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> dict:
+    args = parse_args(argv)
+    # Submitter logs must not mix with the JSON report
+    with contextlib.redirect_stdout(sys.stderr):
+        report = run(args)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    print(text)
+    return report
+
+
+def run(args) -> dict:
+    work_dir = tempfile.mkdtemp(prefix="violation-load-")
+    server = backend = None
+    if args.backend_url:
+        backend_url = args.backend_url
+    else:
+        backend = create_backend(args)
+        server, port = start_in_thread(backend)
+        backend_url = f"http://127.0.0.1:{port}"
+    print(f"[LoadGen] Backend: {backend_url}")
+
+    if args.rereport_seconds is not None:
+        delay = args.rereport_seconds
+    elif args.tracks:
+        delay = config.VIOLATION_REREPORT_SECONDS
+    else:
+        delay = config.VIOLATION_DELAY
+    outbox = MeasuredOutbox(
+        os.path.join(work_dir, "outbox.sqlite3"),
+        os.path.join(work_dir, "evidence"),
+        max_items=config.OUTBOX_MAX_ITEMS,
+        max_age_seconds=config.OUTBOX_MAX_AGE_SECONDS,
+    )
+    submitter = ViolationSubmitter(
+        BackendClient(api_url=backend_url, timeout=10),
+        ViolationQueue(delay_seconds=delay),
+        outbox,
+        concurrency=args.concurrency,
+    )
+
+    counts = {"offered": 0, "throttled": 0, "handed_over": 0}
+    stop = threading.Event()
+    peak_reports = peak_bytes = 0
+    started = time.perf_counter()
+    submitter.start()
+    generator = threading.Thread(
+        target=generate, args=(args, submitter, counts, stop), daemon=True
+    )
+    generator.start()
+    try:
+        while generator.is_alive():
+            reports, held = pending_bytes(submitter)
+            peak_reports = max(peak_reports, reports)
+            peak_bytes = max(peak_bytes, held)
+            time.sleep(0.05)
+        load_seconds = time.perf_counter() - started
+
+        # Let the outbox drain, retries included
+        deadline = time.monotonic() + args.drain_timeout
+        while time.monotonic() < deadline:
+            if not pending_bytes(submitter)[0] and not outbox.get_stats()["depth"]:
+                break
+            time.sleep(0.1)
+    except KeyboardInterrupt:
+        stop.set()
+        load_seconds = time.perf_counter() - started
+    finally:
+        submitter.stop()
+    total_seconds = time.perf_counter() - started
+
+    outbox_stats = outbox.get_stats()
+    report = {
+        "load": {
+            "backend_url": backend_url,
+            "cameras": args.cameras,
+            "fps_per_camera": args.fps,
+            "violation_types": len(VIOLATION_TYPES) + args.extra_types,
+            "tracks_per_camera": args.tracks,
+            "density": args.density,
+            "load_seconds": round(load_seconds, 1),
+            "total_seconds": round(total_seconds, 1),
+            "concurrency": submitter.concurrency,
+        },
+        "violations": {
+            **counts,
+            "stored_reports": outbox.stored_reports,
+            "stored_violations": outbox.stored_violations,
+            # Replaced by a newer sighting of the same offender before the
+            # report was stored, or throttled when it was
+            "deduplicated_at_store": counts["handed_over"] - outbox.stored_violations,
+        },
+        "delivery": {
+            "sent": outbox_stats["sent"],
+            "requests_per_second": round(outbox_stats["sent"] / total_seconds, 2),
+            "failed_attempts": outbox_stats["failed_attempts"],
+            "rejected": outbox.rejected,
+            "dropped_by_caps": outbox_stats["dropped"] - outbox.rejected,
+            "left_in_outbox": outbox_stats["depth"],
+            "stored_to_delivered_ms": percentiles_ms(outbox.delivery_latencies),
+        },
+        "memory": {
+            "peak_pending_reports": peak_reports,
+            "peak_pending_mb": round(peak_bytes / 1024 / 1024, 2),
+        },
+    }
+
+    if backend:
+        report["backend"] = backend.get_stats()
+        report["backend"].pop("heartbeats_by_camera", None)
+        server.should_exit = True
+    else:
+        try:
+            report["backend"] = httpx.get(f"{backend_url}/stub/stats", timeout=5).json()
+        except (httpx.HTTPError, ValueError):
+            pass
+
+    outbox.close()
+    shutil.rmtree(work_dir, ignore_errors=True)
+    return report
+
+
+if __name__ == "__main__":
+    main()